@@ -1,83 +1,449 @@
+import atexit
+import decimal
 import http.client
-import math
+import json
+import os
+import re
+import time
+import types
 
-from flask import Flask
+from flask import Flask, Response, g, request
+from werkzeug.datastructures import Headers
+from werkzeug.wsgi import ClosingIterator
 
-from app import util
-from app.calc import Calculator, InvalidPermissions # Importamos InvalidPermissions
+from app import admission, audit, batch, expr, httpcache, memo, metrics, numeric, offload, operations, profiling, render, stream, util
+from app.calc import DEFAULT_USER, Calculator, acting_as, iterate_as
+from app.permissions import CachedPermissionProvider
 
-CALCULATOR = Calculator()
+
+def build_permissions():
+    # La caché de permisos se activa definiendo CALC_PERMISSION_CACHE_TTL (segundos)
+    ttl = os.environ.get("CALC_PERMISSION_CACHE_TTL")
+    if not ttl:
+        return None
+    size = int(os.environ.get("CALC_PERMISSION_CACHE_SIZE", "1024"))
+    return CachedPermissionProvider(maxsize=size, ttl=float(ttl))
+
+
+def configure_audit():
+    # Registro de auditoría asíncrono: el camino de la petición nunca espera por la E/S
+    audit.configure(
+        level=os.environ.get("CALC_AUDIT_LEVEL", "INFO"),
+        sample_rate=float(os.environ.get("CALC_AUDIT_SAMPLE_RATE", "1")),
+    )
+    atexit.register(audit.shutdown)
+
+
+def build_response_cache():
+    # CALC_MEMO_SIZE=0 desactiva la caché; CALC_MEMO_OPERATIONS limita las operaciones cacheadas
+    size = int(os.environ.get("CALC_MEMO_SIZE", "1024"))
+    operations = os.environ.get("CALC_MEMO_OPERATIONS")
+    operations = operations.split(",") if operations else memo.PURE_OPERATIONS
+    return memo.ResponseCache(maxsize=max(size, 1), operations=operations if size > 0 else ())
+
+
+def build_http_cache():
+    # ETag y Cache-Control immutable por operación; CALC_HTTP_CACHE_OPERATIONS=none los desactiva y
+    # CALC_ETAG_VERSION invalida las ETags de los clientes y CDN tras un cambio de comportamiento
+    operations = os.environ.get("CALC_HTTP_CACHE_OPERATIONS")
+    if operations is None:
+        operations = memo.PURE_OPERATIONS
+    else:
+        operations = [op for op in operations.split(",") if op and op != "none"]
+    return httpcache.HttpCachePolicy(
+        max_age=int(os.environ.get("CALC_HTTP_CACHE_MAX_AGE", httpcache.IMMUTABLE_MAX_AGE)),
+        operations=operations,
+        version=os.environ.get("CALC_ETAG_VERSION", "1"),
+    )
+
+
+def build_tracer():
+    # CALC_TRACE=1 envuelve los métodos de Calculator, convert_to_number y validate_permissions;
+    # sin él no se instala nada. Las llamadas van a /metrics y al informe de ?profile=1
+    if os.environ.get("CALC_TRACE") != "1":
+        return None
+    return profiling.Tracer([profiling.observe_span, profiling.record_span])
+
+
+def build_profiler():
+    # CALC_PROFILING=1 habilita ?profile=1 y /admin/profile; sin él ninguno de los dos existe
+    if os.environ.get("CALC_PROFILING") != "1":
+        return None
+    return profiling.Profiler(
+        max_seconds=float(os.environ.get("CALC_PROFILE_MAX_SECONDS", profiling.MAX_SECONDS)),
+        interval=float(os.environ.get("CALC_PROFILE_INTERVAL", profiling.INTERVAL)),
+    )
+
+
+def instrument(calculator):
+    # Histogramas de latencia de cada método de Calculator y de la comprobación de permisos;
+    # el Tracer se instala antes de construir la tabla de operaciones, que enlaza los métodos
+    metrics.instrument(calculator, operations.ARITY, "calc_calculator_duration_seconds", "method")
+    metrics.instrument(calculator.permissions, ["is_allowed"], "calc_permission_check_duration_seconds")
+    if TRACER is not None:
+        TRACER.install(calculator, operations.ARITY, "Calculator")
+        TRACER.install(util, ["convert_to_number", "validate_permissions"], "util")
+    return calculator
+
+
+def build_offloader():
+    # Las potencias y enteros con más de CALC_OFFLOAD_DIGITS cifras se calculan en otro proceso
+    offloader = offload.Offloader(
+        offload_digits=int(os.environ.get("CALC_OFFLOAD_DIGITS", offload.OFFLOAD_DIGITS)),
+        max_result_digits=int(os.environ.get("CALC_MAX_RESULT_DIGITS", "100000")),
+        timeout=float(os.environ.get("CALC_OFFLOAD_TIMEOUT", "5")),
+    )
+    atexit.register(offloader.shutdown)
+    return offloader
+
+
+def build_rate_limiter():
+    # CALC_RATE_LIMIT fichas por segundo y usuario (0 desactiva el límite); CALC_RATE_BURST es la ráfaga máxima
+    burst = os.environ.get("CALC_RATE_BURST")
+    return admission.RateLimiter(
+        rate=float(os.environ.get("CALC_RATE_LIMIT", "0")),
+        burst=float(burst) if burst else None,
+    )
+
+
+def build_admission():
+    # Cálculos simultáneos, peticiones que pueden esperar un hueco y segundos de espera antes del 503
+    return admission.AdmissionController(
+        limit=int(os.environ.get("CALC_MAX_IN_FLIGHT", "64")),
+        queue=int(os.environ.get("CALC_MAX_QUEUE", "256")),
+        timeout=float(os.environ.get("CALC_QUEUE_TIMEOUT", "1")),
+    )
+
+
+def build_backends():
+    # Contexto de los cálculos con ?numeric=decimal, p. ej. CALC_DECIMAL_ROUNDING=ROUND_HALF_UP
+    return numeric.build_backends(
+        precision=int(os.environ.get("CALC_DECIMAL_PRECISION", "28")),
+        rounding=os.environ.get("CALC_DECIMAL_ROUNDING", decimal.ROUND_HALF_EVEN),
+    )
+
+
+configure_audit()
+TRACER = build_tracer()
+PROFILER = build_profiler()
+CALCULATOR = instrument(Calculator(permissions=build_permissions()))
+RESPONSE_CACHE = build_response_cache()
+HTTP_CACHE = build_http_cache()
+OFFLOADER = build_offloader()
+OPERATIONS = operations.build_table(CALCULATOR, OFFLOADER)
+BACKENDS = build_backends()
+RATE_LIMITER = build_rate_limiter()
+ADMISSION = build_admission()
+EXPRESSIONS = expr.ExpressionEngine(CALCULATOR, maxsize=int(os.environ.get("CALC_EXPR_CACHE_SIZE", "256")))
 api_application = Flask(__name__)
-HEADERS = {"Content-Type": "text/plain", "Access-Control-Allow-Origin": "*"}
+# Cabeceras compartidas por todas las respuestas: de solo lectura, cada respuesta que
+# necesita otras (ETag, Retry-After) construye su propio diccionario
+HEADERS = types.MappingProxyType({"Content-Type": "text/plain", "Access-Control-Allow-Origin": "*"})
+JSON_HEADERS = types.MappingProxyType({"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"})
+METRICS_HEADERS = types.MappingProxyType({"Content-Type": "text/plain; version=0.0.4", "Access-Control-Allow-Origin": "*"})
+PROFILE_HEADERS = types.MappingProxyType({"Content-Type": "application/json", "Cache-Control": "no-store"})
+COLLAPSED_HEADERS = types.MappingProxyType({"Content-Type": "text/plain", "Cache-Control": "no-store"})
+USER_HEADER = "X-Calc-User"
+USER_PATTERN = re.compile(r"[\w.@-]{1,64}")
+# X-Calc-User solo es fiable si la fija un proxy de confianza que descarta la del cliente;
+# sin él, cualquiera podría elegir usuario y saltarse su cupo del limitador
+TRUST_USER_HEADER = os.environ.get("CALC_TRUST_USER_HEADER") == "1"
+
+
+class BytesResponse(Response):
+    # Respuesta 200 ya serializada: Flask la acepta sin convertir la tupla y al servirla se
+    # escriben estado, cabeceras y cuerpo tal cual, sin las dos copias validadas de Headers
+    # que hace werkzeug. Solo lleva cabeceras propias, que no necesitan validación
+    status = "200 OK"
+    status_code = 200
+
+    def __init__(self, body, headers):
+        # Estado que Response.__init__ prepararía para get_data, set_data y call_on_close,
+        # sin construir ni validar las cabeceras
+        self.response = [body]
+        self.direct_passthrough = False
+        self._on_close = []
+        self.header_list = [*headers.items(), ("Content-Length", str(len(body)))]
+        self._headers = None
+
+    @property
+    def headers(self):
+        # Se crea al primer acceso (p. ej. en un after_request) y desde entonces es la fuente
+        # de las cabeceras enviadas: los cambios que se hagan en ella llegan al cliente
+        if self._headers is None:
+            self._headers = Headers(self.header_list)
+        return self._headers
+
+    def __call__(self, environ, start_response):
+        header_list = self.header_list if self._headers is None else self._headers.to_wsgi_list()
+        start_response(self.status, header_list)
+        app_iter = [] if environ["REQUEST_METHOD"] == "HEAD" else self.response
+        if self._on_close:
+            return ClosingIterator(app_iter, self.close)
+        return app_iter
+
+
+def respond(response):
+    # Camino rápido de las respuestas correctas; errores, 304 y demás siguen el camino de Flask
+    body, status, headers = response
+    if status != 200:
+        return response
+    return BytesResponse(render.to_bytes(body), headers)
+
+
+def parse_user(value):
+    # Identidad que se propaga hasta Calculator y el limitador; sin cabecera, el usuario por defecto
+    if not value:
+        return DEFAULT_USER
+    if not USER_PATTERN.fullmatch(value):
+        raise ValueError("Invalid user")
+    return value
+
+
+def identify(value, remote_addr):
+    # Usuario para los permisos y clave del limitador. Sin CALC_TRUST_USER_HEADER=1 la cabecera
+    # se ignora: el usuario es el de por defecto y cada dirección remota tiene su propio cupo
+    if TRUST_USER_HEADER:
+        user = parse_user(value)
+        return user, user
+    return DEFAULT_USER, remote_addr or DEFAULT_USER
+
+
+@api_application.before_request
+def start_timer():
+    g.start = time.perf_counter()
+
+
+@api_application.before_request
+def admit():
+    # Solo los cálculos pasan por el control de admisión; /health y /metrics siempre responden
+    if not request.path.startswith("/calc/"):
+        return None
+    try:
+        g.user, g.client = identify(request.headers.get(USER_HEADER), request.remote_addr)
+        ADMISSION.enter()
+    except ValueError as e:
+        return bad_request(e)
+    except admission.Overloaded as e:
+        return limit_exceeded(e)
+    g.admitted = True
+    return None
+
+
+@api_application.teardown_request
+def release(exception=None):
+    if g.pop("admitted", False):
+        ADMISSION.exit()
+
+
+@api_application.after_request
+def record_metrics(response):
+    elapsed = time.perf_counter() - g.start
+    metrics.record_request(endpoint_name(), request.method, response.status_code, elapsed)
+    return response
 
 
 @api_application.route("/")
 def hello():
     # Aseguramos que el Content-Type sea text/plain como se espera en la prueba
-    return ("Hello from The Calculator!\n", http.client.OK, HEADERS)
+    return respond(("Hello from The Calculator!\n", http.client.OK, HEADERS))
 
 
-@api_application.route("/calc/add/<op_1>/<op_2>", methods=["GET"])
-def add(op_1, op_2):
-    try:
-        num_1, num_2 = util.convert_to_number(op_1), util.convert_to_number(op_2)
-        return ("{}".format(CALCULATOR.add(num_1, num_2)), http.client.OK, HEADERS)
-    except TypeError as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+def endpoint_name():
+    # La ruta genérica de /calc se etiqueta con el nombre de la operación
+    if request.endpoint == "calculate_view":
+        return operation_label(request.view_args["op"])
+    return request.endpoint or "unmatched"
+
+
+def operation_label(op):
+    # Compartida con asgi.py: el segmento de la URL solo es etiqueta si es una operación
+    # conocida; si no, cada ruta inventada crearía una serie nueva en /metrics
+    return op if op in OPERATIONS else "unmatched"
+
+
+def bad_request(error, endpoint=None):
+    endpoint = endpoint or endpoint_name()
+    metrics.record_error(endpoint, error)
+    audit.log("bad_request", audit.WARNING, endpoint=endpoint, error=str(error))
+    return (str(error), http.client.BAD_REQUEST, HEADERS)
+
+
+def limit_exceeded(error, endpoint=None):
+    endpoint = endpoint or endpoint_name()
+    metrics.record_error(endpoint, error)
+    audit.log("limit_exceeded", audit.WARNING, endpoint=endpoint, error=str(error))
+    return (str(error), error.status, limit_headers(error))
+
+
+def limit_headers(error):
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        return HEADERS
+    return dict(HEADERS, **{"Retry-After": str(max(1, round(retry_after)))})
 
 
-@api_application.route("/calc/substract/<op_1>/<op_2>", methods=["GET"])
-def substract(op_1, op_2):
+def calculate(op, parts, backend=numeric.FLOAT, user=DEFAULT_USER, if_none_match=None, client=None):
+    # Despacho común de /calc/<op>/<operandos> (también lo usa asgi.py); el backend
+    # numérico se encarga de convertir los operandos y del contexto del cálculo.
+    # El coste de la operación se cobra al cliente (por defecto, el usuario) antes de calcular,
+    # y si el cliente ya tiene el resultado (If-None-Match) se responde 304 sin calcularlo
+    client = user if client is None else client
+    operation = OPERATIONS.get(op)
+    if operation is None or not operations.accepts(operation, len(parts)):
+        return ("Not Found", http.client.NOT_FOUND, HEADERS)
+
     try:
-        num_1, num_2 = util.convert_to_number(op_1), util.convert_to_number(op_2)
-        return ("{}".format(CALCULATOR.substract(num_1, num_2)), http.client.OK, HEADERS)
-    except TypeError as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+        response = RESPONSE_CACHE.get(op, parts, backend.name)
+        if response is not None:
+            RATE_LIMITER.charge(client)
+            return HTTP_CACHE.revalidate(response, if_none_match)
+        values = backend.parse(parts)
+        etag = HTTP_CACHE.etag(op, backend.name, values)
+        if httpcache.matches(if_none_match, etag, wildcard=False):
+            RATE_LIMITER.charge(client)
+            return HTTP_CACHE.not_modified(HEADERS, etag)
+        RATE_LIMITER.charge(client, operation.cost(*values))
+        with acting_as(user):
+            body = backend.run(operation.function, values)
+        response = (body, http.client.OK, HTTP_CACHE.headers(HEADERS, etag))
+    except operation.errors as e:
+        return bad_request(e, op)
+    except offload.LimitExceeded as e:
+        return limit_exceeded(e, op)
+    RESPONSE_CACHE.put(op, parts, response, backend.name)
+    return HTTP_CACHE.revalidate(response, if_none_match)
 
-# endpoints adicionales
 
-@api_application.route("/calc/multiply/<op_1>/<op_2>", methods=["GET"])
-def multiply(op_1, op_2):
+@api_application.route("/calc/<op>/<path:operands>", methods=["GET"])
+def calculate_view(op, operands):
     try:
-        num_1, num_2 = util.convert_to_number(op_1), util.convert_to_number(op_2)
-        return ("{}".format(CALCULATOR.multiply(num_1, num_2)), http.client.OK, HEADERS)
-    except TypeError as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
-    except InvalidPermissions as e: # Capturamos InvalidPermissions para devolver 400
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+        backend = numeric.select(BACKENDS, request.args.get(numeric.PARAMETER) or request.headers.get(numeric.HEADER))
+    except ValueError as e:
+        return bad_request(e)
+    args = (op, operands.split("/"), backend, g.user, request.headers.get("If-None-Match"), g.client)
+    if PROFILER is not None and request.args.get(profiling.PARAMETER) == "1":
+        return profiled(calculate, *args)
+    return respond(calculate(*args))
+
+
+def profiled(function, *args):
+    # Compartida con asgi.py: la respuesta de la operación se sustituye por el informe de
+    # cProfile de la llamada, con el estado y el cuerpo que habría devuelto
+    (body, status, _headers), report = PROFILER.profile(function, *args)
+    report = dict(status=int(status), body=body, **report)
+    return (json.dumps(report), http.client.OK, PROFILE_HEADERS)
 
 
-@api_application.route("/calc/divide/<op_1>/<op_2>", methods=["GET"])
-def divide(op_1, op_2):
+@api_application.route("/calc/batch", methods=["POST"])
+def calc_batch():
+    # Acepta una lista JSON o NDJSON de {op, args}; los errores se reportan por elemento
     try:
-        num_1, num_2 = util.convert_to_number(op_1), util.convert_to_number(op_2)
-        return ("{}".format(CALCULATOR.divide(num_1, num_2)), http.client.OK, HEADERS)
-    except TypeError as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+        items = batch.parse_items(request.get_data(as_text=True), request.mimetype)
+        RATE_LIMITER.charge(g.client, batch_cost(items))
+    except ValueError as e:
+        return bad_request(e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded(e)
+    with acting_as(g.user):
+        results = list(batch.evaluate_many(OPERATIONS, items))
+    return respond((json.dumps(results), http.client.OK, JSON_HEADERS))
+
+
+def batch_cost(items):
+    # Compartida con asgi.py: cada elemento cuesta lo mismo que su petición /calc/<op>
+    return max(1, sum(batch.item_cost(OPERATIONS, item) for item in items))
 
 
-@api_application.route("/calc/power/<op_1>/<op_2>", methods=["GET"])
-def power(op_1, op_2):
+def charge_items(client):
+    # Compartida con asgi.py: cobro de cada elemento de /calc/stream a medida que llega
+    def charge(cost):
+        RATE_LIMITER.charge(client, cost)
+    return charge
+
+
+@api_application.route("/calc/stream", methods=["POST"])
+def calc_stream():
+    # El cuerpo se lee línea a línea y los resultados se envían a medida que se calculan.
+    # Abrir el stream cuesta una ficha y cada elemento el coste de su operación
+    fmt = "csv" if request.mimetype in stream.CSV_TYPES else "ndjson"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
     try:
-        num_1, num_2 = util.convert_to_number(op_1), util.convert_to_number(op_2)
-        return ("{}".format(CALCULATOR.power(num_1, num_2)), http.client.OK, HEADERS)
-    except TypeError as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+        RATE_LIMITER.charge(g.client)
+    except offload.LimitExceeded as e:
+        return limit_exceeded(e)
+    body = iterate_as(g.user, stream.stream(OPERATIONS, request.stream, fmt, charge_items(g.client)))
+    response = Response(body, http.client.OK, {"Access-Control-Allow-Origin": "*"}, mimetype=mimetype)
+    # teardown_request se ejecuta antes de que el servidor consuma el cuerpo: el hueco de
+    # admisión se libera al cerrar la respuesta
+    if g.pop("admitted", False):
+        response.call_on_close(ADMISSION.exit)
+    return response
 
 
-@api_application.route("/calc/sqrt/<op_1>", methods=["GET"])
-def sqrt(op_1):
+@api_application.route("/calc/expr", methods=["POST"])
+def calc_expr():
+    # {"expr": "...", "vars": {...}} devuelve el resultado en texto plano;
+    # {"expr": "...", "bindings": [{...}, ...]} evalúa el mismo plan compilado para cada conjunto de variables
     try:
-        num_1 = util.convert_to_number(op_1)
-        return ("{}".format(CALCULATOR.sqrt(num_1)), http.client.OK, HEADERS)
-    except (TypeError, ValueError) as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
+        payload = json.loads(request.get_data(as_text=True))
+        return respond(evaluate_expression(payload, g.user, g.client))
+    except batch.ERRORS as e:
+        return bad_request(e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded(e)
+
+
+def evaluate_expression(payload, user, client=None):
+    # Compartida con asgi.py: una ficha por evaluación del plan compilado
+    client = user if client is None else client
+    if not isinstance(payload, dict):
+        raise ValueError("Body must be an object with an 'expr' field")
+    if "bindings" in payload:
+        bindings = payload["bindings"]
+        RATE_LIMITER.charge(client, max(1, len(bindings)) if isinstance(bindings, list) else 1)
+        results = EXPRESSIONS.evaluate_many(payload.get("expr"), bindings, user, OFFLOADER.format)
+        return (json.dumps(results), http.client.OK, JSON_HEADERS)
+    RATE_LIMITER.charge(client)
+    result = EXPRESSIONS.evaluate(payload.get("expr"), payload.get("vars"), user)
+    return (OFFLOADER.format(result), http.client.OK, HEADERS)
 
 
-@api_application.route("/calc/log10/<op_1>", methods=["GET"])
-def log10(op_1):
+@api_application.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    stats = {"responses": RESPONSE_CACHE.stats(), "expressions": EXPRESSIONS.plans.stats()}
+    if isinstance(CALCULATOR.permissions, CachedPermissionProvider):
+        stats["permissions"] = CALCULATOR.permissions.stats()
+    return (json.dumps(stats), http.client.OK, JSON_HEADERS)
+
+
+@api_application.route("/health", methods=["GET"])
+def health():
+    # Comprobación de vida para balanceadores; el pid identifica al worker que responde
+    return (json.dumps({"status": "ok", "pid": os.getpid()}), http.client.OK, JSON_HEADERS)
+
+
+@api_application.route("/admin/profile", methods=["GET"])
+def admin_profile():
+    # Muestrea todos los hilos de este worker durante ?seconds=N y devuelve pilas colapsadas
+    # (flamegraph.pl, speedscope); con varios workers cada captura cubre solo el que responde.
+    # Solo ve otras peticiones si el worker atiende cada una en su hilo (server.py --threaded):
+    # sin él, la captura bloquea al worker y no hay nada más que muestrear
+    if PROFILER is None:
+        return ("Not Found", http.client.NOT_FOUND, HEADERS)
     try:
-        num_1 = util.convert_to_number(op_1)
-        return ("{}".format(CALCULATOR.log10(num_1)), http.client.OK, HEADERS)
-    except (TypeError, ValueError) as e:
-        return (str(e), http.client.BAD_REQUEST, HEADERS)
\ No newline at end of file
+        return sample_profile(request.args.get("seconds"), request.args.get("interval"))
+    except ValueError as e:
+        return bad_request(e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded(e)
+
+
+def sample_profile(seconds, interval=None):
+    counts = PROFILER.sample(float(seconds or "5"), float(interval) if interval else None)
+    return (profiling.render_collapsed(counts), http.client.OK, COLLAPSED_HEADERS)
+
+
+@api_application.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return (metrics.render(), http.client.OK, METRICS_HEADERS)
@@ -0,0 +1,6 @@
+import sys
+
+from app.calc import main
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import collections
+import threading
+import time
+from http import HTTPStatus
+
+from app.offload import LimitExceeded
+
+
+class RateLimited(LimitExceeded):
+    status = HTTPStatus.TOO_MANY_REQUESTS
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Overloaded(LimitExceeded):
+    status = HTTPStatus.SERVICE_UNAVAILABLE
+
+
+class RateLimiter:
+    # Token bucket por usuario: `rate` fichas por segundo hasta un máximo de `burst`.
+    # Cada petición consume fichas según su coste; el estado de un usuario son dos
+    # números que se actualizan en O(1) bajo un único bloqueo
+    def __init__(self, rate=0.0, burst=None, maxsize=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.maxsize = maxsize
+        self.clock = clock
+        self.buckets = collections.OrderedDict()
+        self.limited = 0
+        self._lock = threading.Lock()
+
+    def charge(self, user, cost=1.0):
+        if not self.rate:
+            return
+        # Una petición más cara que la ráfaga completa vacía el bucket en lugar de no pasar nunca
+        cost = min(cost, self.burst)
+        with self._lock:
+            now = self.clock()
+            bucket = self.buckets.get(user)
+            if bucket is None:
+                bucket = self.buckets[user] = [self.burst, now]
+                if len(self.buckets) > self.maxsize:
+                    # Se olvida al usuario inactivo más antiguo: volverá con el bucket lleno
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(user)
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return
+            bucket[0] = tokens
+            self.limited += 1
+        raise RateLimited(f"Rate limit exceeded for user {user}", (cost - tokens) / self.rate)
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self.buckets), "limited": self.limited, "rate": self.rate, "burst": self.burst}
+
+
+class AdmissionController:
+    # Limita las peticiones en curso; hasta `queue` más esperan un hueco durante `timeout`
+    # segundos y el resto se rechaza de inmediato con 503
+    def __init__(self, limit=64, queue=256, timeout=1.0):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._condition = threading.Condition(threading.Lock())
+
+    def enter(self, wait=True):
+        with self._condition:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return
+            if not wait or self.waiting >= self.queue:
+                self.rejected += 1
+                raise Overloaded("Server overloaded, try again later")
+            self.waiting += 1
+            try:
+                admitted = self._condition.wait_for(lambda: self.in_flight < self.limit, self.timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                self.rejected += 1
+                raise Overloaded(f"No capacity available after {self.timeout} seconds")
+            self.in_flight += 1
+
+    def exit(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {"in_flight": self.in_flight, "waiting": self.waiting, "rejected": self.rejected, "limit": self.limit}
@@ -0,0 +1,118 @@
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+_STOP = object()
+_writer = None
+
+# Estado consultado en el camino caliente; sin escritor configurado no se registra nada
+_level = ERROR + 1
+_sample_rate = 1.0
+_queue_size = 0
+_records = None
+dropped = 0
+
+
+def log(event, level=INFO, **fields):
+    # Solo encola una tupla: el formateo y la E/S los hace el hilo de escritura
+    global dropped
+    if level < _level:
+        return
+    if level < WARNING and _sample_rate < 1 and random.random() >= _sample_rate:
+        return
+    if _records.qsize() >= _queue_size:
+        dropped += 1
+        return
+    _records.put((time.time(), level, event, fields))
+
+
+def format_record(record):
+    created, level, event, fields = record
+    data = {"time": created, "level": LEVEL_NAMES.get(level, level), "event": event}
+    data.update(fields)
+    return json.dumps(data, default=str)
+
+
+class BatchWriter:
+    # Hilo que vacía la cola y escribe los registros en lotes
+    def __init__(self, records, stream=None, batch_size=100):
+        self.records = records
+        self.stream = stream
+        self.batch_size = batch_size
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.records.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.records.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                running = False
+                batch = [record for record in batch if record is not _STOP]
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        stream = self.stream or sys.stderr
+        try:
+            stream.write("".join(format_record(record) + "\n" for record in batch))
+            stream.flush()
+            self.written += len(batch)
+        except (OSError, ValueError):
+            pass
+
+
+def configure(level="INFO", sample_rate=1.0, stream=None, batch_size=100, queue_size=10000):
+    global _writer, _level, _sample_rate, _queue_size, _records, dropped
+    shutdown()
+
+    _records = queue.SimpleQueue()
+    _writer = BatchWriter(_records, stream=stream, batch_size=batch_size)
+    _writer.start()
+
+    _sample_rate = sample_rate
+    _queue_size = queue_size
+    dropped = 0
+    _level = LEVELS[level.upper()] if isinstance(level, str) else level
+    return _writer
+
+
+def shutdown():
+    global _writer, _level
+    _level = ERROR + 1
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def _restart_after_fork():
+    # Los hilos no sobreviven a fork(): cada proceso hijo arranca su propio escritor
+    global _writer, _records
+    if _writer is not None:
+        _records = queue.SimpleQueue()
+        _writer = BatchWriter(_records, stream=_writer.stream, batch_size=_writer.batch_size)
+        _writer.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,70 @@
+import json
+
+from app import offload, operations, util
+from app.calc import InvalidPermissions
+
+# Excepciones que se reportan como error 400 en cada elemento; ArithmeticError cubre lo que
+# Calculator no traduce (0 ** -1, math.sqrt de un entero enorme, señales de decimal)
+ERRORS = (TypeError, ValueError, ArithmeticError, InvalidPermissions)
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+
+def parse_items(body, content_type=None):
+    if content_type in NDJSON_TYPES:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Batch body must be a list of operations")
+    return items
+
+
+def to_operands(values):
+    # Los operandos pueden llegar como texto o ya como números JSON
+    return [util.convert_to_number(value) if isinstance(value, str) else value for value in values]
+
+
+def lookup(table, op, args):
+    operation = table.get(op)
+    if operation is None:
+        raise ValueError(f"Unknown operation: {op}")
+    if not isinstance(args, list) or not operations.accepts(operation, len(args)):
+        expected = "at least 1" if operation.arity is None else operation.arity
+        raise TypeError(f"Operation {op} expects {expected} operands")
+    return operation
+
+
+def evaluate(table, op, args, charge=None):
+    # Mismo despacho que /calc/<op>: formateo, offloader y límite de tamaño del resultado.
+    # charge(cost) cobra el coste de la operación antes de calcularla
+    operation = lookup(table, op, args)
+    operands = to_operands(args)
+    if charge is not None:
+        charge(operation.cost(*operands))
+    return operation.function(*operands)
+
+
+def item_cost(table, item):
+    # Fichas de un elemento con el coste de su operación; los inválidos cuestan una
+    try:
+        operation = lookup(table, item.get("op"), item.get("args"))
+        return operation.cost(*to_operands(item["args"]))
+    except (AttributeError,) + ERRORS:
+        return 1
+
+
+def evaluate_item(table, item, charge=None):
+    if not isinstance(item, dict):
+        return {"error": "Batch item must be an object", "status": 400}
+    try:
+        return {"result": evaluate(table, item.get("op"), item.get("args"), charge)}
+    except ERRORS as e:
+        return {"error": str(e), "status": 400}
+    except offload.LimitExceeded as e:
+        return {"error": str(e), "status": int(e.status)}
+
+
+def evaluate_many(table, items):
+    for item in items:
+        yield evaluate_item(table, item)
@@ -1,11 +1,56 @@
-import app
+import contextlib
+import contextvars
 import math
+import sys
+from decimal import Decimal
+from fractions import Fraction
+
+from app.permissions import UtilPermissionProvider
+
+DEFAULT_USER = "user1"
+
+# Usuario de la petición en curso; contextvars lo aísla por hilo y por tarea asyncio,
+# así la instancia compartida de Calculator no necesita recibirlo en cada método
+_current_user = contextvars.ContextVar("calc_user", default=DEFAULT_USER)
+
+# int y float primero: el camino habitual resuelve isinstance con la primera comparación
+NUMBER_TYPES = (int, float, Decimal, Fraction)
+
 
 class InvalidPermissions(Exception):
     pass
 
 
+def current_user():
+    return _current_user.get()
+
+
+@contextlib.contextmanager
+def acting_as(user):
+    token = _current_user.set(user)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def iterate_as(user, iterable):
+    # Para respuestas en streaming: el generador se consume fuera de la vista, así que
+    # el usuario se fija en cada paso en lugar de una sola vez
+    iterator = iter(iterable)
+    while True:
+        with acting_as(user):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
 class Calculator:
+    def __init__(self, permissions=None):
+        self.permissions = permissions or UtilPermissionProvider()
+
     def add(self, x, y):
         self.check_types(x, y)
         return x + y
@@ -15,7 +60,7 @@ class Calculator:
         return x - y
 
     def multiply(self, x, y):
-        if not app.util.validate_permissions(f"{x} * {y}", "user1"):
+        if not self.permissions.is_allowed(current_user(), "multiply"):
             raise InvalidPermissions('User has no permissions')
 
         self.check_types(x, y)
@@ -33,25 +78,100 @@ class Calculator:
         return x ** y
 
     def sqrt(self, x):
-        if not isinstance(x, (int, float)):
+        if not isinstance(x, NUMBER_TYPES):
             raise TypeError("Parameter must be a number")
         if x < 0:
             raise ValueError("Cannot calculate the square root of a negative number")
+        if type(x) is Decimal:
+            return x.sqrt()
         return math.sqrt(x)
 
     def log10(self, x):
-        if not isinstance(x, (int, float)):
+        if not isinstance(x, NUMBER_TYPES):
             raise TypeError("Parameter must be a number")
         if x <= 0:
             raise ValueError("Cannot calculate the base 10 logarithm of a non-positive number")
+        if type(x) is Decimal:
+            return x.log10()
         return math.log10(x)
-        
+
+    def sum(self, *operands):
+        total = 0
+        for x in operands:
+            if not isinstance(x, NUMBER_TYPES):
+                raise TypeError("Parameters must be numbers")
+            total += x
+        return total
+
     def check_types(self, x, y):
-        if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        if not isinstance(x, NUMBER_TYPES) or not isinstance(y, NUMBER_TYPES):
             raise TypeError("Parameters must be numbers")
 
 
+def main(argv=None):
+    # CLI ligera (python -m app add 2 3): nunca importa Flask ni api.py, y los
+    # subsistemas opcionales se cargan solo cuando la orden los necesita
+    import argparse
+
+    from app import numeric, offload, operations
+
+    offloader = offload.Offloader()
+    table = operations.build_table(Calculator(), offloader)
+    backends = numeric.build_backends()
+
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command")
+    stream_parser = commands.add_parser("stream", help="evaluate an NDJSON/CSV job file line by line")
+    stream_parser.add_argument("input", nargs="?", default="-")
+    stream_parser.add_argument("-o", "--output", default="-")
+    stream_parser.add_argument("--format", choices=["ndjson", "csv"])
+    columnar_parser = commands.add_parser("columnar", help="apply an operation to memory-mapped float64/int64 or .npy files")
+    columnar_parser.add_argument("op")
+    columnar_parser.add_argument("inputs", nargs="+")
+    columnar_parser.add_argument("-o", "--output", required=True)
+    columnar_parser.add_argument("--mask", help="invalid element mask (default: OUTPUT.mask)")
+    columnar_parser.add_argument("--dtype", choices=["float64", "int64"], default="float64", help="dtype of raw inputs")
+    columnar_parser.add_argument("--chunk", type=int, default=1 << 15)
+    columnar_parser.add_argument("--workers", type=int, default=1)
+    for name in table:
+        operation_parser = commands.add_parser(name, help=f"print the result of {name}")
+        operation_parser.add_argument("operands", nargs="+")
+        operation_parser.add_argument("--numeric", choices=sorted(backends), default=numeric.FLOAT.name)
+    args = parser.parse_args(argv)
+
+    if args.command == "stream":
+        from app import stream
+        try:
+            stream.run(args.input, args.output, args.format, table)
+        finally:
+            offloader.shutdown()
+    elif args.command == "columnar":
+        import json
+
+        from app import columnar
+        try:
+            summary = columnar.run(args.op, args.inputs, args.output, args.mask, args.dtype, args.chunk, args.workers)
+        except (TypeError, ValueError, OSError, InvalidPermissions) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        print(json.dumps(summary))
+    elif args.command in table:
+        operation = table.get(args.command)
+        if not operations.accepts(operation, len(args.operands)):
+            parser.error(f"{operation.name} expects {operation.arity} operands")
+        try:
+            print(backends[args.numeric].evaluate(operation.function, args.operands))
+        except operation.errors + (offload.LimitExceeded,) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            offloader.shutdown()
+    else:
+        calc = Calculator()
+        result = calc.add(2, 2)
+        print(result)
+    return 0
+
+
 if __name__ == "__main__":  # pragma: no cover
-    calc = Calculator()
-    result = calc.add(2, 2)
-    print(result)
+    sys.exit(main())
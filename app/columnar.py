@@ -0,0 +1,138 @@
+import os
+from collections import namedtuple
+from itertools import repeat
+
+from app.operations import ARITY
+from app.vector import VectorCalculator, np
+
+# Ficheros crudos: little-endian sin cabecera; los .npy llevan su propio dtype y forma
+DTYPES = {"float64": "<f8", "int64": "<i8"}
+
+# 32768 elementos = 256 KiB por columna float64: entradas, salida y máscara caben en la caché L2
+CHUNK = 1 << 15
+
+# Cada tarea abre y cierra sus mapas sobre ~1M elementos: las páginas tocadas no se acumulan
+# con el tamaño del fichero
+TASK_ELEMENTS = 1 << 20
+
+# Operaciones que conservan enteros; el resto escribe float64 (power incluido: un exponente
+# negativo en un solo elemento no puede cambiar el tipo de toda la columna)
+INTEGER_OPERATIONS = ("add", "substract", "multiply")
+
+Job = namedtuple("Job", ["op", "inputs", "dtype", "output", "result_dtype", "mask", "chunk"])
+
+
+def is_npy(path):
+    return path.endswith(".npy")
+
+
+def mask_path(output):
+    root, ext = os.path.splitext(output)
+    return root + ".mask.npy" if ext == ".npy" else output + ".mask"
+
+
+def open_array(path, dtype="float64", mode="r"):
+    if is_npy(path):
+        array = np.load(path, mmap_mode=mode)
+        if not array.flags.c_contiguous:
+            raise ValueError(f"{path} must be stored in C order")
+        return array.reshape(-1)
+    dtype = np.dtype(DTYPES.get(dtype, dtype))
+    # np.memmap no acepta ficheros vacíos
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode=mode)
+
+
+def create_array(path, dtype, shape):
+    if is_npy(path):
+        np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape).flush()
+        return
+    # Fichero disperso del tamaño final: cada worker escribe directamente en su tramo
+    with open(path, "wb") as target:
+        target.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+
+
+def result_dtype(op, arrays):
+    if op in INTEGER_OPERATIONS and all(array.dtype.kind in "biu" for array in arrays):
+        return np.dtype("<i8")
+    return np.dtype("<f8")
+
+
+def process(job, start, stop):
+    # Aplica la operación al tramo [start, stop) trozo a trozo y devuelve los elementos inválidos
+    function = getattr(VectorCalculator(), job.op)
+    inputs = [open_array(path, job.dtype) for path in job.inputs]
+    output = open_array(job.output, job.result_dtype, mode="r+")
+    mask = open_array(job.mask, "bool", mode="r+")
+    fill = np.nan if output.dtype.kind == "f" else 0
+
+    invalid = 0
+    for begin in range(start, stop, job.chunk):
+        end = min(begin + job.chunk, stop)
+        result = function(*[array[begin:end] for array in inputs])
+        errors = np.ma.getmaskarray(result)
+        # power sobre enteros devuelve int64 pero se escribe como float64: se convierte antes de
+        # rellenar, NaN no cabe en un entero
+        output[begin:end] = np.ma.filled(result.astype(output.dtype, copy=False), fill)
+        mask[begin:end] = errors
+        invalid += int(np.count_nonzero(errors))
+
+    for array in (output, mask):
+        if isinstance(array, np.memmap):
+            array.flush()
+    return invalid
+
+
+def spans(length, span):
+    return [(start, min(start + span, length)) for start in range(0, length, span)]
+
+
+def run(op, inputs, output, mask=None, dtype="float64", chunk=CHUNK, workers=1):
+    # Trabajo por columnas: aplica `op` a ficheros mapeados en memoria y escribe el resultado
+    # y una máscara de elementos inválidos (1 = división por cero, raíz negativa...) en otros dos
+    if np is None:
+        raise ImportError("Columnar jobs require numpy")
+    # Solo las operaciones elemento a elemento de VectorCalculator (sum es n-aria)
+    arity = ARITY.get(op)
+    if arity is None or not hasattr(VectorCalculator, op):
+        raise ValueError(f"Unknown operation: {op}")
+    if len(inputs) != arity:
+        raise TypeError(f"Operation {op} expects {arity} operands")
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype: {dtype}")
+    if chunk < 1 or workers < 1:
+        raise ValueError("chunk and workers must be positive")
+    mask = mask or mask_path(output)
+    targets = {os.path.realpath(output), os.path.realpath(mask)}
+    if len(targets) < 2 or targets & {os.path.realpath(path) for path in inputs}:
+        raise ValueError("Output and mask must be different files from the inputs")
+
+    arrays = [open_array(path, dtype) for path in inputs]
+    length = arrays[0].size
+    if any(array.size != length for array in arrays):
+        raise ValueError("Operands must have the same number of elements")
+    # Comprueba tipos y permisos una sola vez, antes de crear ficheros o arrancar procesos
+    getattr(VectorCalculator(), op)(*[array[:0] for array in arrays])
+
+    shape = np.load(inputs[0], mmap_mode="r").shape if is_npy(inputs[0]) else (length,)
+    kind = result_dtype(op, arrays)
+    del arrays
+    create_array(output, kind, shape)
+    create_array(mask, np.bool_, shape)
+
+    job = Job(op, list(inputs), dtype, output, kind.str, mask, chunk)
+    tasks = spans(length, max(TASK_ELEMENTS // chunk, 1) * chunk)
+    if workers == 1 or len(tasks) <= 1:
+        invalid = sum(process(job, start, stop) for start, stop in tasks)
+    else:
+        import concurrent.futures
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            starts, stops = [start for start, _ in tasks], [stop for _, stop in tasks]
+            invalid = sum(executor.map(process, repeat(job), starts, stops))
+
+    return {
+        "op": op, "elements": length, "invalid": invalid, "chunks": -(-length // chunk),
+        "output": output, "mask": mask, "dtype": kind.name,
+    }
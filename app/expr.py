@@ -0,0 +1,276 @@
+import re
+
+from app import batch, offload, operations, render, util
+from app.cache import LRUCache
+from app.calc import NUMBER_TYPES, InvalidPermissions, current_user
+
+TOKENS = re.compile(
+    r"\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(?P<name>[A-Za-z_]\w*)|(?P<op>\*\*|[-+*/^(),]))"
+)
+
+BINARY = {"+": "add", "-": "substract", "*": "multiply", "/": "divide", "^": "power", "**": "power"}
+
+# Anidamiento máximo al analizar y profundidad máxima del árbol: tanto el parser como la
+# evaluación son recursivos y deben quedar lejos del límite de recursión de Python
+MAX_DEPTH = 100
+
+
+class Plan:
+    # Expresión compilada: un árbol de closures que se reutiliza con distintas variables
+    def __init__(self, expression, node, variables, operations):
+        self.expression = expression
+        self.node = node
+        self.variables = variables
+        self.operations = operations
+
+    @property
+    def needs_permission(self):
+        return "multiply" in self.operations
+
+    def authorize(self, calculator, user=None):
+        # Una sola comprobación de permisos por plan y usuario, no una por nodo evaluado
+        if self.needs_permission and not calculator.permissions.is_allowed(user or current_user(), "multiply"):
+            raise InvalidPermissions('User has no permissions')
+
+    def evaluate(self, calculator, bindings=None, user=None):
+        self.authorize(calculator, user)
+        return self.run(calculator, bindings or {})
+
+    def evaluate_many(self, calculator, bindings_list, user=None, formatter=render.text):
+        # Una cadena u objeto también son iterables: se evaluarían carácter a carácter o clave a clave
+        if not isinstance(bindings_list, list):
+            raise TypeError("Variable bindings must be a list of objects")
+        self.authorize(calculator, user)
+        return self.results(calculator, bindings_list, formatter)
+
+    def results(self, calculator, bindings_list, formatter=render.text):
+        # formatter es Offloader.format en la API: los enteros de más de 4300 cifras no se
+        # pueden formatear con str() y se formatean en el pool de procesos
+        for bindings in bindings_list:
+            try:
+                yield {"result": formatter(self.run(calculator, bindings))}
+            except batch.ERRORS as e:
+                yield {"error": str(e), "status": 400}
+            except offload.LimitExceeded as e:
+                yield {"error": str(e), "status": e.status}
+
+    def run(self, calculator, bindings):
+        if not isinstance(bindings, dict):
+            raise TypeError("Variable bindings must be an object")
+        missing = self.variables.difference(bindings)
+        if missing:
+            raise ValueError(f"Unbound variables: {', '.join(sorted(missing))}")
+        values = {name: batch.to_operands([bindings[name]])[0] for name in self.variables}
+        # Una expresión que es solo una variable no pasa por Calculator, que comprobaría el tipo
+        for name, value in values.items():
+            if not isinstance(value, NUMBER_TYPES):
+                raise TypeError(f"Variable {name} must be a number")
+        return self.node(calculator, values)
+
+
+class Parser:
+    # Descenso recursivo; nunca usa eval(). Precedencia: + - < * / < ^ (asociativo a la derecha)
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = self.tokenize(expression)
+        self.position = 0
+        self.variables = set()
+        self.operations = set()
+        self.depth = 0
+
+    def tokenize(self, expression):
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = TOKENS.match(expression, position)
+            if match is None:
+                raise ValueError(f"Invalid expression: unexpected character at {position}")
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        return tokens
+
+    def parse(self):
+        node = self.sum()
+        if self.peek() is not None:
+            raise ValueError(f"Invalid expression: unexpected '{self.peek()[1]}'")
+        return Plan(self.expression, node, frozenset(self.variables), frozenset(self.operations))
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def accept(self, *values):
+        token = self.peek()
+        if token is not None and token[0] == "op" and token[1] in values:
+            self.position += 1
+            return token[1]
+        return None
+
+    def enter(self):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ValueError("Invalid expression: too deeply nested")
+
+    def leave(self):
+        self.depth -= 1
+
+    def expect(self, value):
+        if self.accept(value) is None:
+            raise ValueError(f"Invalid expression: expected '{value}'")
+
+    def sum(self):
+        node = self.product()
+        while True:
+            symbol = self.accept("+", "-")
+            if symbol is None:
+                return node
+            node = self.binary(BINARY[symbol], node, self.product())
+
+    def product(self):
+        node = self.unary()
+        while True:
+            symbol = self.accept("*", "/")
+            if symbol is None:
+                return node
+            node = self.binary(BINARY[symbol], node, self.unary())
+
+    def unary(self):
+        symbol = self.accept("-", "+")
+        if symbol is None:
+            return self.power()
+        self.enter()
+        operand = self.unary()
+        self.leave()
+        if symbol == "-":
+            return self.binary("substract", constant(0), operand)
+        return operand
+
+    def power(self):
+        node = self.primary()
+        if self.accept("^", "**"):
+            self.enter()
+            exponent = self.unary()
+            self.leave()
+            return self.binary("power", node, exponent)
+        return node
+
+    def primary(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("Invalid expression: unexpected end")
+        kind, text = token
+        self.position += 1
+
+        if kind == "number":
+            return constant(util.convert_to_number(text))
+        if kind == "name":
+            if self.accept("("):
+                self.enter()
+                node = self.call(text)
+                self.leave()
+                return node
+            self.variables.add(text)
+            return variable(text)
+        if text == "(":
+            self.enter()
+            node = self.sum()
+            self.expect(")")
+            self.leave()
+            return node
+        raise ValueError(f"Invalid expression: unexpected '{text}'")
+
+    def call(self, name):
+        if name not in operations.ARITY:
+            raise ValueError(f"Unknown function: {name}")
+        arity = operations.ARITY[name]
+        arguments = [self.sum()]
+        while self.accept(","):
+            arguments.append(self.sum())
+        self.expect(")")
+        if arity is None:
+            return self.variadic_call(name, arguments)
+        if len(arguments) != arity:
+            raise ValueError(f"Function {name} expects {arity} arguments")
+        if arity == 1:
+            return self.unary_call(name, arguments[0])
+        return self.binary(name, *arguments)
+
+    def variadic_call(self, name, arguments):
+        self.operations.add(name)
+
+        def node(calculator, values):
+            return getattr(calculator, name)(*[argument(calculator, values) for argument in arguments])
+        return tree(node, *arguments)
+
+    def unary_call(self, name, argument):
+        self.operations.add(name)
+
+        def node(calculator, values):
+            return getattr(calculator, name)(argument(calculator, values))
+        return tree(node, argument)
+
+    def binary(self, name, left, right):
+        self.operations.add(name)
+        if name == "multiply":
+            # El permiso ya se resolvió en Plan.authorize
+            def node(calculator, values):
+                x, y = left(calculator, values), right(calculator, values)
+                calculator.check_types(x, y)
+                # Las cifras del producto son como mucho la suma de las de los factores
+                if offload.estimate_digits(x) + offload.estimate_digits(y) > offload.MAX_RESULT_DIGITS:
+                    raise offload.ResultTooLarge(f"Result would exceed {offload.MAX_RESULT_DIGITS} digits")
+                return x * y
+            return tree(node, left, right)
+        if name == "power":
+            # Misma protección que /calc/power frente a enteros gigantes (p. ej. 9^9^9)
+            def node(calculator, values):
+                x, y = left(calculator, values), right(calculator, values)
+                if offload.estimate_power_digits(x, y) > offload.MAX_RESULT_DIGITS:
+                    raise offload.ResultTooLarge(f"Result would exceed {offload.MAX_RESULT_DIGITS} digits")
+                return offload.checked_power(calculator, x, y)
+            return tree(node, left, right)
+
+        def node(calculator, values):
+            return getattr(calculator, name)(left(calculator, values), right(calculator, values))
+        return tree(node, left, right)
+
+
+def tree(node, *children):
+    # Profundidad del subárbol: "1+1+...+1" no anida paréntesis pero su evaluación sí recurre
+    node.depth = 1 + max(getattr(child, "depth", 0) for child in children)
+    if node.depth > MAX_DEPTH:
+        raise ValueError("Invalid expression: too deeply nested")
+    return node
+
+
+def constant(value):
+    return lambda calculator, values: value
+
+
+def variable(name):
+    return lambda calculator, values: values[name]
+
+
+def compile_expression(expression):
+    if not isinstance(expression, str) or not expression.strip():
+        raise ValueError("Invalid expression: empty")
+    return Parser(expression).parse()
+
+
+class ExpressionEngine:
+    def __init__(self, calculator, maxsize=256):
+        self.calculator = calculator
+        self.plans = LRUCache(maxsize=maxsize)
+
+    def compile(self, expression):
+        plan = self.plans.get(expression)
+        if plan is None:
+            plan = compile_expression(expression)
+            self.plans.put(expression, plan)
+        return plan
+
+    def evaluate(self, expression, bindings=None, user=None):
+        return self.compile(expression).evaluate(self.calculator, bindings, user)
+
+    def evaluate_many(self, expression, bindings_list, user=None, formatter=render.text):
+        return list(self.compile(expression).evaluate_many(self.calculator, bindings_list, user, formatter))
@@ -0,0 +1,78 @@
+import hashlib
+from decimal import Decimal
+from fractions import Fraction
+
+from app.memo import PURE_OPERATIONS
+
+# Un año: el resultado de una operación determinista con los mismos operandos no cambia
+IMMUTABLE_MAX_AGE = 31536000
+
+# El backend numérico también puede elegirse por cabecera: las cachés intermedias deben distinguirla
+VARY = "X-Calc-Numeric"
+
+
+def canonical(value):
+    # Forma canónica de un operando ya convertido: "2" y "02" comparten ETag, 2 y 2.0 no.
+    # Los enteros se escriben en hexadecimal para no chocar con el límite de cifras de str()
+    if type(value) is float:
+        return "f" + value.hex()
+    if type(value) is int:
+        return "i" + format(value, "x")
+    if type(value) is Fraction:
+        return "q{:x}/{:x}".format(value.numerator, value.denominator)
+    if type(value) is Decimal:
+        return "d" + str(value)
+    return type(value).__name__ + repr(value)
+
+
+def matches(if_none_match, etag, wildcard=True):
+    # Comparación débil de If-None-Match (RFC 9110): se ignora el prefijo W/.
+    # "*" solo coincide si ya se sabe que la respuesta existe (wildcard): antes de calcular,
+    # la operación todavía puede acabar en 400
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return wildcard
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class HttpCachePolicy:
+    # Cabeceras de caché HTTP por operación: ETag fuerte y Cache-Control immutable para las
+    # deterministas; las demás (multiply, que depende de los permisos) se marcan no-store
+    def __init__(self, max_age=IMMUTABLE_MAX_AGE, operations=PURE_OPERATIONS, version="1"):
+        self.max_age = max_age
+        self.version = version
+        self.enabled = {op: True for op in operations}
+        self.cache_control = f"public, max-age={max_age}, immutable"
+
+    def enable(self, op, enabled=True):
+        self.enabled[op] = enabled
+
+    def etag(self, op, backend, values):
+        if not self.enabled.get(op):
+            return None
+        key = "|".join([self.version, op, backend] + [canonical(value) for value in values])
+        return '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+    def headers(self, base, etag):
+        if etag is None:
+            return dict(base, **{"Cache-Control": "no-store"})
+        return dict(base, **{"ETag": etag, "Cache-Control": self.cache_control, "Vary": VARY})
+
+    def not_modified(self, base, etag):
+        headers = self.headers(base, etag)
+        headers.pop("Content-Type", None)
+        return ("", 304, headers)
+
+    def revalidate(self, response, if_none_match):
+        # Respuesta cacheada en el servidor: la ETag guardada basta para responder 304
+        etag = response[2].get("ETag")
+        if matches(if_none_match, etag):
+            return self.not_modified(response[2], etag)
+        return response
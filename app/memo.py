@@ -0,0 +1,26 @@
+from app.cache import LRUCache
+
+# Operaciones puras: multiply queda fuera porque depende de la comprobación de permisos
+PURE_OPERATIONS = ("add", "substract", "divide", "power", "sqrt", "log10", "sum")
+
+
+class ResponseCache:
+    # Caché de respuestas ya formateadas por (operación, backend numérico, operandos sin procesar)
+    def __init__(self, maxsize=1024, operations=PURE_OPERATIONS):
+        self.cache = LRUCache(maxsize=maxsize)
+        self.enabled = {op: True for op in operations}
+
+    def enable(self, op, enabled=True):
+        self.enabled[op] = enabled
+
+    def get(self, op, operands, backend=None):
+        if not self.enabled.get(op):
+            return None
+        return self.cache.get((op, backend) + tuple(operands))
+
+    def put(self, op, operands, response, backend=None):
+        if self.enabled.get(op) and response[1] == 200:
+            self.cache.put((op, backend) + tuple(operands), response)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,170 @@
+import bisect
+import collections
+import threading
+import time
+import weakref
+
+# Límites superiores (segundos) de los buckets de los histogramas de latencia
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRICS = {
+    "calc_requests_total": ("counter", "HTTP requests by endpoint, method and status"),
+    "calc_request_duration_seconds": ("histogram", "HTTP request latency by endpoint"),
+    "calc_errors_total": ("counter", "Error responses by endpoint and exception type"),
+    "calc_calculator_duration_seconds": ("histogram", "Calculator method latency"),
+    "calc_permission_check_duration_seconds": ("histogram", "Permission check latency"),
+    "calc_trace_duration_seconds": ("histogram", "Traced function latency (CALC_TRACE=1)"),
+}
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+
+
+class Shard:
+    # Agregados de un solo hilo: se escriben sin bloqueos y solo se suman al exportar
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def merge(self, other):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            total = self.histograms.get(key)
+            self.histograms[key] = list(values) if total is None else [a + b for a, b in zip(total, values)]
+
+
+class _Owner:
+    # Vive en el threading.local del hilo: se libera cuando el hilo termina
+    pass
+
+
+# Agregado de los hilos que ya terminaron (los servidores con --threaded crean uno por petición).
+# El finalizador solo encola el shard: puede ejecutarse en cualquier hilo, incluso en uno que
+# ya tiene _shards_lock, así que la fusión se hace después con el cerrojo
+_retired = Shard()
+_finished = collections.deque()
+
+
+def _shard():
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = Shard()
+        _local.owner = _Owner()
+        weakref.finalize(_local.owner, _finished.append, shard)
+        with _shards_lock:
+            _retire()
+            _shards.append(shard)
+    return shard
+
+
+def _retire():
+    # Con _shards_lock: el hilo ya no existe, nadie más escribe en su shard
+    while _finished:
+        shard = _finished.popleft()
+        _shards.remove(shard)
+        _retired.merge(shard)
+
+
+def inc(name, labels=(), amount=1):
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+def observe(name, labels, seconds):
+    histograms = _shard().histograms
+    key = (name, labels)
+    histogram = histograms.get(key)
+    if histogram is None:
+        # Un contador por bucket más el de +Inf, seguido de la suma
+        histogram = histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+    histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+    histogram[-1] += seconds
+
+
+def record_request(endpoint, method, status, seconds):
+    inc("calc_requests_total", (("endpoint", endpoint), ("method", method), ("status", str(status))))
+    observe("calc_request_duration_seconds", (("endpoint", endpoint),), seconds)
+
+
+def record_error(endpoint, error):
+    inc("calc_errors_total", (("endpoint", endpoint), ("exception", type(error).__name__)))
+
+
+def instrument(target, names, metric, label=None):
+    # Sustituye los métodos del objeto por versiones cronometradas (solo en esa instancia)
+    for name in names:
+        labels = ((label, name),) if label else ()
+        setattr(target, name, _timed(getattr(target, name), metric, labels))
+
+
+def _timed(function, metric, labels):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            observe(metric, labels, time.perf_counter() - start)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+
+def snapshot():
+    counters, histograms = {}, {}
+    with _shards_lock:
+        _retire()
+        shards = list(_shards)
+        retired = Shard()
+        retired.merge(_retired)
+    for shard in shards + [retired]:
+        for key, value in list(shard.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, values in list(shard.histograms.items()):
+            total = histograms.setdefault(key, [0] * len(values))
+            histograms[key] = [a + b for a, b in zip(total, values)]
+    return counters, histograms
+
+
+def reset():
+    with _shards_lock:
+        _retire()
+        for shard in _shards + [_retired]:
+            shard.counters.clear()
+            shard.histograms.clear()
+
+
+def render():
+    # Formato de exposición de texto de Prometheus
+    counters, histograms = snapshot()
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join('{}="{}"'.format(key, _escape(value)) for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,92 @@
+import decimal
+import fractions
+
+from app import util
+
+# Backend numérico de cada petición: ?numeric=decimal o la cabecera X-Calc-Numeric
+PARAMETER = "numeric"
+HEADER = "X-Calc-Numeric"
+
+# Exponente máximo aceptado al construir un Fraction: "1e1000000000" no debe expandirse a un entero gigante
+MAX_FRACTION_EXPONENT = 100000
+
+
+class FloatBackend:
+    # int/float nativos: el camino rápido de siempre, sin contexto ni conversiones extra
+    name = "float"
+
+    def parse(self, operands):
+        return util.convert_operands(operands)
+
+    def run(self, function, values):
+        return function(*values)
+
+    def evaluate(self, function, operands):
+        return function(*self.parse(operands))
+
+
+class DecimalBackend:
+    # Los operandos se leen exactos y cada operación se redondea según el contexto configurado
+    name = "decimal"
+
+    def __init__(self, context=None):
+        self.context = context or decimal.Context()
+
+    def parse(self, operands):
+        return [self.convert(operand) for operand in operands]
+
+    def convert(self, operand):
+        try:
+            return decimal.Decimal(operand)
+        except (TypeError, ValueError, decimal.InvalidOperation):
+            raise TypeError("Operator cannot be converted to number")
+
+    def run(self, function, values):
+        try:
+            with decimal.localcontext(self.context):
+                return function(*values)
+        except decimal.DecimalException as e:
+            raise TypeError(f"Invalid decimal operation: {type(e).__name__}")
+
+    def evaluate(self, function, operands):
+        return self.run(function, self.parse(operands))
+
+
+class FractionBackend:
+    # Aritmética racional exacta; sqrt y log10 de valores irracionales devuelven float
+    name = "fraction"
+
+    def parse(self, operands):
+        return [self.convert(operand) for operand in operands]
+
+    def convert(self, operand):
+        try:
+            value = decimal.Decimal(operand)
+            if not value.is_finite() or abs(value.as_tuple().exponent) > MAX_FRACTION_EXPONENT:
+                raise ValueError(operand)
+            return fractions.Fraction(value)
+        except (TypeError, ValueError, decimal.InvalidOperation):
+            raise TypeError("Operator cannot be converted to number")
+
+    def run(self, function, values):
+        return function(*values)
+
+    def evaluate(self, function, operands):
+        return function(*self.parse(operands))
+
+
+FLOAT = FloatBackend()
+
+
+def build_backends(precision=28, rounding=decimal.ROUND_HALF_EVEN):
+    context = decimal.Context(prec=precision, rounding=rounding)
+    return {backend.name: backend for backend in (FLOAT, DecimalBackend(context), FractionBackend())}
+
+
+def select(backends, name):
+    if not name:
+        return FLOAT
+    backend = backends.get(name.lower())
+    if backend is None:
+        raise ValueError(f"Unknown numeric backend: {name}")
+    return backend
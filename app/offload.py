@@ -0,0 +1,172 @@
+import math
+import sys
+import threading
+from fractions import Fraction
+from http import HTTPStatus
+
+from app import render
+
+LOG10_2 = math.log10(2)
+
+# Por encima de este tamaño Python ya no formatea enteros por defecto (sys.get_int_max_str_digits)
+OFFLOAD_DIGITS = 4300
+MAX_RESULT_DIGITS = 100000
+
+
+class LimitExceeded(Exception):
+    status = HTTPStatus.SERVICE_UNAVAILABLE
+
+
+class ResultTooLarge(LimitExceeded):
+    status = HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class OperationTimeout(LimitExceeded):
+    status = HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def estimate_digits(value):
+    if type(value) is Fraction:
+        return max(estimate_digits(value.numerator), estimate_digits(value.denominator))
+    if type(value) is not int:
+        return 0
+    return int(abs(value).bit_length() * LOG10_2) + 1
+
+
+def estimate_power_digits(x, y):
+    if type(x) is Fraction and type(y) is Fraction:
+        return estimate_fraction_power_digits(x, y)
+    # Solo la potencia entera con exponente positivo crece sin límite; el resto es un float
+    if type(x) is not int or type(y) is not int or y <= 0 or abs(x) <= 1:
+        return 1
+    return scaled_digits(y, math.log10(abs(x)))
+
+
+def estimate_fraction_power_digits(x, y):
+    # Con exponente entero el resultado racional es exacto y crece también con exponentes negativos
+    size = max(abs(x.numerator), x.denominator)
+    if y.denominator != 1 or size <= 1:
+        return 1
+    return scaled_digits(abs(y), math.log10(size))
+
+
+def scaled_digits(exponent, log):
+    # Un exponente mayor que el mayor float desborda al multiplicar: el resultado tendría
+    # más cifras que cualquier límite
+    try:
+        return int(exponent * log) + 1
+    except OverflowError:
+        return sys.maxsize
+
+
+def checked_power(calculator, x, y):
+    # Las potencias en coma flotante que desbordan lanzan OverflowError en lugar de dar inf,
+    # y cero elevado a un exponente negativo es una división por cero, como en divide
+    try:
+        return calculator.power(x, y)
+    except OverflowError:
+        raise ResultTooLarge("Result is too large to be represented") from None
+    except ZeroDivisionError:
+        raise TypeError("Division by zero is not possible") from None
+
+
+def checked_float(method):
+    # La división entera verdadera, math.sqrt y math.log10 convierten a float enteros y
+    # fracciones, que desbordan si el operando tiene más de ~308 cifras
+    def function(*operands):
+        try:
+            return method(*operands)
+        except OverflowError:
+            raise ValueError("Value is too large to be represented as a float") from None
+    return function
+
+
+def _unlimited_digits():
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+
+def _power_to_str(x, y):
+    _unlimited_digits()
+    return "{}".format(x ** y)
+
+
+def _to_str(value):
+    _unlimited_digits()
+    return "{}".format(value)
+
+
+class Offloader:
+    # Envía a un pool de procesos las potencias enteras grandes y el formateo de enteros enormes
+    def __init__(self, offload_digits=OFFLOAD_DIGITS, max_result_digits=MAX_RESULT_DIGITS, timeout=5.0, workers=None):
+        self.offload_digits = offload_digits
+        self.max_result_digits = max_result_digits
+        self.timeout = timeout
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # El pool se crea al primer uso para no arrancar procesos al importar; también
+        # concurrent.futures (que importa logging) se carga solo cuando hace falta
+        import concurrent.futures
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def power(self, calculator, x, y):
+        calculator.check_types(x, y)
+        digits = estimate_power_digits(x, y)
+        self.check_size(digits)
+        if digits <= self.offload_digits:
+            return render.text(checked_power(calculator, x, y))
+        return self.run(_power_to_str, x, y)
+
+    def format(self, value):
+        digits = estimate_digits(value)
+        if digits <= self.offload_digits:
+            return render.text(value)
+        self.check_size(digits)
+        return self.run(_to_str, value)
+
+    def check_size(self, digits):
+        if digits > self.max_result_digits:
+            raise ResultTooLarge(
+                f"Result would have about {digits} digits, the limit is {self.max_result_digits}"
+            )
+
+    def run(self, function, *args):
+        import concurrent.futures
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self.executor
+        try:
+            future = executor.submit(function, *args)
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            self.recycle(executor)
+            raise OperationTimeout(f"Operation did not finish in {self.timeout} seconds")
+        except BrokenProcessPool:
+            # Otra petición reinició el pool mientras esta esperaba
+            self.recycle(executor)
+            raise OperationTimeout("Operation was interrupted, the worker pool was restarted")
+
+    def recycle(self, executor):
+        # future.cancel() no detiene una tarea que ya se está ejecutando: se terminan los
+        # procesos del pool y el siguiente uso crea uno nuevo
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
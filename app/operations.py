@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from app import offload, render
+from app.calc import InvalidPermissions
+
+# Metadatos de cada operación expuesta en /calc/<op>/...:
+# arity es el número de operandos (None = n-aria, al menos uno), function devuelve el
+# cuerpo de la respuesta ya formateado, errors son las excepciones que se traducen en 400
+# y cost devuelve las fichas del limitador de peticiones que consume con esos operandos
+Operation = namedtuple("Operation", ["name", "arity", "function", "errors", "needs_permission", "cost"])
+
+# Cifras del resultado que equivalen a una ficha adicional
+COST_DIGITS = 1000
+
+# Métodos de Calculator expuestos y su número de operandos (None = n-aria, al menos uno):
+# la única fuente para /calc, los lotes, el streaming y las funciones de las expresiones
+ARITY = {
+    "add": 2,
+    "substract": 2,
+    "multiply": 2,
+    "divide": 2,
+    "power": 2,
+    "sqrt": 1,
+    "log10": 1,
+    "sum": None,
+}
+
+
+def unit_cost(*operands):
+    return 1
+
+
+def power_cost(x, y):
+    return 1 + offload.estimate_power_digits(x, y) / COST_DIGITS
+
+
+def operand_count_cost(*operands):
+    return max(1, len(operands) / 10)
+
+
+def accepts(operation, count):
+    if operation.arity is None:
+        return count > 0
+    return count == operation.arity
+
+
+def formatted(method, formatter):
+    def function(*operands):
+        return formatter(method(*operands))
+    return function
+
+
+class OperationTable:
+    def __init__(self):
+        self.operations = {}
+
+    def register(self, name, function, arity, errors=(TypeError,), needs_permission=False, cost=unit_cost):
+        self.operations[name] = Operation(name, arity, function, tuple(errors), needs_permission, cost)
+
+    def get(self, name):
+        return self.operations.get(name)
+
+    def __contains__(self, name):
+        return name in self.operations
+
+    def __iter__(self):
+        return iter(self.operations)
+
+
+def build_table(calculator, offloader):
+    # Los métodos se enlazan una sola vez; los que pueden producir enteros enormes
+    # se formatean a través del offloader
+    table = OperationTable()
+    table.register("add", formatted(calculator.add, offloader.format), ARITY["add"])
+    table.register("substract", formatted(calculator.substract, offloader.format), ARITY["substract"])
+    table.register(
+        "multiply",
+        formatted(calculator.multiply, offloader.format),
+        ARITY["multiply"],
+        errors=(TypeError, InvalidPermissions),
+        needs_permission=True,
+    )
+    table.register(
+        "divide",
+        formatted(offload.checked_float(calculator.divide), offloader.format),
+        ARITY["divide"],
+        errors=(TypeError, ValueError),
+    )
+    table.register("power", lambda x, y: offloader.power(calculator, x, y), ARITY["power"], cost=power_cost)
+    table.register(
+        "sqrt",
+        formatted(offload.checked_float(calculator.sqrt), render.text),
+        ARITY["sqrt"],
+        errors=(TypeError, ValueError),
+    )
+    table.register(
+        "log10",
+        formatted(offload.checked_float(calculator.log10), render.text),
+        ARITY["log10"],
+        errors=(TypeError, ValueError),
+    )
+    table.register("sum", formatted(calculator.sum, offloader.format), ARITY["sum"], cost=operand_count_cost)
+    return table
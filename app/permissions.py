@@ -0,0 +1,35 @@
+from app import util
+from app.cache import MISSING, LRUCache
+
+
+class UtilPermissionProvider:
+    # Proveedor por defecto: consulta app.util.validate_permissions en cada llamada
+    def is_allowed(self, user, operation):
+        return util.validate_permissions(operation, user)
+
+
+class CachedPermissionProvider:
+    # Cachea las decisiones de otro proveedor por (usuario, tipo de operación)
+    def __init__(self, provider=None, maxsize=1024, ttl=60.0, clock=None):
+        self.provider = provider or UtilPermissionProvider()
+        options = {} if clock is None else {"clock": clock}
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl, **options)
+
+    def is_allowed(self, user, operation):
+        key = (user, operation)
+        allowed = self.cache.get(key, MISSING)
+        if allowed is MISSING:
+            allowed = bool(self.provider.is_allowed(user, operation))
+            self.cache.put(key, allowed)
+        return allowed
+
+    def invalidate(self, user=None, operation=None):
+        if user is None and operation is None:
+            self.cache.invalidate()
+            return
+        self.cache.invalidate(
+            lambda key: (user is None or key[0] == user) and (operation is None or key[1] == operation)
+        )
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,256 @@
+import errno
+import gc
+import mmap
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+import traceback
+
+from app import audit
+
+HEARTBEAT = struct.Struct("d")
+
+# Segundos entre latidos de un worker
+BEAT_INTERVAL = 1.0
+
+
+class Heartbeat:
+    # Tabla compartida (mmap anónimo creado antes de fork): cada worker escribe en su
+    # hueco la hora monotónica de su último latido, sin llamadas al sistema
+    def __init__(self, slots):
+        self.slots = slots
+        self.memory = mmap.mmap(-1, HEARTBEAT.size * slots)
+
+    def beat(self, slot, now=None):
+        HEARTBEAT.pack_into(self.memory, slot * HEARTBEAT.size, time.monotonic() if now is None else now)
+
+    def last(self, slot):
+        return HEARTBEAT.unpack_from(self.memory, slot * HEARTBEAT.size)[0]
+
+    def stale(self, slot, timeout, now=None):
+        now = time.monotonic() if now is None else now
+        return now - self.last(slot) > timeout
+
+
+def parse_bind(bind):
+    host, _, port = bind.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class Worker:
+    # Proceso hijo: sirve la aplicación WSGI sobre el socket heredado del maestro
+    def __init__(self, application, listener, slot, heartbeat, threaded=False, handler=None, interval=BEAT_INTERVAL):
+        self.application = application
+        self.listener = listener
+        self.slot = slot
+        self.heartbeat = heartbeat
+        self.threaded = threaded
+        self.handler = handler
+        self.interval = interval
+        self.server = None
+
+    def run(self):
+        from werkzeug.serving import make_server
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        host, port = self.listener.getsockname()[:2]
+        self.server = make_server(
+            host, port, self.application, threaded=self.threaded,
+            request_handler=self.handler, fd=self.listener.fileno(),
+        )
+        # Late desde un hilo propio: sin --threaded el bucle del servidor no vuelve hasta terminar
+        # la petición en curso, y una petición larga no es un worker bloqueado. Un worker que
+        # retiene el GIL (o se ha colgado del todo) deja de latir igualmente
+        threading.Thread(target=self.beat_forever, daemon=True).start()
+        self.server.serve_forever(poll_interval=0.5)
+
+    def beat(self):
+        self.heartbeat.beat(self.slot)
+
+    def beat_forever(self):
+        while True:
+            self.beat()
+            time.sleep(self.interval)
+
+    def stop(self, signum=None, frame=None):
+        # shutdown() espera a que serve_forever termine: se llama desde otro hilo para
+        # no bloquear el manejador; la petición en curso se completa antes de salir
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class PreforkServer:
+    # Maestro: abre el socket, prepara el estado compartido y mantiene N workers vivos.
+    # SIGHUP reinicia los workers uno a uno sin cerrar el socket; SIGTERM/SIGINT paran
+    # el servicio esperando a que terminen las peticiones en curso
+    def __init__(self, application, host="127.0.0.1", port=5000, workers=None, timeout=30.0,
+                 graceful_timeout=30.0, threaded=False, backlog=1024, warm=None, worker_exit=None, handler=None):
+        self.application = application
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.threaded = threaded
+        self.backlog = backlog
+        self.warm = warm
+        self.worker_exit = worker_exit
+        self.handler = handler
+        self.listener = None
+        self.heartbeat = None
+        self.children = {}
+        self.retiring = {}
+        self.signals = []
+        self.running = False
+
+    @property
+    def address(self):
+        return self.listener.getsockname()[:2]
+
+    def bind(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self.listener = socket.create_server((self.host, self.port), family=family, backlog=self.backlog)
+        # No bloqueante: el worker que pierde la carrera por una conexión vuelve a su bucle
+        self.listener.setblocking(False)
+        self.listener.set_inheritable(True)
+        return self.address
+
+    def prepare(self):
+        # Todo lo que se inicializa aquí queda en páginas compartidas copy-on-write;
+        # gc.freeze() evita que el recolector de los hijos las toque y las duplique
+        if self.warm is not None:
+            self.warm()
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    def run(self):
+        if self.listener is None:
+            self.bind()
+        self.prepare()
+        # Dos huecos por worker: durante una recarga conviven el viejo y su reemplazo
+        self.heartbeat = Heartbeat(self.workers * 2)
+        for name in ("SIGTERM", "SIGINT", "SIGHUP"):
+            signal.signal(getattr(signal, name), self.on_signal)
+
+        host, port = self.address
+        print(f"Listening on http://{host}:{port} ({self.workers} workers)", file=sys.stderr, flush=True)
+        audit.log("server_start", host=host, port=port, workers=self.workers, pid=os.getpid())
+        self.running = True
+        try:
+            self.spawn_missing()
+            while self.running:
+                self.handle_signals()
+                self.reap()
+                self.check_heartbeats()
+                if self.running:
+                    self.spawn_missing()
+                time.sleep(0.1)
+        finally:
+            self.stop()
+            self.listener.close()
+        return 0
+
+    def on_signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def handle_signals(self):
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                audit.log("server_stop", signal=signal.Signals(signum).name)
+                self.running = False
+            elif signum == signal.SIGHUP:
+                self.reload()
+
+    def free_slot(self):
+        used = set(self.children.values()) | set(self.retiring.values())
+        return next(slot for slot in range(self.heartbeat.slots) if slot not in used)
+
+    def spawn(self):
+        slot = self.free_slot()
+        self.heartbeat.beat(slot)
+        pid = os.fork()
+        if pid != 0:
+            self.children[pid] = slot
+            audit.log("worker_start", pid=pid, slot=slot)
+            return pid
+
+        # Proceso hijo: nunca vuelve al bucle del maestro
+        code = 0
+        try:
+            interval = min(BEAT_INTERVAL, self.timeout / 4)
+            Worker(self.application, self.listener, slot, self.heartbeat, self.threaded, self.handler, interval).run()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            try:
+                if self.worker_exit is not None:
+                    self.worker_exit()
+            finally:
+                os._exit(code)
+
+    def spawn_missing(self):
+        while len(self.children) < self.workers:
+            self.spawn()
+
+    def reload(self):
+        # Recarga gradual: cada worker viejo se sustituye antes de pedirle que termine
+        if self.retiring:
+            audit.log("server_reload_skipped", audit.WARNING, retiring=len(self.retiring))
+            return
+        audit.log("server_reload", workers=self.workers)
+        for pid in list(self.children):
+            self.retiring[pid] = self.children.pop(pid)
+            self.spawn()
+            self.kill(pid, signal.SIGTERM)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.pop(pid, None)
+            if self.children.pop(pid, None) is not None:
+                audit.log("worker_exit", audit.WARNING, pid=pid, status=os.waitstatus_to_exitcode(status))
+
+    def check_heartbeats(self):
+        # Un worker que no late en `timeout` segundos está bloqueado: se mata y se repone
+        now = time.monotonic()
+        for pid, slot in list(self.children.items()):
+            if self.heartbeat.stale(slot, self.timeout, now):
+                audit.log("worker_timeout", audit.ERROR, pid=pid, timeout=self.timeout)
+                self.kill(pid, signal.SIGKILL)
+
+    def kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    def stop(self):
+        self.retiring.update(self.children)
+        self.children.clear()
+        for pid in list(self.retiring):
+            self.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.retiring and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.retiring):
+            self.kill(pid, signal.SIGKILL)
+        while self.retiring:
+            pid, _ = os.waitpid(-1, 0)
+            self.retiring.pop(pid, None)
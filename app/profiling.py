@@ -0,0 +1,163 @@
+import collections
+import contextlib
+import contextvars
+import math
+import os
+import sys
+import threading
+import time
+from http import HTTPStatus
+
+from app import metrics
+from app.offload import LimitExceeded
+
+# ?profile=1 en una ruta /calc/<op>/... devuelve las estadísticas de cProfile de esa llamada
+PARAMETER = "profile"
+
+# Duración máxima de una captura por muestreo y periodo entre muestras (segundos);
+# server.py la limita a la mitad de --timeout para que el maestro no mate al worker
+MAX_SECONDS = 60.0
+INTERVAL = 0.005
+
+# Funciones listadas en el informe de cProfile, ordenadas por tiempo acumulado
+STATS_LIMIT = 40
+
+# Llamadas trazadas durante la petición que se está perfilando (None fuera de ?profile=1)
+_spans = contextvars.ContextVar("calc_spans", default=None)
+
+
+class ProfilerBusy(LimitExceeded):
+    status = HTTPStatus.CONFLICT
+
+
+@contextlib.contextmanager
+def collecting():
+    spans = []
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+def record_span(name, start, seconds):
+    # Hook del Tracer: guarda la llamada si la petición actual se está perfilando
+    spans = _spans.get()
+    if spans is not None:
+        spans.append({"name": name, "seconds": seconds})
+
+
+def observe_span(name, start, seconds):
+    # Hook del Tracer: histograma por función en /metrics
+    metrics.observe("calc_trace_duration_seconds", (("function", name),), seconds)
+
+
+class Tracer:
+    # Envuelve funciones para entregar cada llamada (nombre, inicio, duración) a los hooks.
+    # Los envoltorios solo existen mientras están instalados: desactivado, el coste es cero
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.installed = []
+
+    def install(self, target, names, prefix):
+        for name in names:
+            original = getattr(target, name)
+            # Los métodos de la clase se envuelven en la instancia; al desinstalar se borran
+            own = name in getattr(target, "__dict__", {})
+            setattr(target, name, self._traced(original, f"{prefix}.{name}"))
+            self.installed.append((target, name, original if own else None))
+
+    def uninstall(self):
+        while self.installed:
+            target, name, original = self.installed.pop()
+            if original is None:
+                delattr(target, name)
+            else:
+                setattr(target, name, original)
+
+    def _traced(self, function, name):
+        hooks = self.hooks
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                for hook in hooks:
+                    hook(name, start, seconds)
+        wrapper.__wrapped__ = function
+        return wrapper
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame, thread):
+    # Pila de la raíz a la hoja separada por ";", el formato de entrada de flamegraph.pl
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    names.append(thread)
+    return ";".join(reversed(names))
+
+
+def render_collapsed(counts):
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+class Profiler:
+    # Perfilado bajo demanda de un worker en producción. Solo una llamada con cProfile y una
+    # captura por muestreo a la vez: cProfile no admite perfiles simultáneos y dos capturas
+    # se verían la una a la otra
+    def __init__(self, max_seconds=MAX_SECONDS, interval=INTERVAL, limit=STATS_LIMIT):
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self.limit = limit
+        self._call_lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+
+    def profile(self, function, *args):
+        # Devuelve el resultado de la llamada y el informe de cProfile junto a las llamadas trazadas
+        import cProfile
+        import io
+        import pstats
+
+        profile = cProfile.Profile()
+        with self._call_lock, collecting() as spans:
+            profile.enable()
+            try:
+                result = function(*args)
+            finally:
+                profile.disable()
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(self.limit)
+        return result, {"profile": output.getvalue(), "spans": spans}
+
+    def sample(self, seconds, interval=None, clock=time.monotonic, sleep=time.sleep):
+        # Muestrea las pilas de todos los hilos del proceso salvo el propio durante `seconds`
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds}")
+        interval = min(self.interval, seconds) if interval is None else interval
+        # El intervalo llega de la query string: inf o nan dormirían sin límite
+        if not (math.isfinite(interval) and 0 < interval <= seconds):
+            raise ValueError("interval must be positive and not longer than seconds")
+        if not self._sample_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile capture is already running")
+        try:
+            counts = collections.Counter()
+            current = threading.get_ident()
+            deadline = clock() + seconds
+            while True:
+                threads = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != current:
+                        counts[collapse(frame, threads.get(ident, f"thread-{ident}"))] += 1
+                now = clock()
+                if now >= deadline:
+                    return counts
+                sleep(min(interval, deadline - now))
+        finally:
+            self._sample_lock.release()
@@ -0,0 +1,39 @@
+# Formateo de resultados para el cuerpo de las respuestas: mismo texto que "{}".format(value)
+# sin pasar por el mecanismo genérico de format, y en bytes listos para enviar
+
+# Los enteros pequeños (índices, contadores, sumas habituales) se formatean una sola vez
+SMALL_INT_MIN = -256
+SMALL_INT_MAX = 1024
+
+_SMALL_TEXT = tuple(str(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX))
+_SMALL_BYTES = tuple(text.encode() for text in _SMALL_TEXT)
+
+
+def text(value):
+    # Para int y float exactos str() coincide con "{}".format (en float, la representación más
+    # corta que recupera el mismo valor) y evita interpretar la cadena de formato;
+    # bool y demás subclases siguen el camino genérico
+    cls = type(value)
+    if cls is int:
+        if SMALL_INT_MIN <= value < SMALL_INT_MAX:
+            return _SMALL_TEXT[value - SMALL_INT_MIN]
+        return str(value)
+    if cls is float:
+        return str(value)
+    return "{}".format(value)
+
+
+def to_bytes(value):
+    # Cuerpo ya formateado (str) o un número sin formatear
+    cls = type(value)
+    if cls is str:
+        return value.encode()
+    if cls is int:
+        if SMALL_INT_MIN <= value < SMALL_INT_MAX:
+            return _SMALL_BYTES[value - SMALL_INT_MIN]
+        return str(value).encode()
+    if cls is float:
+        return str(value).encode()
+    if cls is bytes:
+        return value
+    return "{}".format(value).encode()
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import sys
+
+from app import batch
+
+CSV_TYPES = ("text/csv", "application/csv")
+
+
+def stream_ndjson(table, lines, charge=None):
+    # Cada línea es un objeto {op, args}; cada resultado se emite en cuanto se calcula
+    for line in lines:
+        if isinstance(line, bytes):
+            # Una línea que no es UTF-8 se queda en JSON inválido y su propio error 400
+            line = line.decode(errors="replace")
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            result = {"error": "Invalid JSON line", "status": 400}
+        else:
+            result = batch.evaluate_item(table, item, charge)
+        yield json.dumps(result) + "\n"
+
+
+def stream_csv(table, lines, charge=None):
+    # Cada fila es op,arg1[,arg2]; la salida es status,resultado o status,error
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in _rows(csv.reader(_decode(lines))):
+        if not row:
+            continue
+        if isinstance(row, csv.Error):
+            result = {"error": f"Invalid CSV line: {row}", "status": 400}
+        else:
+            result = batch.evaluate_item(table, {"op": row[0], "args": row[1:]}, charge)
+        if "error" in result:
+            writer.writerow([result["status"], result["error"]])
+        else:
+            writer.writerow([200, result["result"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+FORMATS = {"ndjson": stream_ndjson, "csv": stream_csv}
+
+
+def stream(table, lines, fmt="ndjson", charge=None):
+    # `table` es la tabla de operaciones de app.operations, la misma que sirve /calc/<op>;
+    # charge(cost) cobra cada elemento y un RateLimited se reporta en su línea con 429
+    return FORMATS[fmt](table, lines, charge)
+
+
+def format_for(path):
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+def run(input_path, output_path="-", fmt=None, table=None):
+    offloader = None
+    if table is None:
+        from app.calc import Calculator
+        from app.offload import Offloader
+        from app.operations import build_table
+        offloader = Offloader()
+        table = build_table(Calculator(), offloader)
+    fmt = fmt or format_for(input_path)
+
+    # En binario: la decodificación de cada línea la hacen los formatos, sin abortar el trabajo
+    source = getattr(sys.stdin, "buffer", sys.stdin) if input_path == "-" else open(input_path, "rb")
+    target = sys.stdout if output_path == "-" else open(output_path, "w", newline="")
+    try:
+        for chunk in stream(table, source, fmt):
+            target.write(chunk)
+    finally:
+        if input_path != "-":
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        if offloader is not None:
+            offloader.shutdown()
+
+
+def _decode(lines):
+    for line in lines:
+        yield line.decode(errors="replace") if isinstance(line, bytes) else line
+
+
+def _rows(reader):
+    # Una fila mal formada se entrega como su csv.Error; el lector sigue con la siguiente
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield e
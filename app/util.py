@@ -1,5 +1,19 @@
 # pylint: disable=no-else-return
+import re
+
+from app import audit
+
+# Gramática de los operandos que no son enteros ni llevan punto decimal:
+# exponentes ("1e5"), signos y valores especiales ("inf", "nan")
+FLOAT_GRAMMAR = re.compile(
+    r"[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|inf(?:inity)?|nan)",
+    re.IGNORECASE,
+)
+
+
 def convert_to_number(operand):
+    # Mismo camino que antes para enteros y decimales con punto; la gramática precompilada
+    # solo se consulta cuando int() falla (exponentes, inf, nan) en lugar de rechazarlos
     try:
         if "." in operand:
             return float(operand)
@@ -7,20 +21,19 @@ def convert_to_number(operand):
             return int(operand)
 
     except ValueError:
-        raise TypeError("Operator cannot be converted to number")
-
+        # Un entero demasiado largo para int() no debe acabar convertido en inf
+        if not operand.lstrip("+-").isdecimal() and FLOAT_GRAMMAR.fullmatch(operand):
+            return float(operand)
+    except TypeError:
+        pass
 
-def InvalidConvertToNumber(operand):
-    try:
-        if "." in operand:
-            return (float(operand))
+    raise TypeError("Operator cannot be converted to number")
 
-        return int(operand)
 
-    except ValueError:
-        raise TypeError("Operator cannot be converted to number")
+def convert_operands(operands):
+    return [convert_to_number(operand) for operand in operands]
 
 
 def validate_permissions(operation, user):
-    print(f"checking permissions of {user} for operation {operation}")
+    audit.log("permission_check", user=user, operation=operation)
     return True
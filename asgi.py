@@ -0,0 +1,300 @@
+import asyncio
+import http.client
+import json
+import time
+import urllib.parse
+
+from app import admission, audit, batch, metrics, numeric, offload, profiling, render, stream
+from app.calc import acting_as
+from app.permissions import CachedPermissionProvider
+from api import ADMISSION, BACKENDS, CALCULATOR, EXPRESSIONS, HEADERS, JSON_HEADERS, METRICS_HEADERS, OPERATIONS
+from api import OFFLOADER, PROFILER, RATE_LIMITER, RESPONSE_CACHE, USER_HEADER
+from api import batch_cost, calculate as dispatch, charge_items, evaluate_expression as evaluate, health, limit_headers
+from api import identify, operation_label, profiled, sample_profile
+
+# Versión ASGI de api.py: mismas rutas, mismo contrato de respuesta y mismo estado compartido.
+# Se sirve con cualquier servidor ASGI, por ejemplo: uvicorn asgi:asgi_application
+
+# Operaciones que pueden bloquear esperando al pool de procesos; junto con las que
+# comprueban permisos se ejecutan en el pool de hilos para no bloquear el bucle
+BLOCKING_OPERATIONS = ("power",)
+
+
+def blocks(operation, operands, backend):
+    # Además de las anteriores, bloquean los backends exactos (fracciones y decimales crecen
+    # sin límite) y los operandos cuyo resultado puede llegar a formatearse en el offloader:
+    # la suma de longitudes acota las cifras de add, substract, sum y multiply
+    if operation.needs_permission or operation.name in BLOCKING_OPERATIONS:
+        return True
+    return backend.name != numeric.FloatBackend.name or sum(map(len, operands)) > OFFLOADER.offload_digits
+
+
+# Los nombres de cabecera son un conjunto pequeño y fijo: se codifican una sola vez
+HEADER_NAMES = {}
+
+
+def header_name(name):
+    encoded = HEADER_NAMES.get(name)
+    if encoded is None:
+        encoded = HEADER_NAMES[name] = name.lower().encode()
+    return encoded
+
+
+def encode_headers(headers):
+    return [(header_name(name), value.encode()) for name, value in headers.items()]
+
+
+async def send_response(send, body, status, headers, head=False):
+    await send({"type": "http.response.start", "status": status, "headers": encode_headers(headers)})
+    await send({"type": "http.response.body", "body": b"" if head else render.to_bytes(body)})
+
+
+async def read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def read_lines(receive):
+    # Entrega el cuerpo línea a línea sin acumularlo entero en memoria
+    pending = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        pending += message.get("body", b"")
+        more_body = message.get("more_body", False)
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def bad_request(endpoint, error):
+    metrics.record_error(endpoint, error)
+    audit.log("bad_request", audit.WARNING, endpoint=endpoint, error=str(error))
+    return (str(error), http.client.BAD_REQUEST, HEADERS)
+
+
+def limit_exceeded(endpoint, error):
+    metrics.record_error(endpoint, error)
+    audit.log("limit_exceeded", audit.WARNING, endpoint=endpoint, error=str(error))
+    return (str(error), error.status, limit_headers(error))
+
+
+async def calculate(scope, op, operands, user, client):
+    try:
+        name = query_parameter(scope, numeric.PARAMETER) or header(scope, numeric.HEADER)
+        backend = numeric.select(BACKENDS, name)
+    except ValueError as e:
+        return bad_request(scope["endpoint"], e)
+    operation = OPERATIONS.get(op)
+    if_none_match = header(scope, "If-None-Match")
+    if PROFILER is not None and query_parameter(scope, profiling.PARAMETER) == "1":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, profiled, dispatch, op, operands, backend, user, if_none_match, client
+        )
+    if operation is not None and blocks(operation, operands, backend):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, dispatch, op, operands, backend, user, if_none_match, client)
+    return dispatch(op, operands, backend, user, if_none_match, client)
+
+
+def evaluate_batch(items, user):
+    with acting_as(user):
+        return list(batch.evaluate_many(OPERATIONS, items))
+
+
+async def calc_batch(scope, receive, user, client):
+    # Como request.get_data(as_text=True) en Flask: los bytes no UTF-8 se reemplazan
+    # y el cuerpo resultante no es JSON válido (400)
+    body = (await read_body(receive)).decode(errors="replace")
+    try:
+        items = batch.parse_items(body, content_type(scope))
+        RATE_LIMITER.charge(client, batch_cost(items))
+    except ValueError as e:
+        return bad_request("calc_batch", e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded("calc_batch", e)
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(None, evaluate_batch, items, user)
+    return (json.dumps(results), http.client.OK, JSON_HEADERS)
+
+
+def evaluate_expression(body, user, client):
+    try:
+        return evaluate(json.loads(body), user, client)
+    except batch.ERRORS as e:
+        return bad_request("calc_expr", e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded("calc_expr", e)
+
+
+async def calc_expr(receive, user, client):
+    # Puede comprobar permisos: se evalúa en el pool de hilos
+    body = (await read_body(receive)).decode(errors="replace")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, evaluate_expression, body, user, client)
+
+
+def evaluate_lines(lines, fmt, user, charge):
+    with acting_as(user):
+        return list(stream.stream(OPERATIONS, lines, fmt, charge))
+
+
+async def calc_stream(scope, receive, send, user, client):
+    # Cada línea puede comprobar permisos o esperar al offloader: se evalúa en el pool de hilos
+    try:
+        RATE_LIMITER.charge(client)
+    except offload.LimitExceeded as e:
+        await send_response(send, *limit_exceeded("calc_stream", e))
+        return
+    fmt = "csv" if content_type(scope) in stream.CSV_TYPES else "ndjson"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    headers = {"Content-Type": mimetype, "Access-Control-Allow-Origin": "*"}
+    charge = charge_items(client)
+    loop = asyncio.get_running_loop()
+    await send({"type": "http.response.start", "status": http.client.OK, "headers": encode_headers(headers)})
+    async for line in read_lines(receive):
+        chunks = await loop.run_in_executor(None, evaluate_lines, [line], fmt, user, charge)
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def cache_stats():
+    stats = {"responses": RESPONSE_CACHE.stats(), "expressions": EXPRESSIONS.plans.stats()}
+    if isinstance(CALCULATOR.permissions, CachedPermissionProvider):
+        stats["permissions"] = CALCULATOR.permissions.stats()
+    return (json.dumps(stats), http.client.OK, JSON_HEADERS)
+
+
+async def admin_profile(scope):
+    # La captura duerme entre muestras: en el pool de hilos, el bucle sigue atendiendo peticiones
+    if PROFILER is None:
+        return ("Not Found", http.client.NOT_FOUND, HEADERS)
+    loop = asyncio.get_running_loop()
+    try:
+        seconds, interval = query_parameter(scope, "seconds"), query_parameter(scope, "interval")
+        return await loop.run_in_executor(None, sample_profile, seconds, interval)
+    except ValueError as e:
+        return bad_request("admin_profile", e)
+    except offload.LimitExceeded as e:
+        return limit_exceeded("admin_profile", e)
+
+
+def header(scope, name):
+    name = name.lower().encode()
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode()
+    return None
+
+
+def query_parameter(scope, name):
+    values = urllib.parse.parse_qs(scope.get("query_string", b"").decode()).get(name)
+    return values[0] if values else None
+
+
+def content_type(scope):
+    value = header(scope, "Content-Type")
+    return value.split(";")[0].strip() if value is not None else None
+
+
+async def route(scope, receive, send):
+    # El nombre del endpoint se guarda en scope, como los nombres de vista de Flask en api.py
+    method, path = scope["method"], scope["path"]
+    parts = path.strip("/").split("/")
+
+    if method == "GET" and path == "/":
+        scope["endpoint"] = "hello"
+        return ("Hello from The Calculator!\n", http.client.OK, HEADERS)
+    if method == "GET" and path == "/cache/stats":
+        scope["endpoint"] = "cache_stats"
+        return cache_stats()
+    if method == "GET" and path == "/health":
+        scope["endpoint"] = "health"
+        return health()
+    if method == "GET" and path == "/admin/profile":
+        scope["endpoint"] = "admin_profile"
+        return await admin_profile(scope)
+    if method == "GET" and path == "/metrics":
+        scope["endpoint"] = "metrics_endpoint"
+        return (metrics.render(), http.client.OK, METRICS_HEADERS)
+    if path.startswith("/calc/"):
+        return await admit(scope, receive, send, parts)
+    return ("Not Found", http.client.NOT_FOUND, HEADERS)
+
+
+async def admit(scope, receive, send, parts):
+    # Control de admisión de los cálculos: sin cola, el bucle de eventos no puede esperar un hueco
+    try:
+        # scope["client"] puede faltar (p. ej. con sockets Unix)
+        remote = scope.get("client")
+        user, client = identify(header(scope, USER_HEADER), remote[0] if remote else None)
+        ADMISSION.enter(wait=False)
+    except ValueError as e:
+        return bad_request("calc", e)
+    except admission.Overloaded as e:
+        return limit_exceeded("calc", e)
+    try:
+        return await calc_route(scope, receive, send, parts, user, client)
+    finally:
+        ADMISSION.exit()
+
+
+async def calc_route(scope, receive, send, parts, user, client):
+    method, path = scope["method"], scope["path"]
+    if method == "POST" and path == "/calc/batch":
+        scope["endpoint"] = "calc_batch"
+        return await calc_batch(scope, receive, user, client)
+    if method == "POST" and path == "/calc/expr":
+        scope["endpoint"] = "calc_expr"
+        return await calc_expr(receive, user, client)
+    if method == "POST" and path == "/calc/stream":
+        scope["endpoint"] = "calc_stream"
+        await calc_stream(scope, receive, send, user, client)
+        return None
+    if len(parts) > 2:
+        if method != "GET":
+            return ("Method Not Allowed", http.client.METHOD_NOT_ALLOWED, HEADERS)
+        scope["endpoint"] = operation_label(parts[1])
+        return await calculate(scope, parts[1], parts[2:], user, client)
+    return ("Not Found", http.client.NOT_FOUND, HEADERS)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            audit.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def asgi_application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    start = time.perf_counter()
+    method = scope["method"]
+    if method == "HEAD":
+        # Como en Flask, HEAD es un GET que responde las mismas cabeceras sin cuerpo
+        scope = dict(scope, method="GET")
+    response = await route(scope, receive, send)
+    status = http.client.OK
+    if response is not None:
+        await send_response(send, *response, head=method == "HEAD")
+        status = response[1]
+    elapsed = time.perf_counter() - start
+    metrics.record_request(scope.get("endpoint", "unmatched"), method, status, elapsed)
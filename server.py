@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+from app import prefork
+
+# Lanzador de producción: python server.py --bind 0.0.0.0:5000 --workers 4
+# El maestro importa api.py (Calculator, tabla de operaciones, cachés) antes de hacer
+# fork, así los workers comparten ese estado copy-on-write en lugar de importarlo cada uno.
+# kill -HUP <maestro> reinicia los workers sin cortar el servicio; kill -TERM lo para.
+
+
+def warm(application):
+    # Recorre cada ruta una vez para que las estructuras perezosas (mapa de URLs, regex,
+    # entradas de caché) se creen en el maestro y no en cada worker
+    from app import metrics
+
+    client = application.test_client()
+    for path in ("/", "/health", "/calc/add/1/1", "/calc/sqrt/4", "/calc/sum/1/2/3"):
+        client.get(path)
+    metrics.reset()
+
+
+def limit_profiling(profiler, timeout):
+    # Una captura de /admin/profile ocupa su petición todo el muestreo (sin --threaded, el worker
+    # entero): se acota por debajo del tiempo que el maestro tolera a un worker
+    if profiler is not None:
+        profiler.max_seconds = min(profiler.max_seconds, timeout / 2)
+
+
+def shutdown_worker():
+    import api
+    from app import audit
+
+    api.OFFLOADER.shutdown()
+    audit.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python server.py", description="Pre-fork HTTP server for the calculator API")
+    parser.add_argument("--bind", default=os.environ.get("CALC_BIND", "127.0.0.1:5000"))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CALC_WORKERS", "0")) or None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--threaded", action="store_true", help="serve each worker with a thread per request")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a stuck worker is killed")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    from werkzeug.serving import WSGIRequestHandler
+
+    import api
+
+    limit_profiling(api.PROFILER, args.timeout)
+    host, port = prefork.parse_bind(args.bind)
+    server = prefork.PreforkServer(
+        api.api_application, host, port,
+        workers=args.workers,
+        timeout=args.timeout,
+        graceful_timeout=args.graceful_timeout,
+        threaded=args.threaded,
+        warm=lambda: warm(api.api_application),
+        worker_exit=shutdown_worker,
+        handler=WSGIRequestHandler,
+    )
+    return server.run()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
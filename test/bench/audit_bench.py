@@ -0,0 +1,42 @@
+import sys
+import tempfile
+import time
+
+from app import audit
+from app.calc import Calculator
+
+
+class PrintPermissionProvider:
+    # Comportamiento anterior: un print síncrono por cada multiply
+    def __init__(self, stream):
+        self.stream = stream
+
+    def is_allowed(self, user, operation):
+        print(f"checking permissions of {user} for operation {operation}", file=self.stream, flush=True)
+        return True
+
+
+def measure(calc, n):
+    start = time.perf_counter()
+    for i in range(n):
+        calc.multiply(i, 3)
+    return n / (time.perf_counter() - start)
+
+
+def run(n=50000):
+    with tempfile.TemporaryFile("w") as output:
+        before = measure(Calculator(permissions=PrintPermissionProvider(output)), n)
+        audit.configure(stream=output)
+        after = measure(Calculator(), n)
+        audit.shutdown()
+        audit.configure(stream=output, sample_rate=0.01)
+        sampled = measure(Calculator(), n)
+        audit.shutdown()
+
+    print(f"print + flush:        {before:12.0f} multiply/s")
+    print(f"audit (queue):        {after:12.0f} multiply/s")
+    print(f"audit (1% sampling):  {sampled:12.0f} multiply/s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
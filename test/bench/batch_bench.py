@@ -0,0 +1,26 @@
+import json
+import sys
+import time
+
+from api import api_application
+
+
+def run(n=2000):
+    client = api_application.test_client()
+
+    start = time.perf_counter()
+    for i in range(n):
+        client.get(f"/calc/add/{i}/{i}")
+    single = time.perf_counter() - start
+
+    body = json.dumps([{"op": "add", "args": [str(i), str(i)]} for i in range(n)])
+    start = time.perf_counter()
+    client.post("/calc/batch", data=body, content_type="application/json")
+    batched = time.perf_counter() - start
+
+    print(f"single-op routes: {n / single:12.0f} ops/s")
+    print(f"/calc/batch:      {n / batched:12.0f} ops/s ({single / batched:.1f}x)")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
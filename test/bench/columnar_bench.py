@@ -0,0 +1,58 @@
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app import columnar
+
+CHUNKS = (1 << 10, 1 << 15, 1 << 20)
+WORKERS = (1, 2, 4)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def write_inputs(x, y, length, piece=1 << 20):
+    # Por trozos, para que la generación no infle el pico de memoria que se mide después
+    rng = np.random.default_rng(0)
+    with open(x, "wb") as xs, open(y, "wb") as ys:
+        for start in range(0, length, piece):
+            size = min(piece, length - start)
+            rng.random(size).tofile(xs)
+            np.where(rng.random(size) < 0.01, 0.0, rng.random(size)).tofile(ys)
+
+
+def run(length=1 << 23):
+    # Dos columnas float64 de `length` elementos (64 MiB cada una por defecto) con ceros en y
+    directory = tempfile.mkdtemp()
+    try:
+        x, y = os.path.join(directory, "x.f8"), os.path.join(directory, "y.f8")
+        write_inputs(x, y, length)
+        output = os.path.join(directory, "out.f8")
+
+        for chunk in CHUNKS:
+            elapsed = timed(lambda: columnar.run("divide", [x, y], output, chunk=chunk))
+            print(f"chunk {chunk:>8}, 1 worker:      {length / elapsed / 1e6:8.1f} M elements/s")
+        for workers in WORKERS[1:]:
+            elapsed = timed(lambda: columnar.run("divide", [x, y], output, workers=workers))
+            print(f"chunk {columnar.CHUNK:>8}, {workers} workers:     {length / elapsed / 1e6:8.1f} M elements/s")
+
+        # Antes de la referencia en memoria: np.fromfile sí carga las columnas completas
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        with np.errstate(divide="ignore"):
+            in_memory = timed(lambda: np.fromfile(x) / np.fromfile(y))
+        print(f"numpy, whole arrays in memory: {length / in_memory / 1e6:8.1f} M elements/s")
+        print(f"\npeak RSS of the chunked runs {peak:.0f} MiB, input size {2 * length * 8 / 2 ** 20:.0f} MiB")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1 << 23)
@@ -0,0 +1,88 @@
+import json
+import statistics
+import time
+from xml.sax.saxutils import quoteattr
+
+
+def measure(name, function, number=10000, repeat=5):
+    # Microbenchmark: se queda con la mejor de varias repeticiones para reducir el ruido
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter_ns() - start) / number)
+    ns_per_op = min(timings)
+    return {"name": name, "ns_per_op": ns_per_op, "ops_per_sec": 1e9 / ns_per_op}
+
+
+def measure_latency(name, function, number=1000):
+    # Throughput y latencia por petición: function recibe el número de iteración
+    latencies = []
+    start = time.perf_counter_ns()
+    for i in range(number):
+        request_start = time.perf_counter_ns()
+        function(i)
+        latencies.append(time.perf_counter_ns() - request_start)
+    elapsed = time.perf_counter_ns() - start
+    latencies.sort()
+    return {
+        "name": name,
+        "ns_per_op": elapsed / number,
+        "ops_per_sec": number * 1e9 / elapsed,
+        "p50_ns": statistics.median(latencies),
+        "p99_ns": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def compare(results, baseline, threshold):
+    # Marca como regresión todo benchmark más lento que la línea base por encima del umbral
+    reference = {result["name"]: result["ns_per_op"] for result in baseline.get("results", [])}
+    for result in results:
+        previous = reference.get(result["name"])
+        result["baseline_ns_per_op"] = previous
+        result["regression"] = previous is not None and result["ns_per_op"] > previous * (1 + threshold)
+    return [result for result in results if result["regression"]]
+
+
+def load_baseline(path):
+    if not path:
+        return {}
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def write_json(path, results, threshold):
+    with open(path, "w") as handle:
+        json.dump({"threshold": threshold, "results": results}, handle, indent=2)
+
+
+def write_junit(path, results, threshold):
+    failures = sum(1 for result in results if result.get("regression"))
+    lines = [
+        "<?xml version='1.0' encoding='UTF-8'?>",
+        f"<testsuite name='benchmarks' tests='{len(results)}' failures='{failures}' errors='0' skipped='0'>",
+    ]
+    for result in results:
+        seconds = result["ns_per_op"] / 1e9
+        lines.append(f"<testcase classname='bench' name={quoteattr(result['name'])} time='{seconds:.9f}'>")
+        if result.get("regression"):
+            message = "{:.0f} ns/op vs baseline {:.0f} ns/op (threshold {:.0%})".format(
+                result["ns_per_op"], result["baseline_ns_per_op"], threshold
+            )
+            lines.append(f"<failure message={quoteattr(message)}/>")
+        lines.append("</testcase>")
+    lines.append("</testsuite>")
+    with open(path, "w") as handle:
+        handle.write("\n".join(lines) + "\n")
+
+
+def report(results):
+    for result in results:
+        baseline = result.get("baseline_ns_per_op")
+        delta = "" if not baseline else " ({:+.1%})".format(result["ns_per_op"] / baseline - 1)
+        flag = "  REGRESSION" if result.get("regression") else ""
+        print(f"{result['name']:<40} {result['ns_per_op']:>14.0f} ns/op{delta}{flag}")
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Módulos cuyo tiempo de importación en frío se vigila, y la CLI completa
+MODULES = ("app.calc", "app.operations", "app.numeric", "app.batch", "api", "asgi")
+CLI = ("-m", "app", "add", "2", "3")
+
+
+def environment():
+    return dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+
+
+def import_time_us(module):
+    # Tiempo acumulado según -X importtime, en un intérprete nuevo (caché de bytecode ya caliente)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=environment(), capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def cli_time_ns():
+    start = time.perf_counter_ns()
+    subprocess.run([sys.executable, *CLI], cwd=ROOT, env=environment(), capture_output=True, check=True)
+    return time.perf_counter_ns() - start
+
+
+def import_benchmarks(repeat=5):
+    # Misma forma que harness.measure: el mínimo de varias repeticiones reduce el ruido
+    results = []
+    for module in MODULES:
+        ns = min(import_time_us(module) for _ in range(repeat)) * 1000
+        results.append({"name": f"import.{module}", "ns_per_op": ns, "ops_per_sec": 1e9 / ns})
+    ns = min(cli_time_ns() for _ in range(repeat))
+    results.append({"name": "cli.add", "ns_per_op": ns, "ops_per_sec": 1e9 / ns})
+    return results
+
+
+def run(repeat=5):
+    for result in import_benchmarks(repeat):
+        print(f"{result['name']:<24} {result['ns_per_op'] / 1e6:8.2f} ms")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
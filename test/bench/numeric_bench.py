@@ -0,0 +1,63 @@
+import os
+import sys
+import timeit
+
+# Sin registros de auditoría durante las mediciones
+os.environ.setdefault("CALC_AUDIT_LEVEL", "WARNING")
+
+from app import numeric, util
+from app.calc import Calculator
+from app.offload import Offloader
+from app.operations import build_table
+
+SIZES = (10, 100, 1000, 4000)
+OPERATIONS = ("add", "multiply", "divide")
+
+
+def operands(digits, fractional):
+    # Dos operandos de `digits` cifras; con fractional el punto decimal queda en el centro
+    x, y = ("123456789" * (digits // 9 + 1))[:digits], ("987654321" * (digits // 9 + 1))[:digits]
+    if fractional:
+        x, y = x[:digits // 2] + "." + x[digits // 2:], y[:digits // 2] + "." + y[digits // 2:]
+    return [x, y]
+
+
+def cost(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def run(number=2000):
+    offloader = Offloader()
+    try:
+        report(build_table(Calculator(), offloader), numeric.build_backends(), number)
+    finally:
+        offloader.shutdown()
+
+
+def report(table, backends, number):
+    # Sobrecoste del backend float frente al despacho directo anterior
+    add = table.get("add").function
+    direct = cost(lambda: add(*util.convert_operands(["12345", "678"])), number * 10)
+    through = cost(lambda: numeric.FLOAT.evaluate(add, ["12345", "678"]), number * 10)
+    print(f"float fast path: direct {direct:.0f} ns, through backend {through:.0f} ns\n")
+
+    print(f"{'operation':>10} {'digits':>7} {'shape':>6} " + " ".join(f"{name:>12}" for name in backends))
+    for op in OPERATIONS:
+        function = table.get(op).function
+        for digits in SIZES:
+            for fractional in (False, True):
+                parts = operands(digits, fractional)
+                timings = []
+                for backend in backends.values():
+                    try:
+                        backend.evaluate(function, parts)
+                        timings.append(f"{cost(lambda: backend.evaluate(function, parts), number):12.0f}")
+                    except (TypeError, ValueError):
+                        timings.append(f"{'error':>12}")
+                shape = "dec" if fractional else "int"
+                print(f"{op:>10} {digits:>7} {shape:>6} " + " ".join(timings))
+    print("\nns per request (parse + compute + format)")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
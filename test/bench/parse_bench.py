@@ -0,0 +1,39 @@
+import sys
+import timeit
+
+from app import util
+
+OPERANDS = ["5", "-3", "123456", "2.5", "-0.001", "1e5", "abc"]
+
+
+def previous_convert_to_number(operand):
+    # Implementación anterior, como referencia
+    try:
+        if "." in operand:
+            return float(operand)
+        else:
+            return int(operand)
+
+    except ValueError:
+        raise TypeError("Operator cannot be converted to number")
+
+
+def cost(function, operand, number):
+    def call():
+        try:
+            function(operand)
+        except TypeError:
+            pass
+    return min(timeit.repeat(call, number=number, repeat=5)) / number * 1e9
+
+
+def run(number=200000):
+    print(f"{'operand':>10} {'previous ns':>12} {'current ns':>12}")
+    for operand in OPERANDS:
+        before = cost(previous_convert_to_number, operand, number)
+        after = cost(util.convert_to_number, operand, number)
+        print(f"{operand:>10} {before:12.0f} {after:12.0f}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,85 @@
+import argparse
+import http.client
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def start_server(workers):
+    log = tempfile.TemporaryFile()
+    env = dict(os.environ, CALC_AUDIT_LEVEL="ERROR")
+    process = subprocess.Popen(
+        [sys.executable, "server.py", "--bind", "127.0.0.1:0", "--workers", str(workers)],
+        cwd=ROOT, env=env, stderr=log,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        log.seek(0)
+        match = re.search(rb"Listening on http://[\d.]+:(\d+)", log.read())
+        if match:
+            return process, int(match.group(1))
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def client(port, path, duration, results):
+    # Generador de carga: una conexión por petición, como la sirven los workers síncronos
+    count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", path.format(i=count))
+        connection.getresponse().read()
+        connection.close()
+        count += 1
+    results.put(count)
+
+
+def measure(workers, clients, path, duration):
+    process, port = start_server(workers)
+    try:
+        time.sleep(0.5)
+        results = multiprocessing.Queue()
+        loaders = [
+            multiprocessing.Process(target=client, args=(port, path, duration, results)) for _ in range(clients)
+        ]
+        for loader in loaders:
+            loader.start()
+        total = sum(results.get() for _ in loaders)
+        for loader in loaders:
+            loader.join()
+        return total / duration
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Requests per second of server.py against the number of workers")
+    parser.add_argument("--max-workers", type=int, default=cores * 2)
+    parser.add_argument("--clients", type=int, default=max(4, cores * 2))
+    parser.add_argument("--duration", type=float, default=5.0)
+    # Los operandos cambian en cada petición para no medir la caché de respuestas
+    parser.add_argument("--path", default="/calc/power/{i}/30")
+    args = parser.parse_args(argv)
+
+    counts = sorted({1, cores, args.max_workers} | {2 ** n for n in range(8) if 2 ** n <= args.max_workers})
+    print(f"{cores} CPU cores, {args.clients} client processes, GET {args.path}")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    base = None
+    for workers in counts:
+        rps = measure(workers, args.clients, args.path, args.duration)
+        base = base or rps
+        print(f"{workers:>8} {rps:>10.0f} {rps / base:>7.2f}x")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
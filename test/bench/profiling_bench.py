@@ -0,0 +1,33 @@
+import sys
+import timeit
+
+from app import profiling, util
+from app.calc import Calculator
+
+
+def cost(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def measure(calc, number):
+    return cost(lambda: calc.add(12345, 678), number), cost(lambda: util.convert_to_number("12345"), number)
+
+
+def run(number=200000):
+    # Coste por llamada de los hooks de traza: sin instalar, instalados y tras desinstalarlos
+    calc = Calculator()
+    tracer = profiling.Tracer([profiling.observe_span, profiling.record_span])
+    rows = [("disabled", measure(calc, number))]
+    tracer.install(calc, ["add"], "Calculator")
+    tracer.install(util, ["convert_to_number"], "util")
+    rows.append(("CALC_TRACE=1", measure(calc, number)))
+    tracer.uninstall()
+    rows.append(("uninstalled", measure(calc, number)))
+
+    print(f"{'tracing':>14} {'Calculator.add':>16} {'convert_to_number':>18}")
+    for name, (add, convert) in rows:
+        print(f"{name:>14} {add:14.0f}ns {convert:16.0f}ns")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,48 @@
+import os
+import sys
+import timeit
+from unittest.mock import patch
+
+# Sin registros de auditoría ni caché de respuestas: se mide el camino completo de cada petición
+os.environ.setdefault("CALC_AUDIT_LEVEL", "WARNING")
+os.environ.setdefault("CALC_MEMO_SIZE", "0")
+
+from werkzeug.test import EnvironBuilder
+
+import api
+from app import render
+
+PATHS = ("/", "/calc/add/5/3", "/calc/divide/7/2", "/calc/sqrt/2.25")
+
+
+def cost(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9
+
+
+def wsgi_call(environ):
+    def call():
+        body = api.api_application(dict(environ), lambda status, headers, exc_info=None: None)
+        b"".join(body)
+        getattr(body, "close", lambda: None)()
+    return call
+
+
+def run(number=2000):
+    print(f"{'formatter':>22} {'format+encode':>14} {'render':>10}")
+    for value in (8, 123456, 3.5, 0.1 + 0.2):
+        before = cost(lambda: "{}".format(value).encode(), number * 50)
+        after = cost(lambda: render.to_bytes(value), number * 50)
+        print(f"{value!r:>22} {before:12.0f}ns {after:8.0f}ns")
+
+    print(f"\n{'route':>22} {'tuple':>14} {'BytesResponse':>14} {'gain':>8}")
+    for path in PATHS:
+        call = wsgi_call(EnvironBuilder(path=path).get_environ())
+        with patch.object(api, "respond", lambda response: response):
+            before = cost(call, number)
+        after = cost(call, number)
+        print(f"{path:>22} {before / 1000:12.1f}us {after / 1000:12.1f}us {before - after:6.0f}ns")
+    print("\nper request, WSGI call without server or test client")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,116 @@
+import argparse
+import http.client
+import os
+import sys
+import threading
+
+# Sin registros de auditoría durante las mediciones; debe definirse antes de importar api
+os.environ.setdefault("CALC_AUDIT_LEVEL", "WARNING")
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import harness
+import import_bench
+from api import api_application
+from app import util
+from app.calc import Calculator
+
+ROUTES = [
+    ("hello", lambda i: "/"),
+    ("add", lambda i: f"/calc/add/{i}/3"),
+    ("substract", lambda i: f"/calc/substract/{i}/3"),
+    ("multiply", lambda i: f"/calc/multiply/{i}/3"),
+    ("divide", lambda i: f"/calc/divide/{i}/3"),
+    ("power", lambda i: f"/calc/power/{i}/3"),
+    ("sqrt", lambda i: f"/calc/sqrt/{i}"),
+    ("log10", lambda i: f"/calc/log10/{i + 1}"),
+]
+
+
+def calculator_benchmarks(number):
+    calc = Calculator()
+    return [
+        harness.measure("calc.add", lambda: calc.add(12345, 678), number),
+        harness.measure("calc.substract", lambda: calc.substract(12345, 678), number),
+        harness.measure("calc.multiply", lambda: calc.multiply(12345, 678), number),
+        harness.measure("calc.divide", lambda: calc.divide(12345, 678), number),
+        harness.measure("calc.power", lambda: calc.power(123, 45), number),
+        harness.measure("calc.sqrt", lambda: calc.sqrt(12345), number),
+        harness.measure("calc.log10", lambda: calc.log10(12345), number),
+    ]
+
+
+def util_benchmarks(number):
+    return [
+        harness.measure("util.convert_to_number.int", lambda: util.convert_to_number("12345"), number),
+        harness.measure("util.convert_to_number.float", lambda: util.convert_to_number("123.45"), number),
+        harness.measure("util.convert_to_number.exponent", lambda: util.convert_to_number("1e5"), number),
+    ]
+
+
+def client_benchmarks(number):
+    # Los operandos cambian en cada petición para no medir la caché de respuestas
+    client = api_application.test_client()
+    return [
+        harness.measure_latency(f"api.client.{name}", lambda i, path=path: client.get(path(i)), number)
+        for name, path in ROUTES
+    ]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def server_benchmarks(number):
+    server = make_server("127.0.0.1", 0, api_application, threaded=True, request_handler=QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def request(path):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        connection.request("GET", path)
+        connection.getresponse().read()
+        connection.close()
+
+    try:
+        return [
+            harness.measure_latency(f"api.server.{name}", lambda i, path=path: request(path(i)), number)
+            for name, path in ROUTES
+        ]
+    finally:
+        server.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculator benchmark suite")
+    parser.add_argument("--output-dir", default="results")
+    parser.add_argument("--baseline", default=os.environ.get("BENCH_BASELINE"))
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("BENCH_THRESHOLD", "0.25")))
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    args = parser.parse_args(argv)
+
+    scale = 10 if args.quick else 1
+    results = (
+        calculator_benchmarks(20000 // scale)
+        + util_benchmarks(20000 // scale)
+        + client_benchmarks(1000 // scale)
+        + server_benchmarks(200 // scale)
+        + import_bench.import_benchmarks(5 if args.quick else 10)
+    )
+
+    regressions = harness.compare(results, harness.load_baseline(args.baseline), args.threshold)
+    harness.report(results)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    harness.write_json(os.path.join(args.output_dir, "bench.json"), results, args.threshold)
+    harness.write_junit(os.path.join(args.output_dir, "bench_result.xml"), results, args.threshold)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
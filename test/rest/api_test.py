@@ -1,10 +1,22 @@
+import asyncio
+import collections
+import os
+import subprocess
+import sys
+import threading
 import unittest
 import json
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 import pytest
+from werkzeug.datastructures import Headers
+from werkzeug.test import EnvironBuilder, run_wsgi_app
 
 # Importamos la aplicación Flask directamente
+import api
+import asgi
 from api import api_application
+from app import batch, profiling, util
+from asgi import asgi_application
 
 
 def mocked_validation(*args, **kwargs):
@@ -147,6 +159,53 @@ class TestAPI(unittest.TestCase):
         # El mensaje de error proviene de util.convert_to_number
         self.assertIn("Operator cannot be converted to number", response.data.decode())
 
+    def test_power_failure_result_too_large(self):
+        """Verifica que /calc/power rechaza resultados enormes en lugar de bloquear el servidor."""
+        response = self.app.get('/calc/power/99999/99999')
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("limit", response.data.decode())
+
+    def test_power_huge_exponent_and_zero_base(self):
+        """Verifica que un exponente enorme da 422 y cero elevado a un negativo da 400, no 500."""
+        response = self.app.get('/calc/power/10/1' + '0' * 400)
+        self.assertEqual(response.status_code, 422)
+        for path in ('/calc/power/0/-1', '/calc/power/0.0/-1'):
+            response = self.app.get(path)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data.decode(), "Division by zero is not possible")
+        body = json.dumps([{"op": "power", "args": [10, 10 ** 400]}])
+        response = self.app.post('/calc/batch', data=body, content_type='application/json')
+        self.assertEqual(json.loads(response.data.decode())[0]["status"], 422)
+        body = {"expr": "2^x", "vars": {"x": 10 ** 400}}
+        response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+        response = self.app.post('/calc/expr', data=json.dumps({"expr": "0^-1"}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_huge_operands_in_float_operations(self):
+        """Verifica que divide, sqrt y log10 con operandos enormes no dan 500."""
+        response = self.app.get('/calc/divide/' + '9' * 4400 + '/7?numeric=fraction')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), '9' * 4400 + '/7')
+        for path in ('/calc/divide/' + '9' * 400 + '/7', '/calc/sqrt/' + '9' * 400 + '?numeric=fraction',
+                     '/calc/log10/' + '9' * 400 + '?numeric=fraction'):
+            response = self.app.get(path)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data.decode(), "Value is too large to be represented as a float")
+
+    def test_power_float_overflow(self):
+        """Verifica que una potencia en coma flotante que desborda devuelve 422 y no 500."""
+        for path in ('/calc/power/10/1e5', '/calc/power/10.0/400'):
+            response = self.app.get(path)
+            self.assertEqual(response.status_code, 422)
+            self.assertIn("too large", response.data.decode())
+
+    def test_power_large_result_offloaded(self):
+        """Verifica que /calc/power formatea enteros por encima del límite de cifras de Python."""
+        response = self.app.get('/calc/power/10/5000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "1" + "0" * 5000)
+
     # --- Pruebas para /calc/sqrt ---
     def test_sqrt_success(self):
         """Verifica que la ruta /calc/sqrt funciona correctamente."""
@@ -203,6 +262,658 @@ class TestAPI(unittest.TestCase):
         # El mensaje de error proviene de util.convert_to_number
         self.assertIn("Operator cannot be converted to number", response.data.decode())
 
+    # --- Pruebas para /calc/batch ---
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_batch_success(self, _mock_validate_permissions):
+        """Verifica que /calc/batch evalúa una lista JSON y devuelve los resultados en orden."""
+        body = [
+            {"op": "add", "args": ["5", "3"]},
+            {"op": "multiply", "args": ["6", "7"]},
+            {"op": "log10", "args": ["100"]},
+        ]
+        response = self.app.post('/calc/batch', data=json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode()), [{"result": "8"}, {"result": "42"}, {"result": "2.0"}])
+
+    def test_batch_ndjson_errors_per_item(self):
+        """Verifica que /calc/batch acepta NDJSON y reporta errores por elemento."""
+        body = '{"op": "divide", "args": ["1", "0"]}\n{"op": "sqrt", "args": ["9"]}\n'
+        response = self.app.post('/calc/batch', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data.decode())
+        self.assertEqual(results[0], {"error": "Division by zero is not possible", "status": 400})
+        self.assertEqual(results[1], {"result": "3.0"})
+
+    def test_batch_failure_invalid_body(self):
+        """Verifica que /calc/batch devuelve 400 si el cuerpo no es una lista válida."""
+        response = self.app.post('/calc/batch', data='{"op": "add"}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    # --- Pruebas para /calc/stream ---
+    def test_stream_ndjson(self):
+        """Verifica que /calc/stream devuelve una línea NDJSON por operación."""
+        body = '{"op": "add", "args": ["5", "3"]}\n{"op": "sqrt", "args": ["-4"]}\n'
+        response = self.app.post('/calc/stream', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        response.close()
+        self.assertEqual(lines[0], {"result": "8"})
+        self.assertEqual(lines[1]["status"], 400)
+
+    def test_stream_csv(self):
+        """Verifica que /calc/stream acepta y devuelve CSV."""
+        response = self.app.post('/calc/stream', data='divide,7,2\ndivide,1,0\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "200,3.5\n400,Division by zero is not possible\n")
+        response.close()
+
+    def test_non_utf8_body_is_bad_request(self):
+        """Verifica que un cuerpo con bytes no UTF-8 en /calc/batch y /calc/expr es un 400."""
+        for path in ('/calc/batch', '/calc/expr'):
+            response = self.app.post(path, data=b'\xff\xfe', content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_stream_continues_after_bad_lines(self):
+        """Verifica que una línea con error aritmético o bytes no UTF-8 no corta el stream."""
+        body = b'{"op": "power", "args": [0, -1]}\n\xff\xfe\n{"op": "add", "args": [1, 2]}\n'
+        response = self.app.post('/calc/stream', data=body, content_type='application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        response.close()
+        self.assertEqual([400, 400], [lines[0]["status"], lines[1]["status"]])
+        self.assertEqual({"result": "3"}, lines[2])
+
+    def test_stream_holds_admission_until_closed(self):
+        """Verifica que el hueco de admisión se mantiene mientras se calcula el cuerpo del stream."""
+        in_flight = []
+        evaluate_item = batch.evaluate_item
+
+        def observed(*args):
+            in_flight.append(api.ADMISSION.stats()["in_flight"])
+            return evaluate_item(*args)
+
+        with patch.object(batch, 'evaluate_item', observed):
+            response = self.app.post('/calc/stream', data='add,1,2\nadd,3,4\n', content_type='text/csv')
+            self.assertEqual(response.data.decode(), "200,3\n200,7\n")
+            response.close()
+        self.assertEqual([1, 1], in_flight)
+        self.assertEqual(0, api.ADMISSION.stats()["in_flight"])
+
+    def test_stream_and_batch_charge_each_item(self):
+        """Verifica que cada elemento de un lote o stream cuesta lo mismo que su petición /calc."""
+        with patch.object(api.RATE_LIMITER, 'rate', 0.001), patch.object(api.RATE_LIMITER, 'burst', 10.0), \
+                patch.object(api.RATE_LIMITER, 'buckets', collections.OrderedDict()):
+            body = '[{"op": "power", "args": [10, 5000]}, {"op": "add", "args": [1, 2]}]'
+            response = self.app.post('/calc/batch', data=body, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertLess(api.RATE_LIMITER.buckets['127.0.0.1'][0], 4)
+
+            response = self.app.post('/calc/stream', data='add,1,2\npower,10,5000\nadd,1,2\n', content_type='text/csv')
+            rows = response.data.decode().splitlines()
+            response.close()
+            self.assertEqual(["200,3", "429"], [rows[0], rows[1].split(",")[0]])
+
+
+    # --- Pruebas para /calc/expr ---
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_expr_success(self, _mock_validate_permissions):
+        """Verifica que /calc/expr evalúa una expresión con variables."""
+        body = {"expr": "sqrt(a*b) + log10(c)", "vars": {"a": "2", "b": "8", "c": "100"}}
+        response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "6.0")
+
+    def test_expr_bindings(self):
+        """Verifica que /calc/expr evalúa un lote de variables con el mismo plan."""
+        body = {"expr": "x / y", "bindings": [{"x": 7, "y": 2}, {"x": 1, "y": 0}]}
+        response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data.decode())
+        self.assertEqual(results[0], {"result": "3.5"})
+        self.assertEqual(results[1]["status"], 400)
+
+    def test_expr_failure_invalid_bindings(self):
+        """Verifica que /calc/expr devuelve 400 con variables que no son números o bindings que no son lista."""
+        for body in ({"expr": "x", "vars": {"x": [1]}}, {"expr": "x", "bindings": "abc"}):
+            response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        body = {"expr": "x", "bindings": [{"x": [1]}, {"x": 2}]}
+        response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+        results = json.loads(response.data.decode())
+        self.assertEqual(400, results[0]["status"])
+        self.assertEqual({"result": "2"}, results[1])
+
+    def test_expr_failure_invalid_expression(self):
+        """Verifica que /calc/expr devuelve 400 con una expresión inválida."""
+        response = self.app.post('/calc/expr', data=json.dumps({"expr": "2 +"}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Invalid expression", response.data.decode())
+
+    def test_expr_failure_too_deeply_nested(self):
+        """Verifica que /calc/expr devuelve 400 y no 500 con un anidamiento excesivo."""
+        for expression in ["(" * 2000 + "1" + ")" * 2000, "-" * 5000 + "1", "2^" * 3000 + "2"]:
+            response = self.app.post('/calc/expr', data=json.dumps({"expr": expression}), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Invalid expression", response.data.decode())
+
+    def test_expr_bindings_large_result(self):
+        """Verifica que los resultados de más de 4300 cifras se formatean en el offloader."""
+        body = {"expr": "10 ^ x", "bindings": [{"x": 5000}]}
+        response = self.app.post('/calc/expr', data=json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode()), [{"result": "1" + "0" * 5000}])
+
+    @patch('app.util.validate_permissions', return_value=False, create=True)
+    def test_expr_failure_permissions(self, _mock_validate_permissions):
+        """Verifica que /calc/expr devuelve 400 si multiply no está permitido."""
+        response = self.app.post('/calc/expr', data=json.dumps({"expr": "2 * 2"}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("User has no permissions", response.data.decode())
+
+    # --- Pruebas de perfilado (CALC_PROFILING=1) ---
+    def enable_profiler(self):
+        profiler = profiling.Profiler(max_seconds=1.0, interval=0.01)
+        for module in (api, asgi):
+            patcher = patch.object(module, 'PROFILER', profiler)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_profiling_disabled_by_default(self):
+        """Verifica que sin CALC_PROFILING ?profile=1 se ignora y /admin/profile no existe."""
+        response = self.app.get('/calc/add/40/2?profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "42")
+        self.assertEqual(self.app.get('/admin/profile?seconds=0.01').status_code, 404)
+
+    def test_profile_request(self):
+        """Verifica que ?profile=1 devuelve el informe de cProfile con el estado y el cuerpo."""
+        self.enable_profiler()
+        response = self.app.get('/calc/add/40/3?profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+        report = json.loads(response.data.decode())
+        self.assertEqual(report["status"], 200)
+        self.assertEqual(report["body"], "43")
+        self.assertIn("function calls", report["profile"])
+
+        report = json.loads(self.app.get('/calc/divide/1/0?profile=1').data.decode())
+        self.assertEqual(report["status"], 400)
+        self.assertIn("Division by zero", report["body"])
+
+    def test_admin_profile(self):
+        """Verifica que /admin/profile devuelve pilas colapsadas y valida la duración."""
+        self.enable_profiler()
+        response = self.app.get('/admin/profile?seconds=0.05&interval=0.01')
+        self.assertEqual(response.status_code, 200)
+        for line in response.data.decode().splitlines():
+            stack, _, count = line.rpartition(' ')
+            self.assertTrue(stack)
+            self.assertGreater(int(count), 0)
+        self.assertEqual(self.app.get('/admin/profile?seconds=5').status_code, 400)
+        self.assertEqual(self.app.get('/admin/profile?seconds=abc').status_code, 400)
+        self.assertEqual(self.app.get('/admin/profile?seconds=0.05&interval=inf').status_code, 400)
+        self.assertEqual(self.app.get('/admin/profile?seconds=0.05&interval=0.1').status_code, 400)
+
+    # --- Pruebas para /metrics ---
+    def test_metrics(self):
+        """Verifica que /metrics expone contadores por endpoint y errores por tipo de excepción."""
+        self.app.get('/calc/add/1/2')
+        self.app.get('/calc/divide/1/0')
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.data.decode()
+        self.assertIn('calc_requests_total{endpoint="add",method="GET",status="200"}', text)
+        self.assertIn('calc_errors_total{endpoint="divide",exception="TypeError"}', text)
+        self.assertIn('calc_calculator_duration_seconds_count{method="divide"}', text)
+
+    def test_metrics_label_unknown_operations_unmatched(self):
+        """Verifica que las operaciones inexistentes no crean una serie por cada URL inventada."""
+        self.app.get('/calc/no-such-op-1234/1/2')
+        text = self.app.get('/metrics').data.decode()
+        self.assertNotIn('no-such-op-1234', text)
+        self.assertIn('calc_requests_total{endpoint="unmatched",method="GET",status="404"}', text)
+
+    # --- Pruebas para la ruta genérica /calc/<op>/<operandos> ---
+    def test_sum_many_operands(self):
+        """Verifica que una operación n-aria acepta cualquier número de operandos."""
+        response = self.app.get('/calc/sum/1/2/3/4.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "10.5")
+        response = self.app.get('/calc/sum/1/x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_operation_not_found(self):
+        """Verifica que una operación no registrada devuelve 404."""
+        response = self.app.get('/calc/modulo/7/2')
+        self.assertEqual(response.status_code, 404)
+
+    def test_wrong_arity_not_found(self):
+        """Verifica que un número de operandos distinto de la aridad devuelve 404."""
+        self.assertEqual(self.app.get('/calc/add/1/2/3').status_code, 404)
+        self.assertEqual(self.app.get('/calc/sqrt/4/9').status_code, 404)
+
+    # --- Pruebas para los backends numéricos ---
+    def test_decimal_backend(self):
+        """Verifica que ?numeric=decimal calcula sin errores de redondeo binario."""
+        response = self.app.get('/calc/add/0.1/0.2')
+        self.assertEqual(response.data.decode(), "0.30000000000000004")
+        response = self.app.get('/calc/add/0.1/0.2?numeric=decimal')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "0.3")
+        response = self.app.get('/calc/multiply/1.10/3?numeric=decimal')
+        self.assertEqual(response.data.decode(), "3.30")
+
+    def test_fraction_backend_header(self):
+        """Verifica que la cabecera X-Calc-Numeric selecciona la aritmética racional exacta."""
+        response = self.app.get('/calc/divide/1/3', headers={'X-Calc-Numeric': 'fraction'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "1/3")
+        response = self.app.get('/calc/sum/0.1/0.2/0.7', headers={'X-Calc-Numeric': 'fraction'})
+        self.assertEqual(response.data.decode(), "1")
+
+    def test_numeric_backends_cached_separately(self):
+        """Verifica que la caché de respuestas no mezcla resultados de distintos backends."""
+        self.assertEqual(self.app.get('/calc/divide/2/4').data.decode(), "0.5")
+        self.assertEqual(self.app.get('/calc/divide/2/4?numeric=fraction').data.decode(), "1/2")
+        self.assertEqual(self.app.get('/calc/divide/2/4').data.decode(), "0.5")
+
+    def test_numeric_backend_failures(self):
+        """Verifica los errores 400 de backends desconocidos y operandos u operaciones inválidas."""
+        self.assertEqual(self.app.get('/calc/add/1/2?numeric=binary').status_code, 400)
+        self.assertEqual(self.app.get('/calc/add/1/x?numeric=decimal').status_code, 400)
+        self.assertEqual(self.app.get('/calc/add/inf/1?numeric=fraction').status_code, 400)
+        self.assertEqual(self.app.get('/calc/power/10/1e7?numeric=decimal').status_code, 400)
+
+    def test_fraction_power_too_large(self):
+        """Verifica que una potencia racional gigante se rechaza antes de calcularse."""
+        response = self.app.get('/calc/power/10/1e9?numeric=fraction')
+        self.assertEqual(response.status_code, 422)
+
+    # --- Pruebas de identidad, límite de peticiones y control de admisión ---
+    @patch.object(api, 'TRUST_USER_HEADER', True)
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_user_header_propagates_to_permissions(self, _validate_permissions):
+        """Verifica que la cabecera X-Calc-User llega a la comprobación de permisos."""
+        response = self.app.get('/calc/multiply/2/3', headers={'X-Calc-User': 'alice'})
+        self.assertEqual(response.status_code, 200)
+        _validate_permissions.assert_called_with("multiply", "alice")
+        self.app.get('/calc/multiply/2/4')
+        _validate_permissions.assert_called_with("multiply", "user1")
+
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_user_header_ignored_unless_trusted(self, _validate_permissions):
+        """Verifica que sin CALC_TRUST_USER_HEADER la cabecera no cambia ni el usuario ni el cupo."""
+        response = self.app.get('/calc/multiply/2/3', headers={'X-Calc-User': 'alice'})
+        self.assertEqual(response.status_code, 200)
+        _validate_permissions.assert_called_with("multiply", "user1")
+        with patch.object(api.RATE_LIMITER, 'rate', 1.0), patch.object(api.RATE_LIMITER, 'burst', 2.0), \
+                patch.object(api.RATE_LIMITER, 'buckets', collections.OrderedDict()):
+            for i, user in enumerate(('tenant', 'other')):
+                response = self.app.get(f'/calc/add/{i}/1', headers={'X-Calc-User': user})
+                self.assertEqual(response.status_code, 200)
+            response = self.app.get('/calc/add/5/1', headers={'X-Calc-User': 'third'})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(['127.0.0.1'], list(api.RATE_LIMITER.buckets))
+
+    @patch.object(api, 'TRUST_USER_HEADER', True)
+    def test_invalid_user(self):
+        """Verifica que un usuario con caracteres no permitidos devuelve 400."""
+        response = self.app.get('/calc/add/1/2', headers={'X-Calc-User': 'a b'})
+        self.assertEqual(response.status_code, 400)
+
+    @patch.object(api, 'TRUST_USER_HEADER', True)
+    def test_rate_limited(self):
+        """Verifica que al agotar las fichas se responde 429 con Retry-After, solo a ese usuario."""
+        with patch.object(api.RATE_LIMITER, 'rate', 1.0), patch.object(api.RATE_LIMITER, 'burst', 2.0), \
+                patch.object(api.RATE_LIMITER, 'buckets', collections.OrderedDict()):
+            for i in range(2):
+                response = self.app.get(f'/calc/add/{i}/1', headers={'X-Calc-User': 'tenant'})
+                self.assertEqual(response.status_code, 200)
+            response = self.app.get('/calc/add/5/1', headers={'X-Calc-User': 'tenant'})
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response.headers)
+            response = self.app.get('/calc/add/5/1', headers={'X-Calc-User': 'other'})
+            self.assertEqual(response.status_code, 200)
+
+    @patch.object(api, 'TRUST_USER_HEADER', True)
+    def test_expensive_power_costs_more(self):
+        """Verifica que una potencia grande consume más fichas que una suma."""
+        api.RESPONSE_CACHE.cache.invalidate()
+        with patch.object(api.RATE_LIMITER, 'rate', 1.0), patch.object(api.RATE_LIMITER, 'burst', 3.0), \
+                patch.object(api.RATE_LIMITER, 'buckets', collections.OrderedDict()):
+            response = self.app.get('/calc/power/10/2500', headers={'X-Calc-User': 'tenant'})
+            self.assertEqual(response.status_code, 200)
+            response = self.app.get('/calc/add/1/1', headers={'X-Calc-User': 'tenant'})
+            self.assertEqual(response.status_code, 429)
+
+    def test_overloaded(self):
+        """Verifica que sin capacidad los cálculos responden 503 y /health sigue respondiendo."""
+        with patch.object(api.ADMISSION, 'limit', 0), patch.object(api.ADMISSION, 'timeout', 0.01):
+            self.assertEqual(self.app.get('/calc/add/1/2').status_code, 503)
+            self.assertEqual(self.app.get('/health').status_code, 200)
+        self.assertEqual(self.app.get('/calc/add/1/2').status_code, 200)
+        self.assertEqual(api.ADMISSION.stats()["in_flight"], 0)
+
+    # --- Pruebas de caché HTTP (ETag, Cache-Control, 304) ---
+    def test_etag_and_cache_control(self):
+        """Verifica que las operaciones deterministas llevan ETag fuerte y Cache-Control immutable."""
+        response = self.app.get('/calc/add/2/3')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers['ETag'], r'^"[0-9a-f]{32}"$')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=', response.headers['Cache-Control'])
+        self.assertEqual('X-Calc-Numeric', response.headers['Vary'])
+
+    def test_etag_uses_canonical_operands(self):
+        """Verifica que la ETag depende de los operandos convertidos y del backend, no del texto."""
+        etag = self.app.get('/calc/add/2/3').headers['ETag']
+        self.assertEqual(etag, self.app.get('/calc/add/02/+3').headers['ETag'])
+        self.assertNotEqual(etag, self.app.get('/calc/add/2.0/3').headers['ETag'])
+        self.assertNotEqual(etag, self.app.get('/calc/add/2/3?numeric=decimal').headers['ETag'])
+        self.assertNotEqual(etag, self.app.get('/calc/substract/2/3').headers['ETag'])
+
+    def test_if_none_match_not_modified(self):
+        """Verifica que If-None-Match con la ETag actual devuelve 304 sin cuerpo."""
+        etag = self.app.get('/calc/power/7/11').headers['ETag']
+        response = self.app.get('/calc/power/7/11', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(etag, response.headers['ETag'])
+        response = self.app.get('/calc/power/7/11', headers={'If-None-Match': 'W/"other", ' + etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.app.get('/calc/power/7/11', headers={'If-None-Match': '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_skips_computation(self):
+        """Verifica que un 304 sin entrada en la caché del servidor no ejecuta la operación."""
+        etag = self.app.get('/calc/log10/123').headers['ETag']
+        api.RESPONSE_CACHE.cache.invalidate()
+        log10 = Mock(return_value="2")
+        operation = api.OPERATIONS.get('log10')._replace(function=log10)
+        with patch.dict(api.OPERATIONS.operations, {'log10': operation}):
+            response = self.app.get('/calc/log10/123', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        log10.assert_not_called()
+
+    def test_head_matches_get_without_body(self):
+        """Verifica que HEAD en /calc/... responde como GET pero sin cuerpo, en Flask y en ASGI."""
+        get = self.app.get('/calc/power/2/10')
+        response = self.app.head('/calc/power/2/10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(get.headers['ETag'], response.headers['ETag'])
+        self.assertEqual(self.app.head('/calc/divide/1/0').status_code, 400)
+        self.assertEqual(self.app.head('/health').status_code, 200)
+
+    def test_if_none_match_star_needs_a_result(self):
+        """Verifica que If-None-Match: * no oculta un error: solo responde 304 si hay resultado."""
+        response = self.app.get('/calc/divide/1/0', headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 400)
+        response = self.app.get('/calc/divide/1/4', headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 304)
+        response = self.app.get('/calc/divide/1/4', headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_multiply_not_cacheable(self):
+        """Verifica que multiply, que depende de los permisos, no se marca como cacheable."""
+        response = self.app.get('/calc/multiply/2/3')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertEqual('no-store', response.headers['Cache-Control'])
+        response = self.app.get('/calc/multiply/2/3', headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 200)
+
+    # --- Pruebas para /health ---
+    def test_health(self):
+        """Verifica que /health responde con el estado y el pid del proceso."""
+        response = self.app.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(json.loads(response.data.decode())["status"], "ok")
+
+    # --- Pruebas para /cache/stats ---
+    def test_cached_response_skips_parsing(self):
+        """Verifica que una respuesta cacheada no vuelve a convertir los operandos."""
+        self.app.get('/calc/power/3/7')
+        with patch('app.util.convert_to_number') as convert_to_number:
+            response = self.app.get('/calc/power/3/7')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.decode(), "2187")
+        convert_to_number.assert_not_called()
+
+    def test_cache_stats(self):
+        """Verifica que /cache/stats expone las estadísticas de la caché."""
+        self.app.get('/calc/log10/1000')
+        self.app.get('/calc/log10/1000')
+        response = self.app.get('/cache/stats')
+        self.assertEqual(response.status_code, 200)
+        stats = json.loads(response.data.decode())["responses"]
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertIn("hit_ratio", stats)
+
+
+class AsgiResponse:
+    def __init__(self, status_code, headers, data):
+        self.status_code = status_code
+        self.headers = headers
+        self.data = data
+        self.mimetype = headers.get('Content-Type', '').split(';')[0]
+
+    def close(self):
+        pass
+
+
+class AsgiTestClient:
+    """
+    Cliente mínimo con la misma interfaz que el cliente de prueba de Flask
+    para ejecutar las peticiones contra la aplicación ASGI.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def get(self, path, headers=None):
+        return self.request('GET', path, headers=headers)
+
+    def head(self, path, headers=None):
+        return self.request('HEAD', path, headers=headers)
+
+    def post(self, path, data='', content_type='text/plain'):
+        return self.request('POST', path, data.encode() if isinstance(data, str) else data, content_type)
+
+    def request(self, method, path, body=b'', content_type=None, headers=None):
+        path, _, query_string = path.partition('?')
+        headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+        if content_type:
+            headers.append((b'content-type', content_type.encode()))
+        scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': query_string.encode(), 'headers': headers, 'client': ('127.0.0.1', 50000),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        response_headers = Headers([(name.decode(), value.decode()) for name, value in sent[0]['headers']])
+        data = b''.join(message.get('body', b'') for message in sent[1:])
+        return AsgiResponse(sent[0]['status'], response_headers, data)
+
+
+class TestAsgiAPI(TestAPI):
+    """
+    Ejecuta todas las pruebas de TestAPI contra la aplicación ASGI.
+    """
+
+    def setUp(self):
+        self.app = AsgiTestClient(asgi_application)
+
+    def test_stream_lines_run_off_the_event_loop(self):
+        """Verifica que cada línea de /calc/stream se evalúa en el pool de hilos y no en el bucle."""
+        threads = []
+        evaluate_item = batch.evaluate_item
+
+        def observed(*args):
+            threads.append(threading.current_thread())
+            return evaluate_item(*args)
+
+        with patch.object(batch, 'evaluate_item', observed):
+            response = self.app.post('/calc/stream', data='add,1,2\nsqrt,9\n', content_type='text/csv')
+        self.assertEqual(response.data.decode(), "200,3\n200,3.0\n")
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_blocking_operations_run_off_the_event_loop(self):
+        """Verifica que los backends exactos y los operandos enormes no se evalúan en el bucle."""
+        threads = []
+        dispatch = asgi.dispatch
+
+        def observed(*args):
+            threads.append(threading.current_thread())
+            return dispatch(*args)
+
+        paths = ('/calc/add/1/2', '/calc/add/1/2?numeric=fraction', '/calc/add/1/2?numeric=decimal',
+                 '/calc/add/' + '9' * 2500 + '/' + '9' * 2500)
+        with patch.object(asgi, 'dispatch', observed):
+            for path in paths:
+                self.assertEqual(self.app.get(path).status_code, 200)
+        self.assertEqual(threading.main_thread(), threads[0])
+        self.assertNotIn(threading.main_thread(), threads[1:])
+
+
+class TestBytesResponse(unittest.TestCase):
+    """
+    Compara la salida WSGI del camino rápido (BytesResponse) con la que genera Flask
+    a partir de la tupla (cuerpo, estado, cabeceras).
+    """
+
+    REQUESTS = [
+        ('GET', '/', None),
+        ('GET', '/calc/add/5/3', None),
+        ('GET', '/calc/add/2.5/3.5', None),
+        ('GET', '/calc/add/-256/1279', None),
+        ('GET', '/calc/substract/10/4', None),
+        ('GET', '/calc/multiply/6/7', None),
+        ('GET', '/calc/divide/7/2', None),
+        ('GET', '/calc/divide/1/3', None),
+        ('GET', '/calc/power/10/5000', None),
+        ('GET', '/calc/power/2/0.5', None),
+        ('GET', '/calc/sqrt/2.25', None),
+        ('GET', '/calc/log10/1000', None),
+        ('GET', '/calc/sum/1/2/3/4', None),
+        ('GET', '/calc/divide/1/3?numeric=fraction', None),
+        ('GET', '/calc/add/0.1/0.2?numeric=decimal', None),
+        ('HEAD', '/calc/add/5/3', None),
+        ('GET', '/calc/divide/1/0', None),
+        ('GET', '/calc/add/abc/3', None),
+        ('POST', '/calc/batch', json.dumps([{"op": "add", "args": ["5", "3"]}, {"op": "sqrt", "args": ["-1"]}])),
+        ('POST', '/calc/expr', json.dumps({"expr": "sqrt(a*b)", "vars": {"a": "2", "b": "8"}})),
+        ('POST', '/calc/expr', json.dumps({"expr": "x / y", "bindings": [{"x": 7, "y": 2}]})),
+    ]
+
+    def run_request(self, method, path, data):
+        path, _, query_string = path.partition('?')
+        environ = EnvironBuilder(
+            path=path, method=method, query_string=query_string, data=data, content_type='application/json',
+        ).get_environ()
+        app_iter, status, headers = run_wsgi_app(api_application, environ)
+        try:
+            return status, headers.to_wsgi_list(), b''.join(app_iter)
+        finally:
+            getattr(app_iter, 'close', lambda: None)()
+
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_output_is_byte_identical(self, _mock_validate_permissions):
+        """Verifica que estado, cabeceras y cuerpo coinciden byte a byte con el camino de Flask."""
+        for method, path, data in self.REQUESTS:
+            with self.subTest(method=method, path=path):
+                api.RESPONSE_CACHE.cache.invalidate()
+                with patch.object(api, 'respond', side_effect=lambda response: response):
+                    expected = self.run_request(method, path, data)
+                api.RESPONSE_CACHE.cache.invalidate()
+                self.assertEqual(expected, self.run_request(method, path, data))
+                # Segunda petición: la respuesta sale de la caché de respuestas
+                self.assertEqual(expected, self.run_request(method, path, data))
+
+    def test_respond_only_handles_success(self):
+        """Verifica que solo las respuestas 200 toman el camino rápido."""
+        self.assertIsInstance(api.respond(("8", 200, api.HEADERS)), api.BytesResponse)
+        error = ("Not Found", 404, api.HEADERS)
+        self.assertIs(error, api.respond(error))
+
+    def test_headers_are_read_only(self):
+        """Verifica que las cabeceras compartidas no pueden modificarse por accidente."""
+        with self.assertRaises(TypeError):
+            api.HEADERS["X-Test"] = "1"
+        response = api.respond(("8", 200, api.HEADERS))
+        self.assertEqual("1", response.headers["Content-Length"])
+
+    def test_response_methods(self):
+        """Verifica que get_data, set_data y call_on_close funcionan como en una Response de Flask."""
+        response = api.respond(("8", 200, api.HEADERS))
+        self.assertEqual(b"8", response.get_data())
+        self.assertEqual("8", response.get_data(as_text=True))
+        closed = []
+        response.call_on_close(lambda: closed.append(True))
+        environ = EnvironBuilder(path='/calc/add/5/3').get_environ()
+        app_iter, status, headers = run_wsgi_app(response, environ)
+        self.assertEqual(b"8", b''.join(app_iter))
+        app_iter.close()
+        self.assertEqual([True], closed)
+        response = api.respond(("8", 200, api.HEADERS))
+        response.set_data(b"42")
+        app_iter, status, headers = run_wsgi_app(response, environ)
+        self.assertEqual((b"42", "2"), (b''.join(app_iter), headers["Content-Length"]))
+
+    def test_after_request_header_changes_are_sent(self):
+        """Verifica que las cabeceras añadidas por un after_request llegan a la respuesta."""
+        def add_header(response):
+            response.headers["X-Request-Id"] = "abc"
+            return response
+
+        api_application.after_request_funcs[None].append(add_header)
+        try:
+            _status, headers, body = self.run_request('GET', '/calc/add/5/3', None)
+        finally:
+            api_application.after_request_funcs[None].remove(add_header)
+        self.assertEqual(b"8", body)
+        self.assertIn(("X-Request-Id", "abc"), headers)
+        self.assertNotIn("X-Request-Id", api.HEADERS)
+
+
+class TestTracing(unittest.TestCase):
+    """
+    CALC_TRACE se lee al importar api: se comprueba en un intérprete nuevo.
+    """
+
+    def test_traced_calls_appear_in_profile_and_metrics(self):
+        """Verifica que con CALC_TRACE=1 las llamadas trazadas aparecen en ?profile=1 y en /metrics."""
+        code = (
+            "import json, api\n"
+            "client = api.api_application.test_client()\n"
+            "report = json.loads(client.get('/calc/add/6/7?profile=1').data)\n"
+            "print(json.dumps([span['name'] for span in report['spans']]))\n"
+            "print('calc_trace_duration_seconds_count{function=\"Calculator.add\"} 1' in client.get('/metrics').data.decode())\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, CALC_TRACE="1", CALC_PROFILING="1", CALC_AUDIT_LEVEL="WARNING", PYTHONPATH=root)
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True,
+        ).stdout.splitlines()
+        self.assertEqual(["util.convert_to_number", "util.convert_to_number", "Calculator.add"], json.loads(output[0]))
+        self.assertEqual("True", output[1])
+
+    def test_disabled_tracing_installs_nothing(self):
+        """Verifica que sin CALC_TRACE no hay envoltorios: el coste desactivado es cero."""
+        self.assertIsNone(api.TRACER)
+        self.assertFalse(hasattr(util.convert_to_number, '__wrapped__'))
+        self.assertFalse(hasattr(util.validate_permissions, '__wrapped__'))
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
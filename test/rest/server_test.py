@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import urllib.request
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Un único worker que tarda 1.5 segundos en responder con un timeout de 0.5 segundos
+SLOW_SERVER = """
+import os, time
+from app import prefork
+
+def application(environ, start_response):
+    time.sleep(1.5)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [str(os.getpid()).encode()]
+
+prefork.PreforkServer(application, port=0, workers=1, timeout=0.5, graceful_timeout=1).run()
+"""
+
+
+class TestLimitProfiling(unittest.TestCase):
+    def test_capture_stays_below_worker_timeout(self):
+        """Verifica que la duración máxima de una captura queda por debajo del timeout del worker."""
+        import server
+        from app import profiling
+
+        profiler = profiling.Profiler(max_seconds=60.0)
+        server.limit_profiling(profiler, 30.0)
+        self.assertEqual(15.0, profiler.max_seconds)
+        server.limit_profiling(profiler, 120.0)
+        self.assertEqual(15.0, profiler.max_seconds)
+        server.limit_profiling(None, 30.0)
+
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Arranca un servidor pre-fork en un proceso aparte y lo prueba a través de HTTP.
+    """
+
+    def start(self, args):
+        self.log = tempfile.TemporaryFile()
+        env = dict(os.environ, CALC_AUDIT_LEVEL="WARNING")
+        self.process = subprocess.Popen([sys.executable] + args, cwd=ROOT, env=env, stderr=self.log)
+        self.base = "http://127.0.0.1:{}".format(self.wait_for_port())
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            # SIGTERM primero: el maestro detiene a sus workers antes de salir
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.log.close()
+
+    def wait_for_port(self, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.log.seek(0)
+            match = re.search(rb"Listening on http://[\d.]+:(\d+)", self.log.read())
+            if match:
+                return int(match.group(1))
+            time.sleep(0.05)
+        self.fail("server did not start")
+
+    def get(self, path):
+        with urllib.request.urlopen(self.base + path, timeout=5) as response:
+            return response.status, response.read().decode()
+
+
+class TestPreforkServer(ServerTestCase):
+    """
+    Arranca el lanzador server.py con dos workers y lo prueba a través de HTTP.
+    """
+
+    def setUp(self):
+        self.start(["server.py", "--bind", "127.0.0.1:0", "--workers", "2", "--graceful-timeout", "5"])
+
+    def worker_pids(self, requests=20):
+        return {json.loads(self.get("/health")[1])["pid"] for _ in range(requests)}
+
+    def test_serves_requests_from_workers(self):
+        """Verifica que los workers responden y no son el proceso maestro."""
+        self.assertEqual((200, "5"), self.get("/calc/add/2/3"))
+        pids = self.worker_pids()
+        self.assertNotIn(self.process.pid, pids)
+
+    def test_reload_replaces_workers(self):
+        """Verifica que SIGHUP sustituye los workers sin dejar de atender peticiones."""
+        before = self.worker_pids()
+        self.process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            after = self.worker_pids()
+            if not after & before:
+                break
+            time.sleep(0.1)
+        self.assertFalse(after & before)
+
+    def test_graceful_shutdown(self):
+        """Verifica que SIGTERM detiene el maestro y los workers."""
+        self.get("/health")
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(0, self.process.wait(timeout=10))
+
+
+class TestSlowRequests(ServerTestCase):
+    """
+    Un worker ocupado en una petición larga sigue latiendo y no se confunde con uno bloqueado.
+    """
+
+    def setUp(self):
+        self.start(["-c", SLOW_SERVER])
+
+    def test_request_longer_than_timeout(self):
+        """Verifica que una petición más larga que el timeout termina y el worker sigue vivo."""
+        status, pid = self.get("/")
+        self.assertEqual(200, status)
+        self.assertEqual((200, pid), self.get("/"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,137 @@
+import threading
+import unittest
+import pytest
+
+from app.admission import AdmissionController, Overloaded, RateLimited, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(rate=2.0, burst=4.0, clock=self.clock)
+
+    def test_burst_then_limited(self):
+        """Verifica que se admite la ráfaga completa y después se limita."""
+        for _ in range(4):
+            self.limiter.charge("alice")
+        with self.assertRaises(RateLimited) as context:
+            self.limiter.charge("alice")
+        self.assertEqual(429, context.exception.status)
+        self.assertAlmostEqual(0.5, context.exception.retry_after)
+
+    def test_refill(self):
+        """Verifica que las fichas se reponen al ritmo configurado."""
+        self.limiter.charge("alice", 4)
+        self.clock.now = 1.0
+        self.limiter.charge("alice", 2)
+        self.assertRaises(RateLimited, self.limiter.charge, "alice", 1)
+
+    def test_cost_weighted(self):
+        """Verifica que una operación cara consume más fichas que una barata."""
+        self.limiter.charge("alice", 3.5)
+        self.assertRaises(RateLimited, self.limiter.charge, "alice", 1)
+        self.limiter.charge("bob", 1)
+        self.limiter.charge("bob", 1)
+
+    def test_cost_above_burst_empties_bucket(self):
+        """Verifica que una petición más cara que la ráfaga se admite con el bucket lleno."""
+        self.limiter.charge("alice", 100)
+        self.assertRaises(RateLimited, self.limiter.charge, "alice", 0.5)
+
+    def test_users_are_isolated(self):
+        """Verifica que un usuario no consume las fichas de otro."""
+        self.limiter.charge("alice", 4)
+        self.assertRaises(RateLimited, self.limiter.charge, "alice")
+        self.limiter.charge("bob")
+
+    def test_disabled(self):
+        """Verifica que con rate=0 no se limita ni se guarda estado."""
+        limiter = RateLimiter(rate=0)
+        for _ in range(1000):
+            limiter.charge("alice", 100)
+        self.assertEqual(0, limiter.stats()["users"])
+
+    def test_bounded_users(self):
+        """Verifica que el número de usuarios con estado está acotado."""
+        limiter = RateLimiter(rate=1.0, burst=1.0, maxsize=2, clock=self.clock)
+        for user in ("a", "b", "c"):
+            limiter.charge(user)
+        self.assertEqual(["b", "c"], list(limiter.buckets))
+
+    def test_thread_safety(self):
+        """Verifica que con muchos hilos no se admiten más peticiones que la ráfaga."""
+        limiter = RateLimiter(rate=0.001, burst=1000.0)
+        admitted = []
+
+        def worker():
+            count = 0
+            for _ in range(500):
+                try:
+                    limiter.charge("alice")
+                    count += 1
+                except RateLimited:
+                    pass
+            admitted.append(count)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1000, sum(admitted))
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_limit_without_queue(self):
+        """Verifica que sin hueco ni cola la petición se rechaza con 503."""
+        controller = AdmissionController(limit=1, queue=0)
+        controller.enter()
+        with self.assertRaises(Overloaded) as context:
+            controller.enter()
+        self.assertEqual(503, context.exception.status)
+        controller.exit()
+        controller.enter()
+        self.assertEqual(1, controller.stats()["rejected"])
+
+    def test_no_wait(self):
+        """Verifica que wait=False no hace cola aunque haya sitio en ella."""
+        controller = AdmissionController(limit=1, queue=10)
+        controller.enter()
+        self.assertRaises(Overloaded, controller.enter, wait=False)
+
+    def test_queue_timeout(self):
+        """Verifica que una petición en cola se rechaza si no obtiene hueco a tiempo."""
+        controller = AdmissionController(limit=1, queue=1, timeout=0.01)
+        controller.enter()
+        self.assertRaises(Overloaded, controller.enter)
+        self.assertEqual(0, controller.stats()["waiting"])
+
+    def test_queued_request_admitted(self):
+        """Verifica que una petición en cola entra cuando otra termina."""
+        controller = AdmissionController(limit=1, queue=1, timeout=5)
+        controller.enter()
+        entered = threading.Event()
+
+        def waiter():
+            controller.enter()
+            entered.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        self.assertFalse(entered.wait(0.05))
+        controller.exit()
+        self.assertTrue(entered.wait(5))
+        thread.join()
+        self.assertEqual(1, controller.stats()["in_flight"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
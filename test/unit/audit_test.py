@@ -0,0 +1,66 @@
+import io
+import json
+import unittest
+import pytest
+
+from app import audit, util
+
+
+class TestAudit(unittest.TestCase):
+    def tearDown(self):
+        audit.shutdown()
+
+    def test_records_are_written_as_json_in_batches(self):
+        """Verifica que los registros se escriben como JSON por el hilo de escritura."""
+        stream = io.StringIO()
+        writer = audit.configure(stream=stream, batch_size=10)
+        for i in range(25):
+            audit.log("event", value=i)
+        audit.shutdown()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(25, len(lines))
+        self.assertEqual(25, writer.written)
+        self.assertEqual({"event": "event", "value": 24, "level": "INFO"}, {k: lines[-1][k] for k in ("event", "value", "level")})
+
+    def test_level_filters_records(self):
+        """Verifica que los registros por debajo del nivel configurado se descartan."""
+        stream = io.StringIO()
+        audit.configure(level="WARNING", stream=stream)
+        audit.log("ignored")
+        audit.log("kept", audit.WARNING)
+        audit.shutdown()
+        self.assertEqual(["kept"], [json.loads(line)["event"] for line in stream.getvalue().splitlines()])
+
+    def test_sampling_keeps_warnings(self):
+        """Verifica que el muestreo descarta INFO pero conserva WARNING."""
+        stream = io.StringIO()
+        audit.configure(sample_rate=0.0, stream=stream)
+        audit.log("sampled out")
+        audit.log("warning", audit.WARNING)
+        audit.shutdown()
+        self.assertEqual(["warning"], [json.loads(line)["event"] for line in stream.getvalue().splitlines()])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Verifica que una cola llena descarta registros sin bloquear."""
+        audit.configure(stream=io.StringIO(), queue_size=0)
+        audit.log("dropped")
+        self.assertEqual(1, audit.dropped)
+
+    def test_unconfigured_log_is_a_no_op(self):
+        """Verifica que sin configurar no se registra nada."""
+        audit.log("nothing")
+        audit.log("nothing", audit.ERROR)
+
+    def test_validate_permissions_logs_permission_check(self):
+        """Verifica que validate_permissions registra la comprobación en lugar de imprimirla."""
+        stream = io.StringIO()
+        audit.configure(stream=stream)
+        self.assertTrue(util.validate_permissions("multiply", "user1"))
+        audit.shutdown()
+        record = json.loads(stream.getvalue())
+        self.assertEqual(("permission_check", "user1", "multiply"), (record["event"], record["user"], record["operation"]))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
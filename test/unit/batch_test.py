@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+import pytest
+
+from app import batch
+from app.calc import Calculator
+from app.offload import Offloader
+from app.operations import build_table
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.offloader = Offloader(max_result_digits=1000)
+        self.table = build_table(Calculator(), self.offloader)
+
+    def tearDown(self):
+        self.offloader.shutdown()
+
+    def test_parse_items_json_list(self):
+        """Verifica que se acepta una lista JSON de operaciones."""
+        items = batch.parse_items('[{"op": "add", "args": ["1", "2"]}]', "application/json")
+        self.assertEqual([{"op": "add", "args": ["1", "2"]}], items)
+
+    def test_parse_items_ndjson(self):
+        """Verifica que se acepta NDJSON ignorando líneas vacías."""
+        body = '{"op": "add", "args": [1, 2]}\n\n{"op": "sqrt", "args": [4]}\n'
+        items = batch.parse_items(body, "application/x-ndjson")
+        self.assertEqual(2, len(items))
+        self.assertEqual("sqrt", items[1]["op"])
+
+    def test_parse_items_rejects_non_list(self):
+        """Verifica que un cuerpo JSON que no es lista se rechaza."""
+        self.assertRaises(ValueError, batch.parse_items, '{"op": "add"}', "application/json")
+        self.assertRaises(ValueError, batch.parse_items, 'not json', "application/json")
+
+    def test_evaluate_many_keeps_order(self):
+        """Verifica que los resultados se devuelven en el mismo orden."""
+        items = [
+            {"op": "add", "args": ["5", "3"]},
+            {"op": "divide", "args": [7, 2]},
+            {"op": "sqrt", "args": ["2.25"]},
+        ]
+        results = list(batch.evaluate_many(self.table, items))
+        self.assertEqual([{"result": "8"}, {"result": "3.5"}, {"result": "1.5"}], results)
+
+    def test_evaluate_many_reports_errors_per_item(self):
+        """Verifica que cada error se reporta en su elemento sin abortar el lote."""
+        items = [
+            {"op": "divide", "args": ["1", "0"]},
+            {"op": "add", "args": ["abc", "3"]},
+            {"op": "log10", "args": ["-1"]},
+            {"op": "unknown", "args": []},
+            {"op": "add", "args": ["1"]},
+            "not an object",
+            {"op": "add", "args": ["1", "1"]},
+        ]
+        results = list(batch.evaluate_many(self.table, items))
+        self.assertEqual("Division by zero is not possible", results[0]["error"])
+        self.assertEqual("Operator cannot be converted to number", results[1]["error"])
+        self.assertIn("non-positive", results[2]["error"])
+        self.assertIn("Unknown operation", results[3]["error"])
+        self.assertIn("expects 2 operands", results[4]["error"])
+        self.assertEqual(400, results[5]["status"])
+        self.assertEqual({"result": "2"}, results[6])
+
+    @patch('app.util.validate_permissions', return_value=False, create=True)
+    def test_evaluate_multiply_without_permissions(self, _validate_permissions):
+        """Verifica que InvalidPermissions se reporta como error del elemento."""
+        result = batch.evaluate_item(self.table, {"op": "multiply", "args": ["2", "2"]})
+        self.assertEqual({"error": "User has no permissions", "status": 400}, result)
+
+    def test_arithmetic_errors_are_reported_per_item(self):
+        """Verifica que ZeroDivisionError y OverflowError no abortan el lote."""
+        items = [{"op": "sqrt", "args": [10 ** 400]}, {"op": "log10", "args": ["1e999"]}, {"op": "add", "args": [1, 1]}]
+        results = list(batch.evaluate_many(self.table, items))
+        self.assertEqual(400, results[0]["status"])
+        self.assertEqual({"result": "2"}, results[2])
+
+    def test_evaluate_uses_operation_table(self):
+        """Verifica que los lotes usan la misma tabla que /calc: sum n-aria y límite de tamaño."""
+        items = [
+            {"op": "sum", "args": [1, "2", 3.5]},
+            {"op": "sum", "args": []},
+            {"op": "power", "args": [10, 5000]},
+        ]
+        results = list(batch.evaluate_many(self.table, items))
+        self.assertEqual({"result": "6.5"}, results[0])
+        self.assertEqual({"error": "Operation sum expects at least 1 operands", "status": 400}, results[1])
+        self.assertEqual(422, results[2]["status"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
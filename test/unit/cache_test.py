@@ -0,0 +1,65 @@
+import unittest
+import pytest
+
+from app.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_put_and_counters(self):
+        """Verifica los aciertos y fallos de la caché."""
+        cache = LRUCache(maxsize=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(1, cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((1, 1, 0), (stats["hits"], stats["misses"], stats["evictions"]))
+        self.assertEqual(0.5, stats["hit_ratio"])
+
+    def test_evicts_least_recently_used(self):
+        """Verifica que se expulsa la entrada usada hace más tiempo."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(1, cache.stats()["evictions"])
+
+    def test_entries_expire_after_ttl(self):
+        """Verifica que las entradas caducan tras el TTL."""
+        clock = FakeClock()
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 9.9
+        self.assertEqual(1, cache.get("a"))
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(0, len(cache))
+
+    def test_invalidate(self):
+        """Verifica la invalidación total y por predicado."""
+        cache = LRUCache()
+        cache.put(("u1", "x"), 1)
+        cache.put(("u2", "x"), 2)
+        cache.invalidate(lambda key: key[0] == "u1")
+        self.assertIsNone(cache.get(("u1", "x")))
+        self.assertEqual(2, cache.get(("u2", "x")))
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
+
+    def test_invalid_size(self):
+        """Verifica que el tamaño debe ser positivo."""
+        self.assertRaises(ValueError, LRUCache, 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
+from decimal import Decimal
+from fractions import Fraction
 from unittest.mock import patch
 import pytest
 
-from app.calc import Calculator
+from app.calc import DEFAULT_USER, Calculator, acting_as, current_user, iterate_as
 
 
 def mocked_validation(*args, **kwargs):
@@ -148,5 +150,41 @@ class TestCalculate(unittest.TestCase):
         self.assertRaises(ValueError, self.calc.log10, -100)
         self.assertRaises(ValueError, self.calc.log10, -0.001)
 
+    def test_methods_accept_decimal_and_fraction(self):
+        """Verifica que los métodos aceptan Decimal y Fraction y conservan el tipo."""
+        self.assertEqual(Decimal("0.3"), self.calc.add(Decimal("0.1"), Decimal("0.2")))
+        self.assertEqual(Fraction(1, 3), self.calc.divide(Fraction(1), Fraction(3)))
+        self.assertEqual(Decimal("1.5"), self.calc.sqrt(Decimal("2.25")))
+        self.assertEqual(Decimal("3"), self.calc.log10(Decimal("1000")))
+        self.assertRaises(ValueError, self.calc.sqrt, Fraction(-1, 4))
+
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_multiply_checks_current_user(self, _validate_permissions):
+        """Verifica que multiply comprueba los permisos del usuario de la petición."""
+        self.calc.multiply(2, 3)
+        _validate_permissions.assert_called_with("multiply", DEFAULT_USER)
+        with acting_as("alice"):
+            self.calc.multiply(2, 3)
+        _validate_permissions.assert_called_with("multiply", "alice")
+        self.assertEqual(DEFAULT_USER, current_user())
+
+    def test_iterate_as(self):
+        """Verifica que cada paso de un generador se ejecuta con el usuario indicado."""
+        users = list(iterate_as("bob", (current_user() for _ in range(3))))
+        self.assertEqual(["bob", "bob", "bob"], users)
+        self.assertEqual(DEFAULT_USER, current_user())
+
+    def test_sum_method_returns_correct_result(self):
+        """Verifica que sum acepta cualquier número de operandos."""
+        self.assertEqual(6, self.calc.sum(1, 2, 3))
+        self.assertEqual(2.5, self.calc.sum(1, 1.5))
+        self.assertEqual(7, self.calc.sum(7))
+        self.assertEqual(0, self.calc.sum())
+
+    def test_sum_method_fails_with_nan_parameter(self):
+        """Verifica que sum falla si algún operando no es numérico."""
+        self.assertRaises(TypeError, self.calc.sum, 1, "2", 3)
+        self.assertRaises(TypeError, self.calc.sum, None)
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
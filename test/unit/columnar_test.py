@@ -0,0 +1,138 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app import columnar
+from app.calc import InvalidPermissions, main
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def raw(self, name, values, dtype="<f8"):
+        path = self.path(name)
+        np.asarray(values, dtype=dtype).tofile(path)
+        return path
+
+    def test_divide_raw_files_with_mask(self):
+        """Verifica que los divisores cero quedan enmascarados y el resto se calcula."""
+        x = self.raw("x.f8", [1, 2, 3, 4])
+        y = self.raw("y.f8", [2, 0, 3, 0])
+        summary = columnar.run("divide", [x, y], self.path("out.f8"))
+
+        result = np.fromfile(self.path("out.f8"), dtype="<f8")
+        np.testing.assert_array_equal([0.5, np.nan, 1, np.nan], result)
+        np.testing.assert_array_equal([0, 1, 0, 1], np.fromfile(self.path("out.f8.mask"), dtype=np.uint8))
+        self.assertEqual(2, summary["invalid"])
+        self.assertEqual(4, summary["elements"])
+        self.assertEqual("float64", summary["dtype"])
+
+    def test_npy_files_keep_shape(self):
+        """Verifica que los .npy conservan la forma y la máscara se guarda también como .npy."""
+        np.save(self.path("x.npy"), np.array([[4.0, -1.0], [9.0, 0.0]]))
+        summary = columnar.run("sqrt", [self.path("x.npy")], self.path("out.npy"))
+
+        result = np.load(self.path("out.npy"))
+        self.assertEqual((2, 2), result.shape)
+        np.testing.assert_array_equal([[2, np.nan], [3, 0]], result)
+        np.testing.assert_array_equal([[False, True], [False, False]], np.load(self.path("out.mask.npy")))
+        self.assertEqual(self.path("out.mask.npy"), summary["mask"])
+
+    def test_integer_operations_keep_int64(self):
+        """Verifica que add sobre enteros escribe int64 sin pérdida."""
+        big = 2 ** 62
+        x = self.raw("x.i8", [big, 1], "<i8")
+        y = self.raw("y.i8", [1, 2], "<i8")
+        summary = columnar.run("add", [x, y], self.path("out.i8"), dtype="int64")
+        self.assertEqual("int64", summary["dtype"])
+        self.assertEqual([big + 1, 3], np.fromfile(self.path("out.i8"), dtype="<i8").tolist())
+
+    def test_integer_power_writes_float64(self):
+        """Verifica que power sobre int64 escribe float64, también con exponentes negativos."""
+        x = self.raw("x.i8", [2, 3, 2, -8], "<i8")
+        y = self.raw("y.i8", [10, 2, -1, 3], "<i8")
+        summary = columnar.run("power", [x, y], self.path("out.f8"), dtype="int64")
+
+        self.assertEqual("float64", summary["dtype"])
+        result = np.fromfile(self.path("out.f8"), dtype="<f8")
+        np.testing.assert_array_equal([1024, 9, 0.5, -512], result)
+        self.assertEqual(0, summary["invalid"])
+
+        columnar.run("power", [x, self.raw("z.i8", [3, 3, 3, 3], "<i8")], self.path("cube.f8"), dtype="int64")
+        np.testing.assert_array_equal([8, 27, 8, -512], np.fromfile(self.path("cube.f8"), dtype="<f8"))
+
+    def test_chunks_and_workers_match_single_pass(self):
+        """Verifica que el resultado no depende del tamaño de trozo ni del número de procesos."""
+        values = np.linspace(-5, 1000, 10001)
+        x = self.raw("x.f8", values)
+        expected = np.log10(np.where(values > 0, values, np.nan))
+
+        with patch.object(columnar, "TASK_ELEMENTS", 2000):
+            summary = columnar.run("log10", [x], self.path("a.f8"), chunk=7)
+            parallel = columnar.run("log10", [x], self.path("b.f8"), chunk=1000, workers=2)
+
+        np.testing.assert_array_equal(expected, np.fromfile(self.path("a.f8")))
+        np.testing.assert_array_equal(expected, np.fromfile(self.path("b.f8")))
+        self.assertEqual(1429, summary["chunks"])
+        self.assertEqual(summary["invalid"], parallel["invalid"])
+        self.assertEqual(int(np.count_nonzero(values <= 0)), parallel["invalid"])
+
+    def test_empty_input(self):
+        """Verifica que un fichero vacío produce una salida vacía."""
+        summary = columnar.run("sqrt", [self.raw("x.f8", [])], self.path("out.f8"))
+        self.assertEqual(0, summary["elements"])
+        self.assertEqual(0, os.path.getsize(self.path("out.f8")))
+
+    def test_invalid_jobs(self):
+        """Verifica los errores de operación, aridad, tamaños y ficheros de salida."""
+        x = self.raw("x.f8", [1, 2])
+        y = self.raw("y.f8", [1, 2, 3])
+        out = self.path("out.f8")
+        self.assertRaises(ValueError, columnar.run, "modulo", [x, x], out)
+        self.assertRaises(TypeError, columnar.run, "divide", [x], out)
+        self.assertRaises(ValueError, columnar.run, "divide", [x, y], out)
+        self.assertRaises(ValueError, columnar.run, "sqrt", [x], x)
+        self.assertRaises(ValueError, columnar.run, "sqrt", [x], out, mask=out)
+        self.assertRaises(ValueError, columnar.run, "sqrt", [x], out, dtype="int32")
+        self.assertFalse(os.path.exists(out))
+
+    @patch('app.util.validate_permissions', return_value=False, create=True)
+    def test_multiply_checks_permissions_before_writing(self, _validate_permissions):
+        """Verifica que sin permisos no se crea ningún fichero de salida."""
+        x = self.raw("x.f8", [1, 2])
+        self.assertRaises(InvalidPermissions, columnar.run, "multiply", [x, x], self.path("out.f8"))
+        self.assertFalse(os.path.exists(self.path("out.f8")))
+
+    def test_cli(self):
+        """Verifica la orden columnar de la CLI y su resumen JSON."""
+        x = self.raw("x.i8", [4, 16, -1], "<i8")
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            code = main(["columnar", "sqrt", x, "-o", self.path("out.f8"), "--dtype", "int64", "--chunk", "2"])
+        self.assertEqual(0, code)
+        self.assertEqual(1, json.loads(stdout.getvalue())["invalid"])
+        np.testing.assert_array_equal([2, 4, np.nan], np.fromfile(self.path("out.f8")))
+
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            self.assertEqual(1, main(["columnar", "sqrt", self.path("missing.f8"), "-o", self.path("out.f8")]))
+        self.assertIn("error:", stderr.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
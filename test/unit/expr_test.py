@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import Mock, patch
+import pytest
+
+from app import offload
+from app.calc import Calculator, InvalidPermissions
+from app.expr import ExpressionEngine, compile_expression
+
+
+class TestExpressions(unittest.TestCase):
+    def setUp(self):
+        self.calc = Calculator()
+        self.engine = ExpressionEngine(self.calc)
+
+    def test_precedence_and_associativity(self):
+        """Verifica la precedencia de operadores y la asociatividad de la potencia."""
+        self.assertEqual(7, self.engine.evaluate("1 + 2 * 3"))
+        self.assertEqual(2.25, self.engine.evaluate("(1 + 2) * 3 / 4"))
+        self.assertEqual(2 ** 9, self.engine.evaluate("2 ^ 3 ^ 2"))
+        self.assertEqual(-4, self.engine.evaluate("-2 ** 2"))
+        self.assertEqual(0.5, self.engine.evaluate("2 ^ -1"))
+        self.assertEqual(1, self.engine.evaluate("10 - 4 - 5"))
+
+    def test_functions_and_variables(self):
+        """Verifica las funciones de Calculator y las variables."""
+        self.assertEqual(6.0, self.engine.evaluate("sqrt(a*b) + log10(c)", {"a": "2", "b": 8, "c": 100}))
+        self.assertEqual(1023, self.engine.evaluate("power(2, 10) - 1"))
+        self.assertEqual(100000.0, self.engine.evaluate("1e5"))
+        self.assertEqual(10, self.engine.evaluate("sum(1, 2, x) + sum(3)", {"x": 4}))
+
+    def test_keeps_calculator_error_semantics(self):
+        """Verifica que los errores de Calculator se propagan igual."""
+        self.assertRaises(TypeError, self.engine.evaluate, "1 / x", {"x": 0})
+        self.assertRaises(ValueError, self.engine.evaluate, "sqrt(x)", {"x": -4})
+        self.assertRaises(TypeError, self.engine.evaluate, "x + 1", {"x": "abc"})
+        self.assertRaises(ValueError, self.engine.evaluate, "x + y", {"x": 1})
+
+    def test_rejects_non_numeric_bindings(self):
+        """Verifica que las variables que no son números se rechazan aunque no pasen por Calculator."""
+        for value in ([1], {"a": 1}, None):
+            self.assertRaises(TypeError, self.engine.evaluate, "x", {"x": value})
+        self.assertRaises(TypeError, self.engine.evaluate_many, "x", "[{}]")
+        self.assertRaises(TypeError, self.engine.evaluate_many, "x", {"x": 1})
+
+    def test_rejects_invalid_expressions(self):
+        """Verifica que el parser rechaza expresiones inválidas sin usar eval."""
+        for expression in ["", "2 +", "(1 + 2", "1 2", "foo(1)", "sqrt(1, 2)", "__import__('os')", "1; 2", "a.b"]:
+            self.assertRaises(ValueError, compile_expression, expression)
+
+    def test_huge_power_is_rejected(self):
+        """Verifica que las potencias enormes se rechazan antes de calcularse."""
+        self.assertRaises(offload.ResultTooLarge, self.engine.evaluate, "9 ^ 9 ^ 9")
+
+    def test_huge_product_is_rejected(self):
+        """Verifica que los productos enormes también se rechazan antes de calcularse."""
+        big = 10 ** 60000
+        self.assertRaises(offload.ResultTooLarge, self.engine.evaluate, "x * x", {"x": big})
+        self.assertEqual(10 ** 1000, self.engine.evaluate("x * y", {"x": 10 ** 500, "y": 10 ** 500}))
+
+    def test_deep_nesting_is_invalid(self):
+        """Verifica que el anidamiento excesivo es una expresión inválida y no un RecursionError."""
+        for expression in ["(" * 2000 + "1" + ")" * 2000, "-" * 5000 + "1", "2^" * 3000 + "2",
+                           "sqrt(" * 500 + "1" + ")" * 500, "+".join(["1"] * 5000)]:
+            with self.assertRaises(ValueError) as context:
+                compile_expression(expression)
+            self.assertIn("too deeply nested", str(context.exception))
+        self.assertEqual(50, self.engine.evaluate("+".join(["1"] * 50)))
+        self.assertEqual(1, self.engine.evaluate("(" * 50 + "1" + ")" * 50))
+
+    def test_results_use_the_given_formatter(self):
+        """Verifica que evaluate_many formatea con el formateador recibido (el offloader en la API)."""
+        offloader = offload.Offloader(offload_digits=50)
+        try:
+            results = self.engine.evaluate_many("10 ^ x", [{"x": 5000}, {"x": 2}], formatter=offloader.format)
+        finally:
+            offloader.shutdown()
+        self.assertEqual([{"result": "1" + "0" * 5000}, {"result": "100"}], results)
+
+    def test_plans_are_cached(self):
+        """Verifica que los planes compilados se reutilizan por texto de la expresión."""
+        plan = self.engine.compile("x + 1")
+        self.assertIs(plan, self.engine.compile("x + 1"))
+        self.assertEqual(1, self.engine.plans.stats()["hits"])
+        self.assertEqual(frozenset(["x"]), plan.variables)
+
+    def test_permissions_checked_once_per_plan(self):
+        """Verifica que multiply comprueba permisos una vez por evaluación del plan."""
+        permissions = Mock()
+        permissions.is_allowed.return_value = True
+        engine = ExpressionEngine(Calculator(permissions=permissions))
+        results = engine.evaluate_many("a * b * c", [{"a": 1, "b": 2, "c": i} for i in range(10)])
+        self.assertEqual({"result": "18"}, results[9])
+        self.assertEqual(1, permissions.is_allowed.call_count)
+        self.assertFalse(engine.compile("a + b").needs_permission)
+
+    @patch('app.util.validate_permissions', return_value=False, create=True)
+    def test_permission_denied(self, _validate_permissions):
+        """Verifica que sin permisos la evaluación con multiply falla."""
+        self.assertRaises(InvalidPermissions, self.engine.evaluate, "2 * 3")
+        self.assertEqual(5, self.engine.evaluate("2 + 3"))
+
+    def test_evaluate_many_reports_errors_per_binding(self):
+        """Verifica que los errores se reportan por cada conjunto de variables."""
+        results = self.engine.evaluate_many("1 / x", [{"x": 2}, {"x": 0}, {}, "x"])
+        self.assertEqual({"result": "0.5"}, results[0])
+        self.assertEqual("Division by zero is not possible", results[1]["error"])
+        self.assertIn("Unbound variables", results[2]["error"])
+        self.assertEqual(400, results[3]["status"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
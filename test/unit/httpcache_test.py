@@ -0,0 +1,70 @@
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+
+from app import httpcache
+from app.httpcache import HttpCachePolicy
+
+HEADERS = {"Content-Type": "text/plain", "Access-Control-Allow-Origin": "*"}
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.policy = HttpCachePolicy(max_age=60)
+
+    def test_canonical(self):
+        """Verifica la forma canónica de cada tipo de operando."""
+        self.assertEqual("i" + format(10 ** 5000, "x"), httpcache.canonical(10 ** 5000))
+        self.assertNotEqual(httpcache.canonical(2), httpcache.canonical(2.0))
+        self.assertNotEqual(httpcache.canonical(0.0), httpcache.canonical(-0.0))
+        self.assertEqual("q1/3", httpcache.canonical(Fraction(1, 3)))
+        self.assertNotEqual(httpcache.canonical(Decimal("1.1")), httpcache.canonical(Decimal("1.10")))
+
+    def test_etag(self):
+        """Verifica que la ETag es estable, fuerte y depende de operación, backend y versión."""
+        etag = self.policy.etag("add", "float", [2, 3])
+        self.assertEqual(etag, self.policy.etag("add", "float", [2, 3]))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertNotEqual(etag, self.policy.etag("add", "float", [3, 2]))
+        self.assertNotEqual(etag, self.policy.etag("add", "decimal", [2, 3]))
+        self.assertNotEqual(etag, HttpCachePolicy(version="2").etag("add", "float", [2, 3]))
+        self.assertIsNone(self.policy.etag("multiply", "float", [2, 3]))
+
+    def test_per_operation(self):
+        """Verifica que la caché HTTP se puede activar y desactivar por operación."""
+        self.policy.enable("add", False)
+        self.assertIsNone(self.policy.etag("add", "float", [2, 3]))
+        self.policy.enable("multiply")
+        self.assertIsNotNone(self.policy.etag("multiply", "float", [2, 3]))
+
+    def test_headers(self):
+        """Verifica las cabeceras de las respuestas cacheables y no cacheables."""
+        headers = self.policy.headers(HEADERS, '"abc"')
+        self.assertEqual("public, max-age=60, immutable", headers["Cache-Control"])
+        self.assertEqual('"abc"', headers["ETag"])
+        self.assertEqual("no-store", self.policy.headers(HEADERS, None)["Cache-Control"])
+        self.assertNotIn("Cache-Control", HEADERS)
+
+    def test_matches(self):
+        """Verifica la comparación de If-None-Match."""
+        self.assertTrue(httpcache.matches('"abc"', '"abc"'))
+        self.assertTrue(httpcache.matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(httpcache.matches("*", '"abc"'))
+        self.assertFalse(httpcache.matches('"x"', '"abc"'))
+        self.assertFalse(httpcache.matches(None, '"abc"'))
+        self.assertFalse(httpcache.matches("*", None))
+        self.assertFalse(httpcache.matches("*", '"abc"', wildcard=False))
+        self.assertTrue(httpcache.matches('"abc"', '"abc"', wildcard=False))
+
+    def test_revalidate(self):
+        """Verifica que una respuesta cacheada se convierte en 304 si la ETag coincide."""
+        response = ("5", 200, self.policy.headers(HEADERS, '"abc"'))
+        body, status, headers = self.policy.revalidate(response, '"abc"')
+        self.assertEqual(("", 304), (body, status))
+        self.assertNotIn("Content-Type", headers)
+        self.assertIs(response, self.policy.revalidate(response, '"other"'))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import os
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+import pytest
+
+from app.calc import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_main(argv):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        code = main(argv)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+class TestMain(unittest.TestCase):
+    def test_operation(self):
+        """Verifica que la CLI imprime el resultado de una operación."""
+        self.assertEqual((0, "5\n", ""), run_main(["add", "2", "3"]))
+        self.assertEqual((0, "10\n", ""), run_main(["sum", "1", "2", "3", "4"]))
+
+    def test_numeric_backend(self):
+        """Verifica que la CLI acepta el backend numérico."""
+        self.assertEqual((0, "1/3\n", ""), run_main(["divide", "1", "3", "--numeric", "fraction"]))
+        self.assertEqual((0, "0.3\n", ""), run_main(["add", "0.1", "0.2", "--numeric", "decimal"]))
+
+    def test_operation_error(self):
+        """Verifica que los errores de cálculo terminan con código 1 y un mensaje."""
+        code, stdout, stderr = run_main(["sqrt", "-1"])
+        self.assertEqual(1, code)
+        self.assertIn("square root", stderr)
+
+    def test_wrong_arity(self):
+        """Verifica que un número incorrecto de operandos es un error de uso."""
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as context:
+            main(["add", "1"])
+        self.assertEqual(2, context.exception.code)
+
+    def test_cli_does_not_import_heavy_modules(self):
+        """Verifica que python -m app no carga Flask ni los subsistemas opcionales."""
+        script = (
+            "import sys\n"
+            "from app.calc import main\n"
+            "main(['add', '2', '3'])\n"
+            "heavy = ('flask', 'werkzeug', 'numpy', 'api', 'concurrent.futures', 'http.client', 'logging')\n"
+            "print(','.join(sorted(name for name in heavy if name in sys.modules)))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual("5\n\n", result.stdout)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import pytest
+
+from app.memo import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(maxsize=4)
+
+    def test_repeated_requests_hit_the_cache(self):
+        """Verifica que una respuesta guardada se devuelve para los mismos operandos."""
+        response = ("1024", 200, {})
+        self.cache.put("power", ["2", "10"], response, "float")
+        self.assertIs(response, self.cache.get("power", ["2", "10"], "float"))
+        self.assertEqual(1, self.cache.stats()["hits"])
+
+    def test_key_includes_backend_and_raw_operands(self):
+        """Verifica que el backend numérico y el texto de los operandos forman parte de la clave."""
+        self.cache.put("add", ["2", "2"], ("4", 200, {}), "float")
+        self.assertIsNone(self.cache.get("add", ["2", "2"], "decimal"))
+        self.assertIsNone(self.cache.get("add", ["2.0", "2"], "float"))
+
+    def test_only_successful_responses_are_cached(self):
+        """Verifica que la caché de respuestas solo guarda respuestas 200."""
+        self.cache.put("sqrt", ["x"], ("Operator cannot be converted to number", 400, {}))
+        self.assertIsNone(self.cache.get("sqrt", ["x"]))
+        self.assertEqual(0, self.cache.stats()["size"])
+
+    def test_disabled_operations_are_not_cached(self):
+        """Verifica el indicador de activación por operación; multiply nunca se cachea."""
+        self.cache.enable("log10", False)
+        self.cache.put("log10", ["100"], ("2.0", 200, {}))
+        self.cache.put("multiply", ["2", "3"], ("6", 200, {}))
+        self.assertIsNone(self.cache.get("log10", ["100"]))
+        self.assertIsNone(self.cache.get("multiply", ["2", "3"]))
+
+    def test_eviction_is_lru(self):
+        """Verifica que la caché respeta el tamaño máximo."""
+        for i in range(6):
+            self.cache.put("sqrt", [str(i)], (str(i), 200, {}))
+        self.assertEqual(4, self.cache.stats()["size"])
+        self.assertEqual(2, self.cache.stats()["evictions"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,83 @@
+import gc
+import threading
+import time
+import unittest
+import pytest
+
+from app import metrics
+from app.calc import Calculator
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_counters_and_histograms_are_rendered(self):
+        """Verifica el formato de exposición de contadores e histogramas."""
+        metrics.record_request("add", "GET", 200, 0.0003)
+        metrics.record_request("add", "GET", 200, 7.0)
+        metrics.record_error("divide", TypeError("Division by zero is not possible"))
+        text = metrics.render()
+        self.assertIn('calc_requests_total{endpoint="add",method="GET",status="200"} 2', text)
+        self.assertIn('calc_errors_total{endpoint="divide",exception="TypeError"} 1', text)
+        self.assertIn('calc_request_duration_seconds_bucket{endpoint="add",le="0.00025"} 0', text)
+        self.assertIn('calc_request_duration_seconds_bucket{endpoint="add",le="0.0005"} 1', text)
+        self.assertIn('calc_request_duration_seconds_bucket{endpoint="add",le="+Inf"} 2', text)
+        self.assertIn('calc_request_duration_seconds_count{endpoint="add"} 2', text)
+        self.assertIn('# TYPE calc_request_duration_seconds histogram', text)
+
+    def test_per_thread_shards_are_aggregated(self):
+        """Verifica que los agregados de varios hilos se suman al exportar."""
+        def work():
+            for _ in range(1000):
+                metrics.inc("calc_requests_total", (("endpoint", "threads"),))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counters, _ = metrics.snapshot()
+        self.assertEqual(4000, counters[("calc_requests_total", (("endpoint", "threads"),))])
+
+    def test_finished_threads_fold_into_the_aggregate(self):
+        """Verifica que los shards de los hilos terminados no se acumulan y sus datos se conservan."""
+        def work():
+            metrics.inc("calc_requests_total", (("endpoint", "retired"),))
+            metrics.observe("calc_request_duration_seconds", (("endpoint", "retired"),), 0.001)
+
+        metrics._shard()
+        shards = len(metrics._shards)
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        gc.collect()
+        counters, histograms = metrics.snapshot()
+        self.assertEqual(shards, len(metrics._shards))
+        self.assertEqual(20, counters[("calc_requests_total", (("endpoint", "retired"),))])
+        self.assertEqual(20, sum(histograms[("calc_request_duration_seconds", (("endpoint", "retired"),))][:-1]))
+
+    def test_instrument_times_methods_and_keeps_errors(self):
+        """Verifica que los métodos instrumentados se cronometran también cuando fallan."""
+        calc = Calculator()
+        metrics.instrument(calc, ["add", "divide"], "calc_calculator_duration_seconds", "method")
+        self.assertEqual(4, calc.add(2, 2))
+        self.assertRaises(TypeError, calc.divide, 1, 0)
+        _, histograms = metrics.snapshot()
+        self.assertEqual(1, sum(histograms[("calc_calculator_duration_seconds", (("method", "add"),))][:-1]))
+        self.assertEqual(1, sum(histograms[("calc_calculator_duration_seconds", (("method", "divide"),))][:-1]))
+        self.assertEqual(4, Calculator().add(2, 2))
+
+    def test_instrumentation_overhead_per_request(self):
+        """Verifica que registrar una petición cuesta menos de unos pocos microsegundos."""
+        number = 20000
+        start = time.perf_counter()
+        for _ in range(number):
+            metrics.record_request("add", "GET", 200, 0.0001)
+        per_request = (time.perf_counter() - start) / number
+        self.assertLess(per_request, 5e-6)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
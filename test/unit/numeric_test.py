@@ -0,0 +1,64 @@
+import decimal
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+
+from app import numeric
+from app.calc import Calculator
+
+
+class TestNumericBackends(unittest.TestCase):
+    def setUp(self):
+        self.calc = Calculator()
+        self.backends = numeric.build_backends()
+
+    def test_select(self):
+        """Verifica la selección del backend por nombre y el valor por defecto."""
+        self.assertIs(numeric.FLOAT, numeric.select(self.backends, None))
+        self.assertIs(numeric.FLOAT, numeric.select(self.backends, ""))
+        self.assertEqual("decimal", numeric.select(self.backends, "Decimal").name)
+        self.assertRaises(ValueError, numeric.select, self.backends, "binary")
+
+    def test_float_backend(self):
+        """Verifica que el backend float mantiene la conversión de siempre."""
+        self.assertEqual([1, 2.5], numeric.FLOAT.parse(["1", "2.5"]))
+        self.assertEqual(3.5, numeric.FLOAT.evaluate(self.calc.add, ["1", "2.5"]))
+
+    def test_decimal_backend_is_exact(self):
+        """Verifica que los operandos decimales se leen sin pasar por float."""
+        backend = self.backends["decimal"]
+        self.assertEqual([Decimal("0.1"), Decimal("1E+5")], backend.parse(["0.1", "1e5"]))
+        self.assertEqual(Decimal("0.3"), backend.evaluate(self.calc.add, ["0.1", "0.2"]))
+        self.assertRaises(TypeError, backend.parse, ["abc"])
+
+    def test_decimal_context(self):
+        """Verifica que la precisión y el redondeo configurados se aplican al cálculo."""
+        backend = numeric.build_backends(precision=4, rounding=decimal.ROUND_HALF_UP)["decimal"]
+        self.assertEqual(Decimal("0.6667"), backend.evaluate(self.calc.divide, ["2", "3"]))
+        self.assertEqual(Decimal("1.001E+4"), backend.evaluate(self.calc.add, ["10005", "0"]))
+        # El contexto del hilo no cambia
+        self.assertEqual(28, decimal.getcontext().prec)
+
+    def test_decimal_signals_are_type_errors(self):
+        """Verifica que las señales de decimal se traducen en TypeError (400)."""
+        backend = self.backends["decimal"]
+        self.assertRaises(TypeError, backend.evaluate, self.calc.power, ["10", "1e7"])
+        self.assertRaises(TypeError, backend.evaluate, self.calc.sqrt, ["nan"])
+
+    def test_fraction_backend_is_exact(self):
+        """Verifica que el backend racional no pierde precisión."""
+        backend = self.backends["fraction"]
+        self.assertEqual([Fraction(1, 10), Fraction(100000)], backend.parse(["0.1", "1e5"]))
+        self.assertEqual(Fraction(1, 3), backend.evaluate(self.calc.divide, ["1", "3"]))
+        self.assertEqual(Fraction(1), backend.evaluate(self.calc.sum, ["0.1", "0.2", "0.7"]))
+
+    def test_fraction_backend_rejects_invalid_operands(self):
+        """Verifica que se rechazan valores no finitos y exponentes enormes."""
+        backend = self.backends["fraction"]
+        for operand in ("inf", "nan", "1e1000000000", "abc", "1/3"):
+            self.assertRaises(TypeError, backend.parse, [operand])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
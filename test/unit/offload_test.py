@@ -0,0 +1,113 @@
+import time
+import unittest
+from fractions import Fraction
+import pytest
+
+from app import offload
+from app.calc import Calculator
+
+
+def slow_function(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+class TestOffload(unittest.TestCase):
+    def setUp(self):
+        self.calc = Calculator()
+        self.offloader = offload.Offloader(offload_digits=50, max_result_digits=1000, timeout=10, workers=1)
+
+    def tearDown(self):
+        self.offloader.shutdown()
+
+    def test_estimate_power_digits(self):
+        """Verifica la estimación del número de cifras de una potencia."""
+        self.assertEqual(len(str(2 ** 100)), offload.estimate_power_digits(2, 100))
+        self.assertEqual(len(str(99 ** 99)), offload.estimate_power_digits(99, 99))
+        self.assertEqual(1, offload.estimate_power_digits(1, 10 ** 9))
+        self.assertEqual(1, offload.estimate_power_digits(2, -5))
+        self.assertEqual(1, offload.estimate_power_digits(2.5, 100))
+
+    def test_estimate_fraction_digits(self):
+        """Verifica las estimaciones para racionales, incluidos los exponentes negativos."""
+        self.assertEqual(101, offload.estimate_power_digits(Fraction(10), Fraction(100)))
+        self.assertEqual(101, offload.estimate_power_digits(Fraction(1, 10), Fraction(-100)))
+        self.assertEqual(1, offload.estimate_power_digits(Fraction(10), Fraction(1, 2)))
+        self.assertEqual(101, offload.estimate_digits(Fraction(1, 10 ** 100)))
+
+    def test_fraction_power_limit(self):
+        """Verifica que las potencias racionales respetan el mismo límite de tamaño."""
+        self.assertEqual("1/1024", self.offloader.power(self.calc, Fraction(1, 2), Fraction(10)))
+        with self.assertRaises(offload.ResultTooLarge):
+            self.offloader.power(self.calc, Fraction(2, 3), Fraction(5000))
+
+    def test_cheap_power_runs_in_process(self):
+        """Verifica que las potencias baratas no usan el pool de procesos."""
+        self.assertEqual("8", self.offloader.power(self.calc, 2, 3))
+        self.assertEqual("2.0", self.offloader.power(self.calc, 4, 0.5))
+        self.assertIsNone(self.offloader._executor)
+
+    def test_expensive_power_runs_in_process_pool(self):
+        """Verifica que las potencias caras se calculan en el pool de procesos."""
+        self.assertEqual(str(7 ** 200), self.offloader.power(self.calc, 7, 200))
+        self.assertIsNotNone(self.offloader._executor)
+
+    def test_result_size_limit(self):
+        """Verifica que se rechazan resultados por encima del límite sin calcularlos."""
+        with self.assertRaises(offload.ResultTooLarge) as context:
+            self.offloader.power(self.calc, 99999, 99999)
+        self.assertEqual(422, context.exception.status)
+        self.assertRaises(offload.ResultTooLarge, self.offloader.format, 10 ** 2000)
+
+    def test_power_keeps_type_checks(self):
+        """Verifica que power sigue validando los tipos antes de estimar el coste."""
+        self.assertRaises(TypeError, self.offloader.power, self.calc, "2", 2)
+
+    def test_format_large_int(self):
+        """Verifica que los enteros grandes se formatean en otro proceso."""
+        self.assertEqual("1" + "0" * 100, self.offloader.format(10 ** 100))
+        self.assertEqual("3.5", self.offloader.format(3.5))
+
+    def test_timeout(self):
+        """Verifica que una operación que excede el tiempo límite devuelve un error claro."""
+        self.offloader.timeout = 0.1
+        with self.assertRaises(offload.OperationTimeout) as context:
+            self.offloader.run(slow_function, 1)
+        self.assertEqual(503, context.exception.status)
+
+    def test_timeout_recycles_the_pool(self):
+        """Verifica que tras un timeout los procesos se terminan y el pool se recrea."""
+        self.assertEqual("done", self.offloader.run(slow_function, 0))
+        processes = list(self.offloader._executor._processes.values())
+        self.offloader.timeout = 0.2
+        self.assertRaises(offload.OperationTimeout, self.offloader.run, slow_function, 30)
+        self.assertIsNone(self.offloader._executor)
+        for process in processes:
+            process.join(5)
+            self.assertFalse(process.is_alive())
+        self.offloader.timeout = 10
+        self.assertEqual("done", self.offloader.run(slow_function, 0))
+
+    def test_huge_exponent_estimate(self):
+        """Verifica que un exponente mayor que el mayor float no desborda la estimación."""
+        self.assertGreater(offload.estimate_power_digits(10, 10 ** 400), offload.MAX_RESULT_DIGITS)
+        self.assertGreater(offload.estimate_power_digits(Fraction(10), Fraction(-10 ** 400)), offload.MAX_RESULT_DIGITS)
+        self.assertRaises(offload.ResultTooLarge, self.offloader.power, self.calc, 10, 10 ** 400)
+
+    def test_zero_to_negative_power(self):
+        """Verifica que cero elevado a un exponente negativo es una división por cero (400)."""
+        for x in (0, 0.0, Fraction(0)):
+            with self.assertRaises(TypeError) as context:
+                self.offloader.power(self.calc, x, -1 if type(x) is not Fraction else Fraction(-1))
+            self.assertEqual("Division by zero is not possible", str(context.exception))
+
+    def test_float_overflow_is_too_large(self):
+        """Verifica que el desbordamiento de una potencia en coma flotante es un 422 y no un 500."""
+        for x, y in [(10, 1e5), (10.0, 400)]:
+            with self.assertRaises(offload.ResultTooLarge) as context:
+                self.offloader.power(self.calc, x, y)
+            self.assertEqual(422, context.exception.status)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import pytest
+
+from app.calc import Calculator, InvalidPermissions
+from app.offload import Offloader
+from app.operations import OperationTable, accepts, build_table
+
+
+class TestOperationTable(unittest.TestCase):
+    def setUp(self):
+        self.table = build_table(Calculator(), Offloader())
+
+    def test_builtin_operations_registered(self):
+        """Verifica que la tabla contiene las operaciones de la calculadora."""
+        for name in ("add", "substract", "multiply", "divide", "power", "sqrt", "log10", "sum"):
+            self.assertIn(name, self.table)
+        self.assertIsNone(self.table.get("modulo"))
+
+    def test_metadata(self):
+        """Verifica la aridad, los errores y la comprobación de permisos de cada operación."""
+        self.assertEqual(2, self.table.get("add").arity)
+        self.assertEqual(1, self.table.get("sqrt").arity)
+        self.assertIsNone(self.table.get("sum").arity)
+        self.assertIn(ValueError, self.table.get("log10").errors)
+        self.assertIn(InvalidPermissions, self.table.get("multiply").errors)
+        self.assertTrue(self.table.get("multiply").needs_permission)
+        self.assertFalse(self.table.get("add").needs_permission)
+
+    def test_functions_return_formatted_results(self):
+        """Verifica que las funciones enlazadas devuelven el cuerpo de la respuesta."""
+        self.assertEqual("5", self.table.get("add").function(2, 3))
+        self.assertEqual("1.5", self.table.get("divide").function(3, 2))
+        self.assertEqual("8", self.table.get("power").function(2, 3))
+        self.assertEqual("10", self.table.get("sum").function(1, 2, 3, 4))
+
+    def test_costs(self):
+        """Verifica que el coste de power crece con el tamaño del resultado."""
+        self.assertEqual(1, self.table.get("add").cost(2, 3))
+        self.assertAlmostEqual(1, self.table.get("power").cost(2, 3), places=2)
+        self.assertGreater(self.table.get("power").cost(10, 5000), 5)
+        self.assertEqual(1, self.table.get("sum").cost(1, 2, 3))
+        self.assertEqual(10, self.table.get("sum").cost(*range(100)))
+
+    def test_accepts(self):
+        """Verifica la comprobación de aridad, incluidas las operaciones n-arias."""
+        self.assertTrue(accepts(self.table.get("add"), 2))
+        self.assertFalse(accepts(self.table.get("add"), 3))
+        self.assertTrue(accepts(self.table.get("sum"), 5))
+        self.assertFalse(accepts(self.table.get("sum"), 0))
+
+    def test_register_new_operation(self):
+        """Verifica que se pueden registrar operaciones nuevas sin código de vistas."""
+        table = OperationTable()
+        table.register("max", lambda *operands: str(max(operands)), None, errors=(TypeError, ValueError))
+        self.assertEqual(["max"], list(table))
+        self.assertEqual("9", table.get("max").function(3, 9, 1))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
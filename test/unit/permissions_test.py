@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import Mock, patch
+import pytest
+
+from app.calc import Calculator, InvalidPermissions
+from app.permissions import CachedPermissionProvider, UtilPermissionProvider
+
+
+class TestPermissions(unittest.TestCase):
+    @patch('app.util.validate_permissions', return_value=True, create=True)
+    def test_util_provider_delegates_to_validate_permissions(self, validate_permissions):
+        """Verifica que el proveedor por defecto llama a validate_permissions."""
+        self.assertTrue(UtilPermissionProvider().is_allowed("user1", "multiply"))
+        validate_permissions.assert_called_once_with("multiply", "user1")
+
+    def test_cached_provider_caches_by_user_and_operation(self):
+        """Verifica que la decisión se cachea por (usuario, operación)."""
+        backend = Mock()
+        backend.is_allowed.return_value = True
+        provider = CachedPermissionProvider(backend)
+        calc = Calculator(permissions=provider)
+
+        self.assertEqual(6, calc.multiply(2, 3))
+        self.assertEqual(20, calc.multiply(4, 5))
+        self.assertEqual(1, backend.is_allowed.call_count)
+        self.assertEqual(1, provider.stats()["hits"])
+        self.assertEqual(1, provider.stats()["misses"])
+
+    def test_cached_provider_caches_denials(self):
+        """Verifica que las denegaciones también se cachean."""
+        backend = Mock()
+        backend.is_allowed.return_value = False
+        calc = Calculator(permissions=CachedPermissionProvider(backend))
+        self.assertRaises(InvalidPermissions, calc.multiply, 2, 2)
+        self.assertRaises(InvalidPermissions, calc.multiply, 2, 2)
+        self.assertEqual(1, backend.is_allowed.call_count)
+
+    def test_cached_provider_invalidate(self):
+        """Verifica la invalidación explícita por usuario y por operación."""
+        backend = Mock()
+        backend.is_allowed.return_value = True
+        provider = CachedPermissionProvider(backend)
+        provider.is_allowed("user1", "multiply")
+        provider.is_allowed("user2", "multiply")
+
+        provider.invalidate(user="user1")
+        provider.is_allowed("user1", "multiply")
+        provider.is_allowed("user2", "multiply")
+        self.assertEqual(3, backend.is_allowed.call_count)
+
+        provider.invalidate(operation="multiply")
+        provider.is_allowed("user2", "multiply")
+        self.assertEqual(4, backend.is_allowed.call_count)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
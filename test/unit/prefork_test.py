@@ -0,0 +1,37 @@
+import os
+import unittest
+import pytest
+
+from app import prefork
+
+
+class TestPrefork(unittest.TestCase):
+    def test_parse_bind(self):
+        """Verifica la lectura de la dirección host:puerto."""
+        self.assertEqual(("0.0.0.0", 8000), prefork.parse_bind("0.0.0.0:8000"))
+        self.assertEqual(("127.0.0.1", 5000), prefork.parse_bind(":5000"))
+        self.assertEqual(("::1", 5000), prefork.parse_bind("::1:5000"))
+        self.assertRaises(ValueError, prefork.parse_bind, "localhost")
+
+    def test_heartbeat_stale(self):
+        """Verifica que un worker sin latidos recientes se considera bloqueado."""
+        heartbeat = prefork.Heartbeat(2)
+        heartbeat.beat(0, now=100.0)
+        heartbeat.beat(1, now=120.0)
+        self.assertTrue(heartbeat.stale(0, timeout=10, now=125.0))
+        self.assertFalse(heartbeat.stale(1, timeout=10, now=125.0))
+
+    def test_heartbeat_shared_across_fork(self):
+        """Verifica que los latidos de un proceso hijo son visibles en el maestro."""
+        heartbeat = prefork.Heartbeat(2)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            heartbeat.beat(1, now=123.0)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(123.0, heartbeat.last(1))
+        self.assertEqual(0.0, heartbeat.last(0))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
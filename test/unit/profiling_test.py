@@ -0,0 +1,126 @@
+import sys
+import threading
+import unittest
+from unittest.mock import Mock
+import pytest
+
+from app import profiling, util
+from app.calc import Calculator
+
+
+class TestTracer(unittest.TestCase):
+    def test_install_calls_hooks_and_uninstall_restores(self):
+        """Verifica que los hooks reciben cada llamada y que al desinstalar no queda envoltorio."""
+        hook = Mock()
+        calc = Calculator()
+        original = util.convert_to_number
+        tracer = profiling.Tracer([hook])
+        tracer.install(calc, ["add"], "Calculator")
+        tracer.install(util, ["convert_to_number"], "util")
+        try:
+            self.assertEqual(5, calc.add(2, 3))
+            self.assertEqual(4, util.convert_to_number("4"))
+            self.assertEqual(4.5, util.convert_operands(["4.5"])[0])
+        finally:
+            tracer.uninstall()
+
+        names = [call.args[0] for call in hook.call_args_list]
+        self.assertEqual(["Calculator.add", "util.convert_to_number", "util.convert_to_number"], names)
+        self.assertIs(original, util.convert_to_number)
+        self.assertNotIn("add", vars(calc))
+
+    def test_hooks_run_when_the_call_fails(self):
+        """Verifica que las llamadas que lanzan excepción también se trazan."""
+        hook = Mock()
+        calc = Calculator()
+        profiling.Tracer([hook]).install(calc, ["divide"], "Calculator")
+        self.assertRaises(TypeError, calc.divide, 1, 0)
+        hook.assert_called_once()
+
+    def test_record_span_only_while_collecting(self):
+        """Verifica que las llamadas solo se guardan durante una petición perfilada."""
+        profiling.record_span("outside", 0.0, 1.0)
+        with profiling.collecting() as spans:
+            profiling.record_span("inside", 0.0, 0.5)
+        self.assertEqual([{"name": "inside", "seconds": 0.5}], spans)
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = profiling.Profiler(max_seconds=1.0, interval=0.001)
+
+    def test_profile_returns_result_and_stats(self):
+        """Verifica que profile devuelve el resultado y el informe de cProfile."""
+        result, report = self.profiler.profile(Calculator().power, 2, 10)
+        self.assertEqual(1024, result)
+        self.assertIn("function calls", report["profile"])
+        self.assertIn("power", report["profile"])
+        self.assertEqual([], report["spans"])
+
+    def test_collapse(self):
+        """Verifica el formato de pila colapsada, de la raíz a la hoja."""
+        stack = profiling.collapse(sys._getframe(), "MainThread")
+        frames = stack.split(";")
+        self.assertEqual("MainThread", frames[0])
+        self.assertTrue(frames[-1].startswith("test_collapse (profiling_test.py:"))
+        self.assertEqual("a;b 2\nc 1\n", profiling.render_collapsed({"c": 1, "a;b": 2}))
+
+    def test_sample_other_threads(self):
+        """Verifica que el muestreo recoge las pilas de los demás hilos y no la propia."""
+        release = threading.Event()
+
+        def blocked_worker():
+            release.wait()
+
+        thread = threading.Thread(target=blocked_worker, name="calc-worker")
+        thread.start()
+        ticks = iter(range(100))
+        try:
+            counts = self.profiler.sample(0.5, clock=lambda: next(ticks) / 10, sleep=lambda interval: None)
+        finally:
+            release.set()
+            thread.join()
+
+        worker = [stack for stack in counts if stack.startswith("calc-worker;")]
+        self.assertEqual(1, len(worker))
+        self.assertIn("blocked_worker", worker[0])
+        self.assertEqual(5, counts[worker[0]])
+        self.assertFalse(any("test_sample_other_threads" in stack for stack in counts))
+
+    def test_sample_rejects_invalid_arguments(self):
+        """Verifica los límites de duración e intervalo."""
+        self.assertRaises(ValueError, self.profiler.sample, 0)
+        self.assertRaises(ValueError, self.profiler.sample, 2)
+        self.assertRaises(ValueError, self.profiler.sample, float("nan"))
+        self.assertRaises(ValueError, self.profiler.sample, 0.1, 0)
+        self.assertRaises(ValueError, self.profiler.sample, 0.1, 0.2)
+        self.assertRaises(ValueError, self.profiler.sample, 0.1, float("inf"))
+        self.assertRaises(ValueError, self.profiler.sample, 0.1, float("nan"))
+
+    def test_sample_sleeps_until_deadline_at_most(self):
+        """Verifica que la última espera no pasa del final de la captura."""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        self.profiler.sample(0.25, interval=0.1, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual([0.1, 0.1], sleeps[:2])
+        self.assertAlmostEqual(0.05, sleeps[2])
+        self.assertAlmostEqual(0.25, sum(sleeps))
+
+    def test_one_capture_at_a_time(self):
+        """Verifica que una segunda captura simultánea se rechaza con 409."""
+        self.profiler._sample_lock.acquire()
+        try:
+            with self.assertRaises(profiling.ProfilerBusy) as context:
+                self.profiler.sample(0.1)
+        finally:
+            self.profiler._sample_lock.release()
+        self.assertEqual(409, context.exception.status)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
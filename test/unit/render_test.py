@@ -0,0 +1,38 @@
+import math
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+
+from app import render
+
+VALUES = [
+    0, 1, -1, 7, 255, -256, -257, 1023, 1024, 10 ** 20, -(10 ** 20),
+    0.0, -0.0, 0.1 + 0.2, 1 / 3, 1e16, 1e-7, 2.5, math.inf, -math.inf, math.nan, 5e-324,
+    True, False, Decimal("0.30"), Decimal("-1E+3"), Fraction(1, 3), Fraction(4, 2), 1 + 2j,
+]
+
+
+class TestRender(unittest.TestCase):
+    def test_text_matches_format(self):
+        """Verifica que text produce el mismo texto que "{}".format."""
+        for value in VALUES:
+            with self.subTest(value=value):
+                self.assertEqual("{}".format(value), render.text(value))
+
+    def test_to_bytes_matches_format(self):
+        """Verifica que to_bytes produce los mismos bytes que "{}".format(...).encode()."""
+        for value in VALUES + ["8", "Hello from The Calculator!\n", "ñ"]:
+            with self.subTest(value=value):
+                self.assertEqual("{}".format(value).encode(), render.to_bytes(value))
+        self.assertEqual(b"8", render.to_bytes(b"8"))
+
+    def test_small_ints_are_cached(self):
+        """Verifica que los enteros pequeños reutilizan el mismo objeto."""
+        self.assertIs(render.text(500), render.text(250 + 250))
+        self.assertIs(render.to_bytes(-3), render.to_bytes(-1 - 2))
+        self.assertEqual("1024", render.text(render.SMALL_INT_MAX))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
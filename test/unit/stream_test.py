@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+import pytest
+
+from app import stream
+from app.calc import Calculator, main
+from app.offload import Offloader
+from app.operations import build_table
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.offloader = Offloader(max_result_digits=1000)
+        self.table = build_table(Calculator(), self.offloader)
+
+    def tearDown(self):
+        self.offloader.shutdown()
+
+    def test_stream_ndjson_yields_one_line_per_operation(self):
+        """Verifica que cada línea NDJSON produce una línea de resultado."""
+        lines = ['{"op": "add", "args": ["2", "3"]}\n', '\n', 'no json\n', b'{"op": "divide", "args": [1, 0]}\n']
+        output = [json.loads(line) for line in stream.stream_ndjson(self.table, lines)]
+        self.assertEqual({"result": "5"}, output[0])
+        self.assertEqual(400, output[1]["status"])
+        self.assertEqual("Division by zero is not possible", output[2]["error"])
+
+    def test_stream_csv(self):
+        """Verifica que las filas CSV devuelven status y resultado."""
+        lines = ["add,2,3\n", "sqrt,-4\n", "log10,100\n"]
+        output = "".join(stream.stream_csv(self.table, lines))
+        self.assertEqual("200,5\n400,Cannot calculate the square root of a negative number\n200,2.0\n", output)
+
+    def test_bad_lines_do_not_end_the_stream(self):
+        """Verifica que una línea inválida produce su error 400 y el stream continúa."""
+        lines = [b'{"op": "power", "args": [0, -1]}\n', b'\xff\xfe\n', b'{"op": "add", "args": [1, 1]}\n']
+        output = [json.loads(line) for line in stream.stream_ndjson(self.table, lines)]
+        self.assertEqual([400, 400], [output[0]["status"], output[1]["status"]])
+        self.assertEqual({"result": "2"}, output[2])
+
+        lines = [b"\xff,1,2\n", b"sqrt," + b"9" * 400 + b"\n", "add," + "1" * 200000 + "\n", b"add,1,2\n"]
+        rows = "".join(stream.stream_csv(self.table, lines)).splitlines()
+        self.assertEqual(["400", "400", "400"], [row.split(",")[0] for row in rows[:3]])
+        self.assertEqual("200,3", rows[3])
+
+    def test_stream_is_lazy(self):
+        """Verifica que el resultado es un generador que consume la entrada bajo demanda."""
+        consumed = []
+
+        def lines():
+            for i in range(3):
+                consumed.append(i)
+                yield '{"op": "add", "args": [1, 1]}\n'
+
+        results = stream.stream(self.table, lines())
+        next(results)
+        self.assertEqual([0], consumed)
+
+    def test_cli_streams_large_file_with_bounded_memory(self):
+        """Verifica que un fichero sintético grande se procesa con memoria acotada."""
+        rows = 100000
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "job.ndjson")
+            target = os.path.join(directory, "result.ndjson")
+            with open(source, "w") as handle:
+                for i in range(rows):
+                    handle.write('{"op": "add", "args": ["%d", "%d"]}\n' % (i, i))
+
+            tracemalloc.start()
+            try:
+                main(["stream", source, "-o", target])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            self.assertLess(peak, os.path.getsize(source) // 10)
+            with open(target) as handle:
+                count = 0
+                for line in handle:
+                    last = line
+                    count += 1
+            self.assertEqual(rows, count)
+            self.assertEqual({"result": str(2 * (rows - 1))}, json.loads(last))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,3 +1,4 @@
+import math
 import unittest
 import pytest
 
@@ -21,3 +22,31 @@ class TestUtil(unittest.TestCase):
         self.assertRaises(TypeError, util.convert_to_number, "s")
         self.assertRaises(TypeError, util.convert_to_number, None)
         self.assertRaises(TypeError, util.convert_to_number, object())
+
+    def test_convert_to_number_exponents_and_special_values(self):
+        """Verifica la notación científica, los signos y los valores especiales."""
+        self.assertEqual(5, util.convert_to_number("+5"))
+        self.assertIsInstance(util.convert_to_number("+5"), int)
+        self.assertEqual(100000.0, util.convert_to_number("1e5"))
+        self.assertIsInstance(util.convert_to_number("1e5"), float)
+        self.assertEqual(-0.0025, util.convert_to_number("-2.5E-3"))
+        self.assertEqual(0.5, util.convert_to_number(".5"))
+        self.assertEqual(4.0, util.convert_to_number("4."))
+        self.assertEqual(float("inf"), util.convert_to_number("inf"))
+        self.assertEqual(float("-inf"), util.convert_to_number("-Infinity"))
+        self.assertTrue(math.isnan(util.convert_to_number("nan")))
+
+    def test_convert_to_number_rejects_malformed_operands(self):
+        """Verifica que los operandos mal formados se rechazan con TypeError."""
+        for operand in ["-", "+", ".", "e5", "1e", "²", "1.2.3", "--1", "9" * 5000]:
+            self.assertRaises(TypeError, util.convert_to_number, operand)
+
+    def test_convert_to_number_keeps_int_syntax(self):
+        """Verifica que los enteros siguen pasando por int() tal cual, como antes."""
+        self.assertEqual(1000, util.convert_to_number("1_000"))
+        self.assertEqual(12, util.convert_to_number(" 12 "))
+
+    def test_convert_operands(self):
+        """Verifica la conversión de varios operandos en una sola llamada."""
+        self.assertEqual([2, 2.5, 1000.0], util.convert_operands(["2", "2.5", "1e3"]))
+        self.assertRaises(TypeError, util.convert_operands, ["2", "x"])
@@ -0,0 +1,100 @@
+import unittest
+import warnings
+from unittest.mock import Mock, patch
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.calc import InvalidPermissions, acting_as
+from app.vector import VectorCalculator
+
+
+def mocked_validation(*args, **kwargs):
+    return True
+
+
+class TestVectorCalculator(unittest.TestCase):
+    def setUp(self):
+        self.calc = VectorCalculator()
+
+    def test_add_and_substract_element_wise(self):
+        """Verifica que add y substract operan elemento a elemento."""
+        np.testing.assert_array_equal([4, 0, 1.5], self.calc.add([2, -2, 1], [2, 2, 0.5]))
+        np.testing.assert_array_equal([0, -4, 0.5], self.calc.substract([2, -2, 1], [2, 2, 0.5]))
+
+    def test_fails_with_nan_parameter(self):
+        """Verifica que los arrays no numéricos se rechazan como en Calculator."""
+        self.assertRaises(TypeError, self.calc.add, ["2"], [2])
+        self.assertRaises(TypeError, self.calc.add, [2], [None])
+        self.assertRaises(TypeError, self.calc.sqrt, ["4"])
+
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_multiply_checks_permissions_once(self, validate_permissions):
+        """Verifica que multiply valida permisos una sola vez por llamada."""
+        np.testing.assert_array_equal([4, 0, -2], self.calc.multiply([2, 1, -1], [2, 0, 2]))
+        self.assertEqual(1, validate_permissions.call_count)
+
+    @patch('app.util.validate_permissions', return_value=False, create=True)
+    def test_multiply_fails_without_permissions(self, _validate_permissions):
+        """Verifica que multiply lanza InvalidPermissions sin permisos."""
+        self.assertRaises(InvalidPermissions, self.calc.multiply, [1], [2])
+
+    def test_multiply_checks_the_current_user(self):
+        """Verifica que multiply comprueba los permisos del usuario en curso."""
+        permissions = Mock()
+        permissions.is_allowed.return_value = True
+        with acting_as("tenant"):
+            VectorCalculator(permissions).multiply([1], [2])
+        permissions.is_allowed.assert_called_once_with("tenant", "multiply")
+
+    def test_divide_masks_division_by_zero(self):
+        """Verifica que la división por cero se enmascara por elemento."""
+        result = self.calc.divide([10, 1, 7], [2, 0, 2])
+        self.assertEqual([False, True, False], result.mask.tolist())
+        self.assertEqual([5.0, None, 3.5], result.tolist())
+
+    def test_power_matches_scalar_semantics(self):
+        """Verifica que power con exponente negativo devuelve decimales y enmascara complejos."""
+        result = self.calc.power([2, 2, -8], [3, -2, 0.5])
+        self.assertEqual([8.0, 0.25, None], result.tolist())
+
+    def test_power_masks_zero_to_negative_exponent(self):
+        """Verifica que cero elevado a un exponente negativo se enmascara sin avisos de NumPy."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual([None, 4.0, None], self.calc.power([0, 2, 0.0], [-1, 2, -0.5]).tolist())
+
+    @patch('app.util.validate_permissions', side_effect=mocked_validation, create=True)
+    def test_integer_overflow_is_masked(self, _validate_permissions):
+        """Verifica que los resultados que desbordan int64 se enmascaran en lugar de dar la vuelta."""
+        big, lowest = np.iinfo(np.int64).max, np.iinfo(np.int64).min
+        x = np.array([big, lowest, 5, -5], dtype=np.int64)
+        y = np.array([1, -1, 7, -7], dtype=np.int64)
+        self.assertEqual([None, None, 12, -12], self.calc.add(x, y).tolist())
+        self.assertEqual([big - 1, lowest + 1, -2, 2], self.calc.substract(x, y).tolist())
+        self.assertEqual([None, None], self.calc.substract([lowest, big], [1, -1]).tolist())
+        self.assertEqual([big, None, 35, 35], self.calc.multiply(x, y).tolist())
+        self.assertEqual([None, None, -35], self.calc.multiply([2 ** 32, -1, -5], [2 ** 32, lowest, 7]).tolist())
+        self.assertEqual([2 ** 62, None, -2 ** 63, None], self.calc.power([2, 2, -2, 3], [62, 63, 63, 40]).tolist())
+        unsigned = np.array([250, 3], dtype=np.uint8)
+        self.assertEqual([None, 6], self.calc.add(unsigned, unsigned).tolist())
+        self.assertEqual([None, 0], self.calc.substract(np.array([3, 3], dtype=np.uint8), unsigned).tolist())
+
+    def test_sqrt_masks_negative_numbers(self):
+        """Verifica que sqrt enmascara los números negativos."""
+        result = self.calc.sqrt(np.array([9.0, -4.0, 2.25]))
+        self.assertEqual([3.0, None, 1.5], result.tolist())
+
+    def test_log10_masks_non_positive_numbers(self):
+        """Verifica que log10 enmascara los números no positivos."""
+        result = self.calc.log10([100, 0, -10, 0.1])
+        self.assertEqual([2.0, None, None, -1.0], result.tolist())
+
+    def test_masks_propagate_from_inputs(self):
+        """Verifica que los elementos ya enmascarados siguen enmascarados."""
+        values = np.ma.masked_array([4.0, 9.0], mask=[True, False])
+        self.assertEqual([None, 3.0], self.calc.sqrt(values).tolist())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()